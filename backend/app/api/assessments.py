@@ -1,19 +1,41 @@
 """
 Clinical Assessments API
-Endpoints for PHQ-9 and GAD-7 mental health assessments
+Endpoints for PHQ-9, GAD-7 and other registered mental health assessments
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any
-import json
-from datetime import datetime
-
-from app.api.auth import get_current_user
-from app.core.database import get_db_pool
+from typing import List, Callable, Optional, Tuple
+from uuid import UUID
+import base64
+from datetime import datetime, timezone
+
+from app.api.auth import get_current_user, require_role
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.exports import EXPORT_FORMATS, iter_assessment_export
+from app.core.instruments import TYPES_BODY, TYPES_ETAG, get_instrument
+from app.core.responses import cached_response, fast_json
+from app.core.write_behind import (
+    WriteBehindFullError,
+    assessment_journal,
+    record_assessments,
+    stamp_submissions
+)
+from app.db.queries import ASSESSMENT_HISTORY, ASSESSMENT_SUMMARIES, RECORD_ASSESSMENT, THERAPIST_ALERTS
 
 router = APIRouter()
 
+# Number of most recent scores averaged in the summary's rolling average
+ROLLING_AVERAGE_WINDOW = 5
+
+# Maximum number of assessments accepted in one batch submission
+MAX_BATCH_SIZE = 100
+
+# Exports streaming in this worker (at most settings.MAX_CONCURRENT_EXPORTS)
+_active_exports = 0
+
 
 # ==================== PYDANTIC MODELS ====================
 
@@ -36,11 +58,11 @@ class Question(BaseModel):
 
 class QuestionResponse(BaseModel):
     question_id: int
-    score: int = Field(ge=0, le=3)
+    score: int = Field(ge=0)
 
 
 class SubmitAssessmentRequest(BaseModel):
-    type: str = Field(pattern="^(PHQ-9|GAD-7)$")
+    type: str
     responses: List[QuestionResponse]
 
 
@@ -57,321 +79,187 @@ class SubmitAssessmentResponse(BaseModel):
     risk_level: str
 
 
-# ==================== HARDCODED QUESTIONS ====================
-
-PHQ9_QUESTIONS = [
-    {
-        "id": 1,
-        "text": "Little interest or pleasure in doing things",
-        "options": [
-            {"value": 0, "label": "Not at all"},
-            {"value": 1, "label": "Several days"},
-            {"value": 2, "label": "More than half the days"},
-            {"value": 3, "label": "Nearly every day"}
-        ]
-    },
-    {
-        "id": 2,
-        "text": "Feeling down, depressed, or hopeless",
-        "options": [
-            {"value": 0, "label": "Not at all"},
-            {"value": 1, "label": "Several days"},
-            {"value": 2, "label": "More than half the days"},
-            {"value": 3, "label": "Nearly every day"}
-        ]
-    },
-    {
-        "id": 3,
-        "text": "Trouble falling or staying asleep, or sleeping too much",
-        "options": [
-            {"value": 0, "label": "Not at all"},
-            {"value": 1, "label": "Several days"},
-            {"value": 2, "label": "More than half the days"},
-            {"value": 3, "label": "Nearly every day"}
-        ]
-    },
-    {
-        "id": 4,
-        "text": "Feeling tired or having little energy",
-        "options": [
-            {"value": 0, "label": "Not at all"},
-            {"value": 1, "label": "Several days"},
-            {"value": 2, "label": "More than half the days"},
-            {"value": 3, "label": "Nearly every day"}
-        ]
-    },
-    {
-        "id": 5,
-        "text": "Poor appetite or overeating",
-        "options": [
-            {"value": 0, "label": "Not at all"},
-            {"value": 1, "label": "Several days"},
-            {"value": 2, "label": "More than half the days"},
-            {"value": 3, "label": "Nearly every day"}
-        ]
-    },
-    {
-        "id": 6,
-        "text": "Feeling bad about yourself - or that you are a failure or have let yourself or your family down",
-        "options": [
-            {"value": 0, "label": "Not at all"},
-            {"value": 1, "label": "Several days"},
-            {"value": 2, "label": "More than half the days"},
-            {"value": 3, "label": "Nearly every day"}
-        ]
-    },
-    {
-        "id": 7,
-        "text": "Trouble concentrating on things, such as reading the newspaper or watching television",
-        "options": [
-            {"value": 0, "label": "Not at all"},
-            {"value": 1, "label": "Several days"},
-            {"value": 2, "label": "More than half the days"},
-            {"value": 3, "label": "Nearly every day"}
-        ]
-    },
-    {
-        "id": 8,
-        "text": "Moving or speaking so slowly that other people could have noticed. Or the opposite - being so fidgety or restless that you have been moving around a lot more than usual",
-        "options": [
-            {"value": 0, "label": "Not at all"},
-            {"value": 1, "label": "Several days"},
-            {"value": 2, "label": "More than half the days"},
-            {"value": 3, "label": "Nearly every day"}
-        ]
-    },
-    {
-        "id": 9,
-        "text": "Thoughts that you would be better off dead, or of hurting yourself in some way",
-        "options": [
-            {"value": 0, "label": "Not at all"},
-            {"value": 1, "label": "Several days"},
-            {"value": 2, "label": "More than half the days"},
-            {"value": 3, "label": "Nearly every day"}
-        ]
-    }
-]
-
-GAD7_QUESTIONS = [
-    {
-        "id": 1,
-        "text": "Feeling nervous, anxious, or on edge",
-        "options": [
-            {"value": 0, "label": "Not at all"},
-            {"value": 1, "label": "Several days"},
-            {"value": 2, "label": "More than half the days"},
-            {"value": 3, "label": "Nearly every day"}
-        ]
-    },
-    {
-        "id": 2,
-        "text": "Not being able to stop or control worrying",
-        "options": [
-            {"value": 0, "label": "Not at all"},
-            {"value": 1, "label": "Several days"},
-            {"value": 2, "label": "More than half the days"},
-            {"value": 3, "label": "Nearly every day"}
-        ]
-    },
-    {
-        "id": 3,
-        "text": "Worrying too much about different things",
-        "options": [
-            {"value": 0, "label": "Not at all"},
-            {"value": 1, "label": "Several days"},
-            {"value": 2, "label": "More than half the days"},
-            {"value": 3, "label": "Nearly every day"}
-        ]
-    },
-    {
-        "id": 4,
-        "text": "Trouble relaxing",
-        "options": [
-            {"value": 0, "label": "Not at all"},
-            {"value": 1, "label": "Several days"},
-            {"value": 2, "label": "More than half the days"},
-            {"value": 3, "label": "Nearly every day"}
-        ]
-    },
-    {
-        "id": 5,
-        "text": "Being so restless that it is hard to sit still",
-        "options": [
-            {"value": 0, "label": "Not at all"},
-            {"value": 1, "label": "Several days"},
-            {"value": 2, "label": "More than half the days"},
-            {"value": 3, "label": "Nearly every day"}
-        ]
-    },
-    {
-        "id": 6,
-        "text": "Becoming easily annoyed or irritable",
-        "options": [
-            {"value": 0, "label": "Not at all"},
-            {"value": 1, "label": "Several days"},
-            {"value": 2, "label": "More than half the days"},
-            {"value": 3, "label": "Nearly every day"}
-        ]
-    },
-    {
-        "id": 7,
-        "text": "Feeling afraid, as if something awful might happen",
-        "options": [
-            {"value": 0, "label": "Not at all"},
-            {"value": 1, "label": "Several days"},
-            {"value": 2, "label": "More than half the days"},
-            {"value": 3, "label": "Nearly every day"}
-        ]
-    }
-]
+class BatchAssessmentItem(BaseModel):
+    type: str
+    responses: List[QuestionResponse]
 
 
-# ==================== SCORING FUNCTIONS ====================
+class SubmitAssessmentBatchRequest(BaseModel):
+    items: List[BatchAssessmentItem] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
 
-def calculate_phq9_score(responses: List[QuestionResponse]) -> tuple[int, str]:
-    """
-    Calculate PHQ-9 score and risk level
-    Total range: 0-27
-    Scoring: 0-9 low, 10-14 moderate, 15+ high
-    """
-    if len(responses) != 9:
-        raise ValueError("PHQ-9 requires exactly 9 responses")
-    
-    total_score = sum(r.score for r in responses)
-    
-    if total_score <= 9:
-        risk_level = "low"
-    elif total_score <= 14:
-        risk_level = "moderate"
-    else:
-        risk_level = "high"
-    
-    return total_score, risk_level
 
+class BatchItemResult(BaseModel):
+    index: int
+    status: str  # "accepted" or "rejected"
+    total_score: Optional[int] = None
+    risk_level: Optional[str] = None
+    error: Optional[str] = None
 
-def calculate_gad7_score(responses: List[QuestionResponse]) -> tuple[int, str]:
-    """
-    Calculate GAD-7 score and risk level
-    Total range: 0-21
-    Scoring: 0-9 low, 10-14 moderate, 15+ high
+
+class SubmitAssessmentBatchResponse(BaseModel):
+    accepted: int
+    rejected: int
+    results: List[BatchItemResult]
+
+
+class AssessmentSummary(BaseModel):
+    type: str
+    latest_score: int
+    risk_level: str
+    delta: Optional[int] = None
+    rolling_average: float
+    assessment_count: int
+    latest_at: datetime
+
+
+class AssessmentAlert(BaseModel):
+    id: str
+    assessment_id: str
+    user_id: str
+    type: str
+    total_score: int
+    risk_level: str
+    created_at: datetime
+    delivered_at: datetime
+
+
+# ==================== SCORING ====================
+
+def score_assessment(assessment_type: str, responses: List[QuestionResponse]) -> Tuple[int, str]:
     """
-    if len(responses) != 7:
-        raise ValueError("GAD-7 requires exactly 7 responses")
-    
-    total_score = sum(r.score for r in responses)
+    Validate responses against the instrument and calculate score and risk level
     
-    if total_score <= 9:
-        risk_level = "low"
-    elif total_score <= 14:
-        risk_level = "moderate"
-    else:
-        risk_level = "high"
+    Raises:
+        ValueError: If the type is unknown or the responses are invalid
+    """
+    instrument = get_instrument(assessment_type)
+    if instrument is None:
+        raise ValueError(f"Invalid assessment type: {assessment_type}")
     
-    return total_score, risk_level
+    return instrument.score([(r.question_id, r.score) for r in responses])
 
 
-def validate_responses(assessment_type: str, responses: List[QuestionResponse]) -> None:
-    """Validate response format and values"""
-    expected_count = 9 if assessment_type == "PHQ-9" else 7
-    
-    if len(responses) != expected_count:
-        raise ValueError(f"{assessment_type} requires exactly {expected_count} responses")
-    
-    # Check for duplicate question IDs
-    question_ids = [r.question_id for r in responses]
-    if len(question_ids) != len(set(question_ids)):
-        raise ValueError("Duplicate question IDs found")
+def pack_responses(assessment_type: str, responses: List[QuestionResponse]) -> bytes:
+    """Responses in the packed storage format (one byte per item, in item order)"""
+    return get_instrument(assessment_type).pack([(r.question_id, r.score) for r in responses])
+
+
+# ==================== ERRORS ====================
+
+def intake_busy_exception() -> HTTPException:
+    """503 returned when the write-behind journal is full"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Assessment intake is busy. Please retry shortly.",
+        headers={"Retry-After": "1"},
+    )
+
+
+# ==================== CACHING ====================
+
+def _instrument_cache_control() -> str:
+    """Cache-Control for questionnaire definitions (private: they need a JWT)"""
+    return f"private, max-age={settings.INSTRUMENT_CACHE_MAX_AGE_SECONDS}"
+
+
+# ==================== PAGINATION ====================
+
+def encode_history_cursor(created_at: datetime, assessment_id) -> str:
+    """Opaque keyset cursor for the (created_at, id) position of a row"""
+    raw = f"{created_at.isoformat()}|{assessment_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_history_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Decode a cursor produced by encode_history_cursor.
     
-    # Check question IDs are in valid range
-    for r in responses:
-        if r.question_id < 1 or r.question_id > expected_count:
-            raise ValueError(f"Invalid question_id: {r.question_id}")
-        if r.score < 0 or r.score > 3:
-            raise ValueError(f"Invalid score: {r.score}. Must be 0-3")
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, assessment_id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), UUID(assessment_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
 
 
 # ==================== ENDPOINTS ====================
 
 @router.get("/types", response_model=List[AssessmentType])
-async def get_assessment_types(current_user: dict = Depends(get_current_user)):
+async def get_assessment_types(
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
     """
     Get list of available assessment types
     Protected endpoint - requires JWT
+    
+    Served pre-serialized with an ETag; revalidate with If-None-Match.
     """
-    return [
-        {
-            "type": "PHQ-9",
-            "title": "Mental Wellness Check",
-            "duration": "5 min"
-        },
-        {
-            "type": "GAD-7",
-            "title": "Anxiety & Stress Assessment",
-            "duration": "10 min"
-        }
-    ]
+    return cached_response(request, TYPES_BODY, TYPES_ETAG, _instrument_cache_control())
 
 
 @router.get("/{assessment_type}/questions", response_model=List[Question])
 async def get_assessment_questions(
     assessment_type: str,
+    request: Request,
     current_user: dict = Depends(get_current_user)
 ):
     """
     Get questions for a specific assessment type
     Protected endpoint - requires JWT
+    
+    Served pre-serialized with an ETag; revalidate with If-None-Match.
     """
-    if assessment_type == "PHQ-9":
-        return PHQ9_QUESTIONS
-    elif assessment_type == "GAD-7":
-        return GAD7_QUESTIONS
-    else:
+    instrument = get_instrument(assessment_type)
+    if instrument is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Assessment type '{assessment_type}' not found"
         )
+    
+    return cached_response(
+        request,
+        instrument.questions_body,
+        instrument.questions_etag,
+        _instrument_cache_control()
+    )
 
 
 @router.post("/submit", response_model=SubmitAssessmentResponse)
 async def submit_assessment(
     request: SubmitAssessmentRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    db=Depends(get_db)
 ):
     """
     Submit assessment responses
     Validates, calculates score, determines risk level, and persists to database
     """
     try:
-        # Validate responses
-        validate_responses(request.type, request.responses)
+        # Validate, calculate score and risk level
+        total_score, risk_level = score_assessment(request.type, request.responses)
         
-        # Calculate score and risk level
-        if request.type == "PHQ-9":
-            total_score, risk_level = calculate_phq9_score(request.responses)
-        elif request.type == "GAD-7":
-            total_score, risk_level = calculate_gad7_score(request.responses)
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid assessment type: {request.type}"
-            )
+        # Pack responses for storage
+        scores = pack_responses(request.type, request.responses)
         
-        # Convert responses to JSON for storage
-        responses_json = json.dumps([r.dict() for r in request.responses])
-        
-        # Insert into database
-        pool = await get_db_pool()
-        async with pool.acquire() as conn:
-            await conn.execute(
-                """
-                INSERT INTO assessments (user_id, type, responses, total_score, risk_level)
-                VALUES ($1, $2, $3, $4, $5)
-                """,
+        if settings.ASSESSMENT_WRITE_BEHIND:
+            # Acknowledge once durably journaled; written to the database in the background
+            await assessment_journal.append([
+                (current_user["id"], request.type, scores, total_score, risk_level)
+            ])
+        else:
+            # Insert into database and update the summary rollup atomically
+            await db.execute(
+                RECORD_ASSESSMENT,
                 current_user["id"],
                 request.type,
-                responses_json,
+                scores,
                 total_score,
-                risk_level
+                risk_level,
+                ROLLING_AVERAGE_WINDOW
             )
         
         return {
@@ -384,6 +272,8 @@ async def submit_assessment(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except WriteBehindFullError:
+        raise intake_busy_exception()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -391,26 +281,116 @@ async def submit_assessment(
         )
 
 
+@router.post("/submit/batch", response_model=SubmitAssessmentBatchResponse)
+async def submit_assessment_batch(
+    request: SubmitAssessmentBatchRequest,
+    current_user: dict = Depends(get_current_user),
+    db=Depends(get_db)
+):
+    """
+    Submit several assessments at once (e.g. queued by an offline client)
+    
+    Every item is validated and scored independently: invalid items are
+    reported as rejected with the reason, and all valid items are written
+    together in one statement. Items are recorded in the order given:
+    the server timestamps them one microsecond apart.
+    """
+    results = []
+    rows = []
+    
+    for index, item in enumerate(request.items):
+        try:
+            total_score, risk_level = score_assessment(item.type, item.responses)
+        except ValueError as e:
+            results.append({"index": index, "status": "rejected", "error": str(e)})
+            continue
+        
+        results.append({
+            "index": index,
+            "status": "accepted",
+            "total_score": total_score,
+            "risk_level": risk_level
+        })
+        rows.append((
+            current_user["id"],
+            item.type,
+            pack_responses(item.type, item.responses),
+            total_score,
+            risk_level
+        ))
+    
+    if rows:
+        try:
+            if settings.ASSESSMENT_WRITE_BEHIND:
+                # One journal append (and fsync) for the whole batch
+                await assessment_journal.append(rows)
+            else:
+                # One statement, all or nothing. NOW() would give every
+                # item the same created_at and lose their order.
+                await record_assessments(db, stamp_submissions(rows), ROLLING_AVERAGE_WINDOW)
+        except WriteBehindFullError:
+            raise intake_busy_exception()
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to submit assessments: {str(e)}"
+            )
+    
+    return {
+        "accepted": len(rows),
+        "rejected": len(results) - len(rows),
+        "results": results
+    }
+
+
 @router.get("/history", response_model=List[AssessmentResult])
-async def get_assessment_history(current_user: dict = Depends(get_current_user)):
+async def get_assessment_history(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of assessments to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    assessment_type: Optional[str] = Query(None, alias="type", description="Only this assessment type"),
+    since: Optional[datetime] = Query(None, description="Only assessments taken at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only assessments taken before this time"),
+    current_user: dict = Depends(get_current_user),
+    db=Depends(get_db)
+):
     """
     Get assessment history for the current user
-    Returns all past assessments ordered by most recent first
+    Returns past assessments ordered by most recent first, one page at a time
+    
+    Uses keyset pagination on (created_at, id): when more results exist the
+    X-Next-Cursor response header holds the cursor for the next page, so
+    every page costs the same regardless of how much history a user has.
     """
     try:
-        pool = await get_db_pool()
-        async with pool.acquire() as conn:
-            rows = await conn.fetch(
-                """
-                SELECT id, type, total_score, risk_level, created_at
-                FROM assessments
-                WHERE user_id = $1
-                ORDER BY created_at DESC
-                """,
-                current_user["id"]
+        after_created_at, after_id = decode_history_cursor(cursor) if cursor else (None, None)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    try:
+        # Fetch one extra row to learn whether another page exists
+        rows = await db.fetch(
+            ASSESSMENT_HISTORY,
+            current_user["id"],
+            assessment_type,
+            since,
+            until,
+            after_created_at,
+            after_id,
+            limit + 1
+        )
+        
+        if len(rows) > limit:
+            rows = rows[:limit]
+            response.headers["X-Next-Cursor"] = encode_history_cursor(
+                rows[-1]["created_at"],
+                rows[-1]["id"]
             )
         
-        return [
+        return fast_json([
             {
                 "id": str(row["id"]),
                 "type": row["type"],
@@ -419,10 +399,183 @@ async def get_assessment_history(current_user: dict = Depends(get_current_user))
                 "created_at": row["created_at"]
             }
             for row in rows
-        ]
+        ], response)
     
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch assessment history: {str(e)}"
         )
+
+
+@router.get("/summary", response_model=List[AssessmentSummary])
+async def get_assessment_summary(
+    current_user: dict = Depends(get_current_user),
+    db=Depends(get_db)
+):
+    """
+    Get the latest score and trend for each assessment type
+    Reads the per-user rollup maintained on submit, so the cost does not
+    grow with the user's history
+    
+    - **delta**: change from the previous assessment of the same type
+    - **rolling_average**: mean of the last 5 scores
+    """
+    try:
+        rows = await db.fetch(ASSESSMENT_SUMMARIES, current_user["id"])
+        
+        return fast_json([
+            {
+                "type": row["type"],
+                "latest_score": row["latest_score"],
+                "risk_level": row["latest_risk_level"],
+                "delta": (
+                    row["latest_score"] - row["previous_score"]
+                    if row["previous_score"] is not None else None
+                ),
+                "rolling_average": round(sum(row["recent_scores"]) / len(row["recent_scores"]), 2),
+                "assessment_count": row["assessment_count"],
+                "latest_at": row["latest_at"]
+            }
+            for row in rows
+        ])
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch assessment summary: {str(e)}"
+        )
+
+
+@router.get("/alerts", response_model=List[AssessmentAlert])
+async def get_assessment_alerts(
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of alerts"),
+    current_user: dict = Depends(require_role(["therapist"])),
+    db=Depends(get_db)
+):
+    """
+    Get the therapist's high-risk assessment alerts, newest first
+    Therapist-only endpoint
+    
+    Alerts are delivered by a background dispatcher within seconds of a
+    high-risk submission, without slowing the submission down.
+    """
+    try:
+        rows = await db.fetch(THERAPIST_ALERTS, current_user["id"], limit)
+        
+        return fast_json([
+            {
+                "id": str(row["id"]),
+                "assessment_id": str(row["assessment_id"]),
+                "user_id": str(row["user_id"]),
+                "type": row["type"],
+                "total_score": row["total_score"],
+                "risk_level": row["risk_level"],
+                "created_at": row["created_at"],
+                "delivered_at": row["delivered_at"]
+            }
+            for row in rows
+        ])
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch alerts: {str(e)}"
+        )
+
+
+def reserve_export_slot() -> Callable[[], None]:
+    """Count an export as in progress; returns its (idempotent) release"""
+    global _active_exports
+    _active_exports += 1
+    released = False
+    
+    def release() -> None:
+        global _active_exports
+        nonlocal released
+        if not released:
+            released = True
+            _active_exports -= 1
+    
+    return release
+
+
+class ExportResponse(StreamingResponse):
+    """
+    Streams an export and releases its slot once the response is over.
+    
+    The stream releases it too, but never runs if the response fails or
+    the client leaves before the first chunk.
+    """
+    
+    def __init__(self, content, release: Callable[[], None], **kwargs):
+        super().__init__(content, **kwargs)
+        self._release = release
+    
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._release()
+
+
+@router.get("/export")
+async def export_assessments(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    assessment_type: Optional[str] = Query(None, alias="type", description="Only this assessment type"),
+    since: Optional[datetime] = Query(None, description="Only assessments taken at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only assessments taken before this time"),
+    risk_level: Optional[str] = Query(None, description="Only this risk level"),
+    user_id: Optional[UUID] = Query(None, description="Therapists: only this user's assessments"),
+    current_user: dict = Depends(get_current_user),
+    db=Depends(get_db)
+):
+    """
+    Export assessments as NDJSON or CSV, oldest first
+    Therapists export across the organization (optionally one user);
+    everyone else exports their own assessments
+    
+    Rows are streamed from a server-side cursor in one consistent snapshot,
+    so memory use does not depend on the size of the export.
+    """
+    if current_user["role"] != "therapist":
+        if user_id is not None and str(user_id) != str(current_user["id"]):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied. Required role: therapist"
+            )
+        user_id = current_user["id"]
+    
+    if _active_exports >= settings.MAX_CONCURRENT_EXPORTS:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many exports in progress. Please retry shortly.",
+            headers={"Retry-After": "5"},
+        )
+    
+    # Reserved before returning, so concurrent requests see it at once
+    release = reserve_export_slot()
+    
+    async def stream():
+        try:
+            async with db.acquire() as connection:
+                async for chunk in iter_assessment_export(
+                    connection,
+                    export_format,
+                    user_id=user_id,
+                    assessment_type=assessment_type,
+                    since=since,
+                    until=until,
+                    risk_level=risk_level
+                ):
+                    yield chunk
+        finally:
+            release()
+    
+    filename = f"assessments-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.{export_format}"
+    return ExportResponse(
+        stream(),
+        release,
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
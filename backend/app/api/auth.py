@@ -5,20 +5,43 @@ STEP 3: User Registration, Login, and JWT Authentication
 Implements role-based access control for NeuroNet platform
 """
 
-from typing import List
+import logging
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncpg
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError
 from pydantic import BaseModel, EmailStr, Field
 
-from app.core.database import get_db
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import acquire_connection, get_db
+from app.core.matching import PROFILE_CHANNEL
+from app.core.notifications import NotificationListener
+from app.core.responses import PRIVATE_REVALIDATE, entity_etag, not_modified
+from app.core.revocation import revoke_session, revoked_sessions
 from app.core.security import (
-    hash_password,
-    verify_password,
+    PasswordHasherBusyError,
+    hash_password_async,
+    verify_password_async,
+    password_needs_rehash,
     create_access_token,
-    decode_access_token
+    create_refresh_token,
+    decode_access_token,
+    hash_refresh_token
 )
+from app.db.queries import (
+    CREATE_SESSION,
+    REGISTER_USER,
+    ROTATE_REFRESH_TOKEN,
+    UPDATE_PASSWORD_HASH,
+    USED_REFRESH_TOKEN_SESSION,
+    USER_BY_EMAIL,
+    USER_PRINCIPAL
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/auth",
@@ -28,6 +51,12 @@ router = APIRouter(
 # Security scheme for JWT Bearer tokens
 security = HTTPBearer()
 
+# Per-worker cache of authenticated principals, keyed by user id (JWT "sub")
+principal_cache: TTLCache[dict] = TTLCache(
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
 
 # ========================================
 # REQUEST/RESPONSE MODELS
@@ -49,9 +78,15 @@ class LoginRequest(BaseModel):
 class TokenResponse(BaseModel):
     """JWT token response"""
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
 
 
+class RefreshRequest(BaseModel):
+    """Refresh token exchange request"""
+    refresh_token: str = Field(min_length=1)
+
+
 class UserResponse(BaseModel):
     """User information response"""
     id: str
@@ -60,6 +95,70 @@ class UserResponse(BaseModel):
     is_active: bool
 
 
+def hasher_busy_exception() -> HTTPException:
+    """503 returned when the password hashing pool is saturated"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy. Please retry shortly.",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def rehash_password(user_id, password: str, old_hash: str) -> None:
+    """
+    Background task: re-hash a password at the current bcrypt cost.
+    
+    Only replaces the stored hash if it has not changed since login, so a
+    concurrent password change is never overwritten.
+    """
+    try:
+        new_hash = await hash_password_async(password)
+        async with acquire_connection() as conn:
+            await conn.execute(
+                UPDATE_PASSWORD_HASH,
+                new_hash,
+                user_id,
+                old_hash
+            )
+    except PasswordHasherBusyError:
+        logger.info(f"Skipped password rehash for user {user_id}: hashing pool busy")
+    except Exception as e:
+        logger.warning(f"Password rehash failed for user {user_id}: {e}")
+
+
+async def issue_tokens(db, user) -> TokenResponse:
+    """
+    Start a login session and issue its first access/refresh token pair.
+    
+    The session row and the refresh token are created in one statement.
+    """
+    refresh_token, refresh_token_hash = create_refresh_token()
+    
+    session_id = await db.fetchval(
+        CREATE_SESSION,
+        user["id"],
+        refresh_token_hash,
+        settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS
+    )
+    
+    return TokenResponse(
+        access_token=create_session_access_token(user, session_id),
+        refresh_token=refresh_token
+    )
+
+
+def create_session_access_token(user, session_id) -> str:
+    """Create an access token bound to a login session"""
+    return create_access_token(
+        data={
+            "sub": str(user["id"]),
+            "email": user["email"],
+            "role": user["role"],
+            "sid": str(session_id)
+        }
+    )
+
+
 # ========================================
 # AUTHENTICATION DEPENDENCIES
 # ========================================
@@ -71,7 +170,12 @@ async def get_current_user(
     """
     Dependency to get current authenticated user from JWT token.
     
-    Validates JWT token and retrieves user from database.
+    Validates JWT token and retrieves user from database. The users row is
+    cached per worker for PRINCIPAL_CACHE_TTL_SECONDS, so hot read paths
+    do not cost a query on every request.
+    
+    The returned dict also carries the token's login session id
+    ("session_id"), or None for tokens issued without one.
     
     Raises:
         HTTPException 401: If token is invalid or user not found
@@ -87,21 +191,29 @@ async def get_current_user(
         token = credentials.credentials
         payload = decode_access_token(token)
         user_id: str = payload.get("sub")
+        session_id: Optional[str] = payload.get("sid")
         
         if user_id is None:
             raise credentials_exception
+        
+        # Reject tokens from logged-out or compromised sessions (in-memory check)
+        if session_id is not None and revoked_sessions.is_revoked(session_id):
+            raise credentials_exception
             
     except JWTError:
         raise credentials_exception
     
-    # Fetch user from database
-    user = await db.fetchrow(
-        "SELECT id, email, role, is_active FROM users WHERE id = $1",
-        user_id
-    )
+    user = principal_cache.get(user_id)
     
     if user is None:
-        raise credentials_exception
+        # Fetch user from database
+        row = await db.fetchrow(USER_PRINCIPAL, user_id)
+        
+        if row is None:
+            raise credentials_exception
+        
+        user = dict(row)
+        principal_cache.set(user_id, user)
     
     if not user["is_active"]:
         raise HTTPException(
@@ -109,7 +221,29 @@ async def get_current_user(
             detail="User account is inactive"
         )
     
-    return dict(user)
+    return {**user, "session_id": session_id}
+
+
+def invalidate_principal(user_id) -> None:
+    """
+    Drop a user from the principal cache.
+    
+    Called for every notification on PROFILE_CHANNEL, which the users
+    trigger raises whenever a role or is_active flag changes, so every
+    worker re-reads the users row on that user's next request.
+    """
+    principal_cache.invalidate(str(user_id))
+
+
+async def clear_principals(connection: asyncpg.Connection) -> None:
+    """Forget every principal (changes may have been missed while disconnected)"""
+    principal_cache.clear()
+
+
+def register_principal_listener(listener: NotificationListener) -> None:
+    """Keep this worker's principal cache in sync through the listener"""
+    listener.subscribe(PROFILE_CHANNEL, invalidate_principal)
+    listener.on_connect(clear_principals)
 
 
 def require_role(allowed_roles: List[str]):
@@ -154,43 +288,28 @@ async def register(
     - **password**: Minimum 8 characters
     - **role**: Must be one of: user, therapist, buddy
     """
-    # Check if email already exists
-    existing_user = await db.fetchrow(
-        "SELECT id FROM users WHERE email = $1",
-        request.email
-    )
+    # Hash password (off the event loop)
+    try:
+        hashed_password = await hash_password_async(request.password)
+    except PasswordHasherBusyError:
+        raise hasher_busy_exception()
     
-    if existing_user:
+    # Insert user and empty profile atomically in one round trip.
+    # The UNIQUE constraint on email detects duplicates.
+    try:
+        user_id = await db.fetchval(
+            REGISTER_USER,
+            request.email,
+            hashed_password,
+            request.role,
+            True
+        )
+    except asyncpg.UniqueViolationError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    # Hash password
-    hashed_password = hash_password(request.password)
-    
-    # Insert user into database
-    user_id = await db.fetchval(
-        """
-        INSERT INTO users (email, hashed_password, role, is_active)
-        VALUES ($1, $2, $3, $4)
-        RETURNING id
-        """,
-        request.email,
-        hashed_password,
-        request.role,
-        True
-    )
-    
-    # Create empty user profile
-    await db.execute(
-        """
-        INSERT INTO user_profiles (user_id)
-        VALUES ($1)
-        """,
-        user_id
-    )
-    
     return {
         "message": "User registered successfully",
         "user_id": str(user_id)
@@ -200,28 +319,37 @@ async def register(
 @router.post("/login", response_model=TokenResponse)
 async def login(
     request: LoginRequest,
+    background_tasks: BackgroundTasks,
     db=Depends(get_db)
 ):
     """
     Authenticate user and return JWT token.
     
-    Validates credentials and returns an access token for API authentication.
+    Validates credentials and returns an access token for API authentication,
+    plus a refresh token for POST /auth/refresh.
     
     - **email**: Registered email address
     - **password**: User's password
+    
+    Hashes stored with an outdated bcrypt cost are upgraded in the
+    background after the response is sent.
     """
     # Fetch user from database
     user = await db.fetchrow(
-        """
-        SELECT id, email, hashed_password, role, is_active
-        FROM users
-        WHERE email = $1
-        """,
+        USER_BY_EMAIL,
         request.email
     )
     
-    # Validate user exists and password is correct
-    if not user or not verify_password(request.password, user["hashed_password"]):
+    # Validate user exists and password is correct (off the event loop)
+    try:
+        password_valid = user is not None and await verify_password_async(
+            request.password,
+            user["hashed_password"]
+        )
+    except PasswordHasherBusyError:
+        raise hasher_busy_exception()
+    
+    if not password_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -235,20 +363,92 @@ async def login(
             detail="User account is inactive"
         )
     
-    # Create JWT token
-    access_token = create_access_token(
-        data={
-            "sub": str(user["id"]),
-            "email": user["email"],
-            "role": user["role"]
-        }
+    # Upgrade the stored hash if its bcrypt cost is below the active one
+    if password_needs_rehash(user["hashed_password"]):
+        background_tasks.add_task(
+            rehash_password,
+            user["id"],
+            request.password,
+            user["hashed_password"]
+        )
+    
+    # Create JWT access token and refresh token
+    return await issue_tokens(db, user)
+
+
+@router.post("/refresh", response_model=TokenResponse)
+async def refresh(
+    request: RefreshRequest,
+    db=Depends(get_db)
+):
+    """
+    Exchange a refresh token for a new access/refresh token pair.
+    
+    Refresh tokens are single use: each call rotates the token and extends
+    the session. Presenting an already-used token revokes the whole
+    session, since it means the token was copied.
+    
+    No password check is involved, so routine re-authentication costs one
+    database statement instead of a bcrypt verify.
+    """
+    token_hash = hash_refresh_token(request.refresh_token)
+    new_refresh_token, new_refresh_token_hash = create_refresh_token()
+    
+    # Consume the old token, extend the session and store the new token
+    # in a single round trip
+    row = await db.fetchrow(
+        ROTATE_REFRESH_TOKEN,
+        token_hash,
+        new_refresh_token_hash,
+        settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS
     )
     
-    return TokenResponse(access_token=access_token)
+    if row is None:
+        # Reuse of a rotated token: revoke the session it belongs to
+        async with db.transaction() as conn:
+            session_id = await conn.fetchval(USED_REFRESH_TOKEN_SESSION, token_hash)
+            if session_id is not None:
+                await revoke_session(conn, session_id)
+                logger.warning(f"Refresh token reuse detected, revoked session {session_id}")
+        
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if not row["is_active"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is inactive"
+        )
+    
+    return TokenResponse(
+        access_token=create_session_access_token(row, row["session_id"]),
+        refresh_token=new_refresh_token
+    )
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    current_user: dict = Depends(get_current_user),
+    db=Depends(get_db)
+):
+    """
+    Revoke the current login session.
+    
+    Its refresh token stops working immediately and its access tokens are
+    rejected by every worker.
+    """
+    if current_user["session_id"] is not None:
+        async with db.transaction() as conn:
+            await revoke_session(conn, current_user["session_id"])
 
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -257,7 +457,20 @@ async def get_current_user_info(
     Requires valid JWT token in Authorization header.
     
     Returns user's ID, email, role, and account status.
+    
+    Sent with an ETag derived from the authenticated principal (usually
+    cached), so revalidating with If-None-Match gets a 304 without a query.
     """
+    etag = entity_etag(
+        "me", current_user["id"], current_user["email"], current_user["role"], current_user["is_active"]
+    )
+    unchanged = not_modified(request, etag, PRIVATE_REVALIDATE)
+    if unchanged is not None:
+        return unchanged
+    
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = PRIVATE_REVALIDATE
+    
     return UserResponse(
         id=str(current_user["id"]),
         email=current_user["email"],
@@ -7,6 +7,8 @@ Provides system health monitoring endpoints including database connectivity
 from fastapi import APIRouter, Depends
 
 from app.core.database import get_db
+from app.core.security import get_password_hasher_stats, get_token_cache_stats
+from app.db.queries import HEALTH_CHECK, get_query_stats
 
 router = APIRouter(
     prefix="/health",
@@ -38,7 +40,7 @@ async def database_health_check(db=Depends(get_db)):
     """
     try:
         # Execute simple query to verify database connectivity
-        result = await db.fetchval("SELECT 1")
+        result = await db.fetchval(HEALTH_CHECK)
         
         if result == 1:
             return {"database": "connected"}
@@ -47,3 +49,19 @@ async def database_health_check(db=Depends(get_db)):
     except Exception:
         return {"database": "error"}
 
+
+
+@router.get("/stats")
+async def worker_stats():
+    """
+    Worker statistics endpoint
+    
+    Reports this worker's password hashing pool, verified-token cache and
+    query registry counters. Each uvicorn worker keeps its own, so
+    successive requests may be answered by different workers.
+    """
+    return {
+        "password_hasher": get_password_hasher_stats(),
+        "token_cache": get_token_cache_stats(),
+        "queries": get_query_stats()
+    }
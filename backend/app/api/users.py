@@ -5,18 +5,42 @@ STEP 4: User Profile Management
 Allows authenticated users to fetch and update their profile information
 """
 
+from datetime import datetime
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from pydantic import BaseModel, Field, field_validator
 
-from app.api.auth import get_current_user
+from app.api.auth import get_current_user, require_role
 from app.core.database import get_db
+from app.core.matching import (
+    LANGUAGE_WEIGHT,
+    MATCH_ROLES,
+    match_index,
+    match_score,
+    normalize_terms
+)
+from app.core.profile_versions import (
+    current_generation,
+    forget_version,
+    profile_versions,
+    remember_version
+)
+from app.core.responses import PRIVATE_REVALIDATE, entity_etag, fast_json, not_modified
+from app.db.queries import (
+    MATCH_PROFILES,
+    UPDATE_PROFILE,
+    USER_PROFILE,
+    USER_PROFILES_WITH_LATEST_ASSESSMENT
+)
 
 
 router = APIRouter(tags=["users"])
 
+# Maximum number of users resolved by one POST /users/batch
+MAX_BATCH_LOOKUP = 200
+
 
 # Pydantic models for request/response
 class ProfileData(BaseModel):
@@ -64,8 +88,67 @@ class UpdateProfileRequest(BaseModel):
         ])
 
 
+class LatestAssessment(BaseModel):
+    """A user's most recent assessment"""
+    type: str
+    total_score: int
+    risk_level: str
+    created_at: datetime
+
+
+class PatientProfileResponse(UserProfileResponse):
+    """Profile with the user's latest assessment (None if they have none)"""
+    latest_assessment: Optional[LatestAssessment] = None
+
+
+class BatchProfilesRequest(BaseModel):
+    """Request body for bulk profile lookups"""
+    user_ids: List[UUID] = Field(min_length=1, max_length=MAX_BATCH_LOOKUP)
+
+
+class BatchProfilesResponse(BaseModel):
+    """Profiles found, in request order, and the ids that matched no patient of the caller"""
+    profiles: List[PatientProfileResponse]
+    not_found: List[str]
+
+
+class MatchResponse(BaseModel):
+    """A ranked buddy or therapist match"""
+    user_id: str
+    role: str
+    full_name: Optional[str] = None
+    languages: List[str]
+    interests: List[str]
+    shared_languages: List[str]
+    shared_interests: List[str]
+    score: int
+
+
+def profile_body(user_id, email: str, role: str, row) -> dict:
+    """UserProfileResponse-shaped dict from a row with the profile columns"""
+    return {
+        "id": str(user_id),
+        "email": email,
+        "role": role,
+        "profile": {
+            "full_name": row["full_name"],
+            "age": row["age"],
+            "gender": row["gender"],
+            "languages": row["languages"] or [],
+            "interests": row["interests"] or []
+        }
+    }
+
+
+def profile_etag(current_user: dict, version: int) -> str:
+    """ETag of the profile response: its version plus the principal fields shown"""
+    return entity_etag("profile", current_user["id"], version, current_user["email"], current_user["role"])
+
+
 @router.get("/profile", response_model=UserProfileResponse)
 async def get_profile(
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
     db=Depends(get_db)
 ):
@@ -73,26 +156,21 @@ async def get_profile(
     Fetch the authenticated user's profile.
     
     Joins users and user_profiles tables to return complete profile information.
-    """
-    user_id = current_user["id"]
     
-    # Query to join users and user_profiles
-    query = """
-        SELECT 
-            u.id,
-            u.email,
-            u.role,
-            p.full_name,
-            p.age,
-            p.gender,
-            p.languages,
-            p.interests
-        FROM users u
-        LEFT JOIN user_profiles p ON u.id = p.user_id
-        WHERE u.id = $1
+    Sent with an ETag; revalidate with If-None-Match. While this worker
+    knows the profile's current version, a 304 needs no query at all.
     """
+    user_id = str(current_user["id"])
     
-    row = await db.fetchrow(query, UUID(user_id))
+    version = profile_versions.get(user_id)
+    if version is not None:
+        unchanged = not_modified(request, profile_etag(current_user, version), PRIVATE_REVALIDATE)
+        if unchanged is not None:
+            return unchanged
+    
+    # Join users and user_profiles
+    generation = current_generation()
+    row = await db.fetchrow(USER_PROFILE, user_id)
     
     if not row:
         raise HTTPException(
@@ -100,24 +178,28 @@ async def get_profile(
             detail="User not found"
         )
     
-    # Build response with profile data
-    return UserProfileResponse(
-        id=str(row["id"]),
-        email=row["email"],
-        role=row["role"],
-        profile=ProfileData(
-            full_name=row["full_name"],
-            age=row["age"],
-            gender=row["gender"],
-            languages=row["languages"] or [],
-            interests=row["interests"] or []
-        )
+    version = row["version"] or 0
+    remember_version(user_id, version, generation)
+    
+    etag = profile_etag(current_user, version)
+    unchanged = not_modified(request, etag, PRIVATE_REVALIDATE)
+    if unchanged is not None:
+        return unchanged
+    
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = PRIVATE_REVALIDATE
+    
+    # Email and role come from the principal, like the ETag
+    return fast_json(
+        profile_body(current_user["id"], current_user["email"], current_user["role"], row),
+        response
     )
 
 
 @router.put("/profile", response_model=UserProfileResponse)
 async def update_profile(
     profile_update: UpdateProfileRequest,
+    response: Response,
     current_user: dict = Depends(get_current_user),
     db=Depends(get_db)
 ):
@@ -133,84 +215,143 @@ async def update_profile(
             detail="No fields provided for update"
         )
     
-    user_id = current_user["id"]
-    
-    # Build dynamic UPDATE query
-    update_fields = []
-    params = [UUID(user_id)]
-    param_index = 2
-    
-    if profile_update.full_name is not None:
-        update_fields.append(f"full_name = ${param_index}")
-        params.append(profile_update.full_name)
-        param_index += 1
-    
-    if profile_update.age is not None:
-        update_fields.append(f"age = ${param_index}")
-        params.append(profile_update.age)
-        param_index += 1
-    
-    if profile_update.gender is not None:
-        update_fields.append(f"gender = ${param_index}")
-        params.append(profile_update.gender)
-        param_index += 1
-    
-    if profile_update.languages is not None:
-        update_fields.append(f"languages = ${param_index}")
-        params.append(profile_update.languages)
-        param_index += 1
-    
-    if profile_update.interests is not None:
-        update_fields.append(f"interests = ${param_index}")
-        params.append(profile_update.interests)
-        param_index += 1
-    
-    # Always update the updated_at timestamp
-    update_fields.append("updated_at = CURRENT_TIMESTAMP")
-    
-    # Execute update
-    update_query = f"""
-        UPDATE user_profiles
-        SET {', '.join(update_fields)}
-        WHERE user_id = $1
-        RETURNING user_id
-    """
-    
-    result = await db.fetchval(update_query, *params)
+    # Fixed-shape UPDATE: fields left as None keep their current value.
+    # It returns the updated profile, so this is the request's only query.
+    row = await db.fetchrow(
+        UPDATE_PROFILE,
+        current_user["id"],
+        profile_update.full_name,
+        profile_update.age,
+        profile_update.gender,
+        profile_update.languages,
+        profile_update.interests
+    )
     
-    if not result:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Profile not found. Please contact support."
         )
     
-    # Fetch and return updated profile
-    fetch_query = """
-        SELECT 
-            u.id,
-            u.email,
-            u.role,
-            p.full_name,
-            p.age,
-            p.gender,
-            p.languages,
-            p.interests
-        FROM users u
-        LEFT JOIN user_profiles p ON u.id = p.user_id
-        WHERE u.id = $1
+    # Every worker forgets the old version when the trigger's NOTIFY
+    # arrives; until then this worker must not answer 304 for it
+    forget_version(str(current_user["id"]))
+    response.headers["ETag"] = profile_etag(current_user, row["version"])
+    response.headers["Cache-Control"] = PRIVATE_REVALIDATE
+    
+    # Email and role come from the principal loaded by authentication
+    return fast_json(
+        profile_body(current_user["id"], current_user["email"], current_user["role"], row),
+        response
+    )
+
+
+@router.get("/matches", response_model=List[MatchResponse])
+async def get_matches(
+    role: Optional[str] = Query(None, pattern="^(buddy|therapist)$", description="Only buddies or only therapists"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of matches"),
+    current_user: dict = Depends(get_current_user),
+    db=Depends(get_db)
+):
     """
+    Rank active buddies and therapists by shared languages and interests.
     
-    row = await db.fetchrow(fetch_query, UUID(user_id))
-    
-    return UserProfileResponse(
-        id=str(row["id"]),
-        email=row["email"],
-        role=row["role"],
-        profile=ProfileData(
-            full_name=row["full_name"],
-            age=row["age"],
-            gender=row["gender"],
-            languages=row["languages"] or [],
-            interests=row["interests"] or []
+    A shared language counts twice as much as a shared interest. Served
+    from the worker's in-memory match index once it is loaded, otherwise
+    from PostgreSQL.
+    """
+    user_id = current_user["id"]
+    
+    row = await db.fetchrow(USER_PROFILE, user_id)
+    
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
         )
+    
+    languages = normalize_terms(row["languages"])
+    interests = normalize_terms(row["interests"])
+    if not languages and not interests:
+        return []
+    
+    if match_index.loaded:
+        return fast_json([
+            {
+                "user_id": match.user_id,
+                "role": match.profile.role,
+                "full_name": match.profile.full_name,
+                "languages": sorted(match.profile.languages),
+                "interests": sorted(match.profile.interests),
+                "shared_languages": match.shared_languages,
+                "shared_interests": match.shared_interests,
+                "score": match.score
+            }
+            for match in match_index.top_matches(str(user_id), languages, interests, limit, role)
+        ])
+    
+    rows = await db.fetch(
+        MATCH_PROFILES,
+        user_id,
+        languages,
+        interests,
+        [role] if role else MATCH_ROLES,
+        limit,
+        LANGUAGE_WEIGHT
     )
+    
+    return fast_json([
+        {
+            "user_id": str(match["user_id"]),
+            "role": match["role"],
+            "full_name": match["full_name"],
+            "languages": sorted(set(match["languages"] or [])),
+            "interests": sorted(set(match["interests"] or [])),
+            "shared_languages": sorted(match["shared_languages"]),
+            "shared_interests": sorted(match["shared_interests"]),
+            "score": match_score(len(match["shared_languages"]), len(match["shared_interests"]))
+        }
+        for match in rows
+    ])
+
+
+@router.post("/batch", response_model=BatchProfilesResponse)
+async def get_profiles_batch(
+    request: BatchProfilesRequest,
+    current_user: dict = Depends(require_role(["therapist"])),
+    db=Depends(get_db)
+):
+    """
+    Fetch several patients' profiles, each with their latest assessment.
+    
+    Therapist-only, and limited to the caller's assigned patients: any
+    other id is reported in not_found, like an id that matches no user.
+    Resolves every id in one query, so a patient list costs one request
+    and one round trip however many patients it shows. Duplicate ids are
+    returned once.
+    """
+    user_ids = list(dict.fromkeys(request.user_ids))
+    
+    rows = await db.fetch(USER_PROFILES_WITH_LATEST_ASSESSMENT, user_ids, current_user["id"])
+    by_id = {row["id"]: row for row in rows}
+    
+    profiles = []
+    not_found = []
+    for user_id in user_ids:
+        row = by_id.get(user_id)
+        if row is None:
+            not_found.append(str(user_id))
+            continue
+        
+        body = profile_body(row["id"], row["email"], row["role"], row)
+        body["latest_assessment"] = None
+        if row["assessment_type"] is not None:
+            body["latest_assessment"] = {
+                "type": row["assessment_type"],
+                "total_score": row["total_score"],
+                "risk_level": row["risk_level"],
+                "created_at": row["assessed_at"]
+            }
+        profiles.append(body)
+    
+    return fast_json({"profiles": profiles, "not_found": not_found})
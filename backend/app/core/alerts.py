@@ -0,0 +1,151 @@
+"""
+High-Risk Alert Dispatcher
+
+Submitting an assessment only records a high-risk result in the
+assessment_alerts outbox, in the same statement as the assessment itself,
+so the submit path does no extra work. A background task in each worker
+fans pending alerts out to the inboxes of the patient's assigned
+therapists in batches (DISPATCH_ALERTS). Alerts for a patient without
+one go to ALERT_TRIAGE_THERAPIST_ID if it is set, and otherwise stay
+pending until a therapist is assigned; they are never broadcast.
+
+- Prompt: committing an alert or a therapist assignment NOTIFYs
+  ALERT_CHANNEL, which wakes the dispatchers through the listener.
+  ALERT_POLL_INTERVAL is the fallback when a notification is missed
+  (e.g. while the listener reconnects).
+- Visible: alerts left pending without a recipient are counted after
+  every pass and logged as a warning whenever their number changes.
+- Safe to run in every worker: batches are claimed with SKIP LOCKED, and
+  the inbox primary key makes a repeated fan-out a no-op.
+- Retry: a failed batch is rolled back and retried with backoff; the
+  alerts stay pending in the outbox until a fan-out commits.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.database import acquire_connection
+from app.core.notifications import NotificationListener
+from app.db.queries import DISPATCH_ALERTS, PENDING_ALERT_COUNT
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY channel raised by the assessment_alerts insert trigger
+ALERT_CHANNEL = "neuronet_assessment_alert"
+
+# Delay between retries of a failed batch (seconds), doubled up to the maximum
+_RETRY_DELAY = 1.0
+_MAX_RETRY_DELAY = 60.0
+
+
+class AlertDispatcher:
+    """
+    Fans pending alerts out to therapist inboxes in the background.
+    """
+
+    def __init__(self):
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._dispatched = 0
+        self._deliveries = 0
+        self._failures = 0
+        self._undelivered = 0
+
+    def wake(self, payload: str = "") -> None:
+        """Dispatch now instead of at the next poll (listener handler)"""
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        """Start dispatching in a background task"""
+        if self._task is None:
+            self._wakeup.set()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop dispatching; undispatched alerts stay in the outbox"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        delay = _RETRY_DELAY
+
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.ALERT_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            # Cleared before dispatching, so alerts committed meanwhile trigger another pass
+            self._wakeup.clear()
+
+            try:
+                while await self._dispatch_batch() == settings.ALERT_BATCH_SIZE:
+                    pass
+                await self._count_undelivered()
+                delay = _RETRY_DELAY
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failures += 1
+                logger.error(f"Alert dispatch failed, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _MAX_RETRY_DELAY)
+                self._wakeup.set()
+
+    async def _dispatch_batch(self) -> int:
+        """Fan out one batch of pending alerts; returns how many were dispatched"""
+        # One statement, so the claim, fan-out and mark commit together
+        async with acquire_connection() as db:
+            rows = await db.fetch(DISPATCH_ALERTS, settings.ALERT_BATCH_SIZE, settings.ALERT_TRIAGE_THERAPIST_ID)
+
+        deliveries = sum(row["recipients"] for row in rows)
+        if rows:
+            logger.info(f"Dispatched {len(rows)} high-risk alerts to {deliveries} therapist inboxes")
+        self._dispatched += len(rows)
+        self._deliveries += deliveries
+        return len(rows)
+
+    async def _count_undelivered(self) -> None:
+        """Count alerts still pending after a pass (no recipient yet)"""
+        async with acquire_connection() as db:
+            undelivered = await db.fetchval(PENDING_ALERT_COUNT)
+
+        if undelivered and undelivered != self._undelivered:
+            logger.warning(
+                f"{undelivered} high-risk alerts are waiting for an assigned therapist "
+                f"(set ALERT_TRIAGE_THERAPIST_ID to route them to triage)"
+            )
+        self._undelivered = undelivered
+
+    # ==================== STATS ====================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get dispatcher statistics.
+
+        Returns:
+            Dictionary with alerts dispatched, inbox deliveries, failed batches
+            and alerts pending without a recipient
+        """
+        return {
+            "running": self._task is not None,
+            "dispatched": self._dispatched,
+            "deliveries": self._deliveries,
+            "failed_batches": self._failures,
+            "undelivered": self._undelivered,
+        }
+
+
+# Global dispatcher for this worker
+alert_dispatcher = AlertDispatcher()
+
+
+def register_alert_listener(listener: NotificationListener) -> None:
+    """Wake this worker's dispatcher when alerts are committed"""
+    listener.subscribe(ALERT_CHANNEL, alert_dispatcher.wake)
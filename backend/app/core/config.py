@@ -4,6 +4,9 @@ Configuration Management
 Uses pydantic-settings to load environment variables from .env file
 """
 
+from typing import Optional
+from uuid import UUID
+
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -23,6 +26,40 @@ class Settings(BaseSettings):
         description="Neon PostgreSQL connection string (required)"
     )
     
+    # Connection pool (asyncpg) - size per worker, so max_size x workers must
+    # stay under the database's connection limit.
+    # Use DB_STATEMENT_CACHE_SIZE=0 behind PgBouncer in transaction mode.
+    DB_POOL_MIN_SIZE: int = Field(default=1, ge=0, description="Connections kept open when idle")
+    DB_POOL_MAX_SIZE: int = Field(default=5, ge=1, description="Maximum concurrent connections")
+    DB_POOL_ACQUIRE_TIMEOUT: float = Field(
+        default=10.0,
+        gt=0,
+        description="Seconds to wait for a free connection before failing"
+    )
+    DB_POOL_MAX_INACTIVE_LIFETIME: float = Field(
+        default=300.0,
+        ge=0,
+        description="Seconds an idle connection is kept before closing (0 keeps forever)"
+    )
+    DB_POOL_MAX_QUERIES: int = Field(
+        default=50000,
+        ge=1,
+        description="Queries served by a connection before it is replaced"
+    )
+    DB_STATEMENT_CACHE_SIZE: int = Field(
+        default=100,
+        ge=0,
+        description="Prepared statements cached per connection (0 disables)"
+    )
+    DB_COMMAND_TIMEOUT: float = Field(default=60.0, gt=0, description="Per-statement timeout in seconds")
+    
+    # Optional direct (non-pooled) connection string used for LISTEN/NOTIFY.
+    # Defaults to DATABASE_URL; Neon's pooled endpoint cannot LISTEN.
+    DATABASE_LISTEN_URL: Optional[str] = Field(
+        default=None,
+        description="Session-mode PostgreSQL connection string for LISTEN/NOTIFY"
+    )
+    
     # Security Configuration - JWT Authentication
     # IMPORTANT: Change JWT_SECRET_KEY in production!
     JWT_SECRET_KEY: str = Field(
@@ -31,6 +68,172 @@ class Settings(BaseSettings):
     )
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = Field(
+        default=14,
+        ge=1,
+        description="Lifetime of a login session's refresh tokens (renewed on each refresh)"
+    )
+    JWT_BACKEND: str = Field(
+        default="jose",
+        description="JWT library used to sign and verify tokens: jose or pyjwt"
+    )
+    TOKEN_CACHE_MAX_ENTRIES: int = Field(
+        default=10000,
+        ge=0,
+        description="Maximum verified tokens cached per worker (0 disables)"
+    )
+    
+    # Password Hashing - bcrypt cost
+    # With BCRYPT_TARGET_HASH_MS > 0 the cost is calibrated at startup to the
+    # highest value (within min/max) whose hash time stays under the target.
+    # Stored hashes with a lower cost are upgraded on the next login.
+    BCRYPT_ROUNDS: int = Field(
+        default=12,
+        ge=4,
+        le=31,
+        description="bcrypt cost used when no calibration target is set"
+    )
+    BCRYPT_TARGET_HASH_MS: float = Field(
+        default=0,
+        ge=0,
+        description="Target hash latency in milliseconds for startup calibration (0 disables)"
+    )
+    BCRYPT_MIN_ROUNDS: int = Field(default=10, ge=4, le=31)
+    BCRYPT_MAX_ROUNDS: int = Field(default=14, ge=4, le=31)
+    
+    # Password Hashing - bcrypt runs off the event loop in a worker pool
+    # "thread" works well because bcrypt releases the GIL while hashing;
+    # "process" isolates hashing CPU from the API worker entirely.
+    PASSWORD_HASH_EXECUTOR: str = Field(
+        default="thread",
+        pattern="^(thread|process)$",
+        description="Worker pool type used for bcrypt hashing: thread or process"
+    )
+    PASSWORD_HASH_WORKERS: int = Field(
+        default=4,
+        ge=1,
+        description="Number of workers in the password hashing pool"
+    )
+    PASSWORD_HASH_MAX_QUEUE: int = Field(
+        default=32,
+        ge=1,
+        description="Maximum hashing jobs queued or running before new ones are rejected"
+    )
+    
+    # Authenticated principal cache (per worker)
+    # Role changes and deactivations evict entries on every worker through
+    # LISTEN/NOTIFY; the TTL bounds staleness should the listener be down.
+    # Set the TTL to 0 to disable the cache.
+    PRINCIPAL_CACHE_TTL_SECONDS: float = Field(
+        default=30.0,
+        ge=0,
+        description="Maximum staleness of a cached principal in seconds (0 disables)"
+    )
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = Field(
+        default=10000,
+        ge=0,
+        description="Maximum number of principals cached per worker"
+    )
+    
+    # Questionnaire definitions (app/instruments) are static per deploy, so
+    # clients may reuse them for this long and revalidate with the ETag after
+    INSTRUMENT_CACHE_MAX_AGE_SECONDS: int = Field(
+        default=3600,
+        ge=0,
+        description="Cache-Control max-age for questionnaire definitions"
+    )
+    
+    # Assessment exports (GET /assessments/export) streaming at once per
+    # worker; each holds a pooled connection for the whole download
+    MAX_CONCURRENT_EXPORTS: int = Field(
+        default=2,
+        ge=1,
+        description="Concurrent assessment exports per worker before a 503"
+    )
+    
+    # Write-behind assessment ingestion (off by default)
+    # Submissions are acknowledged once appended to a local fsync'd journal
+    # and written to PostgreSQL in batches by a background task. The journal
+    # directory must be on persistent local disk; each worker uses its own
+    # subdirectory and unflushed records are replayed on startup.
+    ASSESSMENT_WRITE_BEHIND: bool = Field(
+        default=False,
+        description="Acknowledge submissions after a local journal append"
+    )
+    WRITE_BEHIND_JOURNAL_DIR: str = Field(
+        default="var/assessment-journal",
+        description="Directory of the write-behind journal"
+    )
+    WRITE_BEHIND_MAX_PENDING: int = Field(
+        default=10000,
+        ge=1,
+        description="Journaled submissions not yet in PostgreSQL before new ones wait"
+    )
+    WRITE_BEHIND_ENQUEUE_TIMEOUT: float = Field(
+        default=2.0,
+        ge=0,
+        description="Seconds a submission waits for room before a 503"
+    )
+    WRITE_BEHIND_BATCH_SIZE: int = Field(
+        default=500,
+        ge=1,
+        description="Maximum assessments written per INSERT"
+    )
+    WRITE_BEHIND_FLUSH_INTERVAL: float = Field(
+        default=0.2,
+        gt=0,
+        description="Seconds between flushes when the journal is not busy"
+    )
+    
+    # High-risk alert fan-out (app/core/alerts.py). Dispatchers are woken by
+    # NOTIFY as soon as an alert commits; the poll interval is the fallback.
+    # Alerts go to the patient's assigned therapists only. Without one they
+    # go to the triage therapist if set, and otherwise stay pending until a
+    # therapist is assigned.
+    ALERT_BATCH_SIZE: int = Field(
+        default=100,
+        ge=1,
+        description="Maximum alerts fanned out per statement"
+    )
+    ALERT_POLL_INTERVAL: float = Field(
+        default=5.0,
+        gt=0,
+        description="Seconds between checks for pending alerts without a notification"
+    )
+    ALERT_TRIAGE_THERAPIST_ID: Optional[UUID] = Field(
+        default=None,
+        description="User id of the therapist who receives alerts for unassigned patients"
+    )
+    
+    # In-memory profile match index for GET /users/matches (per worker,
+    # loaded at startup and refreshed by NOTIFY). When disabled, matches
+    # are ranked by PostgreSQL using the GIN indexes.
+    PROFILE_MATCH_INDEX: bool = Field(
+        default=True,
+        description="Serve profile matches from a per-worker in-memory index"
+    )
+    
+    # Profile version cache (per worker) for answering If-None-Match on
+    # GET /users/profile without a query. Entries are invalidated by
+    # NOTIFY; the TTL bounds staleness if the listener is down.
+    PROFILE_VERSION_CACHE_TTL_SECONDS: float = Field(
+        default=300.0,
+        ge=0,
+        description="Maximum staleness of a cached profile version in seconds (0 disables)"
+    )
+    PROFILE_VERSION_CACHE_MAX_ENTRIES: int = Field(
+        default=10000,
+        ge=0,
+        description="Maximum number of profile versions cached per worker"
+    )
+    
+    # Serialize list and profile responses with orjson directly from the
+    # query results, skipping FastAPI's re-validation against the response
+    # models (app/core/responses.py: fast_json)
+    FAST_JSON_RESPONSES: bool = Field(
+        default=True,
+        description="Serialize responses with orjson without re-validating them"
+    )
     
     @field_validator("JWT_SECRET_KEY")
     @classmethod
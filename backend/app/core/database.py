@@ -5,20 +5,57 @@ STEP 1: Neon PostgreSQL Connection Layer
 - Async connection pooling with asyncpg
 - Drizzle-compatible (uses raw SQL, no ORM)
 - Safe for concurrent requests
+- Pool sizing from Settings, live usage stats via get_pool_stats()
 """
 
+import asyncio
+import bisect
 import logging
-from typing import AsyncGenerator, Optional
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import asyncpg
 
 from app.core.config import settings
+from app.db import queries
 
 # Global connection pool instance
 _pool: Optional[asyncpg.Pool] = None
 
 logger = logging.getLogger(__name__)
 
+# Upper bounds (ms) of the acquire wait time histogram buckets
+ACQUIRE_WAIT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolMetrics:
+    """Counters for connection acquisition, updated from the event loop"""
+    
+    def __init__(self):
+        self.waiters = 0
+        self.peak_waiters = 0
+        self.acquisitions = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        # One bucket per bound plus an overflow bucket
+        self.wait_histogram = [0] * (len(ACQUIRE_WAIT_BUCKETS_MS) + 1)
+    
+    def observe_wait(self, seconds: float) -> None:
+        self.acquisitions += 1
+        self.total_wait_seconds += seconds
+        self.wait_histogram[bisect.bisect_left(ACQUIRE_WAIT_BUCKETS_MS, seconds * 1000)] += 1
+
+
+_metrics = PoolMetrics()
+
+
+async def _init_connection(connection: asyncpg.Connection) -> None:
+    """Pool init hook: prepare the query registry's hot statements"""
+    # Prepared statements cannot be used behind a transaction-mode pooler
+    if settings.DB_STATEMENT_CACHE_SIZE > 0:
+        await queries.prepare_hot_statements(connection)
+
 
 async def connect_to_db() -> None:
     """
@@ -27,9 +64,10 @@ async def connect_to_db() -> None:
     Called on application startup to establish a connection pool.
     Uses asyncpg for async operations and connection pooling.
     
-    Connection pool configuration:
-    - min_size=1: Maintain at least 1 connection
-    - max_size=5: Allow up to 5 concurrent connections (safe for serverless)
+    Connection pool configuration comes from Settings (DB_POOL_*,
+    DB_STATEMENT_CACHE_SIZE, DB_COMMAND_TIMEOUT). The defaults (1-5
+    connections) are safe for serverless preview deployments; replicas
+    can raise them through the environment.
     
     Note: This layer is Drizzle-compatible as it uses raw SQL only.
     No ORM abstractions are used. Drizzle will handle schema & migrations.
@@ -39,11 +77,19 @@ async def connect_to_db() -> None:
     try:
         _pool = await asyncpg.create_pool(
             settings.DATABASE_URL,
-            min_size=1,
-            max_size=5,
-            command_timeout=60
+            min_size=settings.DB_POOL_MIN_SIZE,
+            max_size=settings.DB_POOL_MAX_SIZE,
+            max_queries=settings.DB_POOL_MAX_QUERIES,
+            max_inactive_connection_lifetime=settings.DB_POOL_MAX_INACTIVE_LIFETIME,
+            statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+            command_timeout=settings.DB_COMMAND_TIMEOUT,
+            connection_class=queries.RegistryConnection,
+            init=_init_connection
+        )
+        logger.info(
+            f"✅ Connected to Neon PostgreSQL "
+            f"(pool {settings.DB_POOL_MIN_SIZE}-{settings.DB_POOL_MAX_SIZE})"
         )
-        logger.info("✅ Connected to Neon PostgreSQL")
     except Exception as e:
         logger.error(f"❌ Failed to connect to database: {e}")
         raise
@@ -63,31 +109,189 @@ async def close_db_connection() -> None:
         logger.info("Database connection pool closed")
 
 
-async def get_db() -> AsyncGenerator[asyncpg.Connection, None]:
+@asynccontextmanager
+async def _acquire(pool: asyncpg.Pool) -> AsyncIterator[asyncpg.Connection]:
+    """Acquire a pooled connection, recording wait time and timeouts"""
+    _metrics.waiters += 1
+    _metrics.peak_waiters = max(_metrics.peak_waiters, _metrics.waiters)
+    started = time.perf_counter()
+    
+    try:
+        connection = await pool.acquire(timeout=settings.DB_POOL_ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError:
+        _metrics.timeouts += 1
+        raise
+    finally:
+        _metrics.waiters -= 1
+    
+    _metrics.observe_wait(time.perf_counter() - started)
+    
+    try:
+        yield connection
+    finally:
+        await pool.release(connection)
+
+
+@asynccontextmanager
+async def acquire_connection() -> AsyncIterator["LazyConnection"]:
+    """
+    Hold a pooled connection for work outside a request
+    (background tasks, startup jobs).
+    
+    Yields a LazyConnection pinned to one connection for the block.
+    
+    Usage:
+        async with acquire_connection() as db:
+            await db.execute(...)
+    
+    Raises:
+        RuntimeError: If the pool hasn't been initialized
+        asyncio.TimeoutError: If no connection frees up within DB_POOL_ACQUIRE_TIMEOUT
+    """
+    if not _pool:
+        raise RuntimeError("Database pool not initialized. Call connect_to_db() first.")
+    
+    handle = LazyConnection(_pool)
+    async with handle.acquire():
+        yield handle
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Get live connection pool statistics.
+    
+    Returns:
+        Dictionary with pool size, connections in use / idle, tasks waiting
+        for a connection, acquire counters and an acquire wait time
+        histogram (bucket upper bound in ms -> count)
+    """
+    size = _pool.get_size() if _pool else 0
+    idle = _pool.get_idle_size() if _pool else 0
+    acquisitions = _metrics.acquisitions
+    
+    histogram = {
+        f"le_{bound}ms": count
+        for bound, count in zip(ACQUIRE_WAIT_BUCKETS_MS, _metrics.wait_histogram)
+    }
+    histogram["inf"] = _metrics.wait_histogram[-1]
+    
+    return {
+        "min_size": settings.DB_POOL_MIN_SIZE,
+        "max_size": settings.DB_POOL_MAX_SIZE,
+        "size": size,
+        "in_use": size - idle,
+        "idle": idle,
+        "waiters": _metrics.waiters,
+        "peak_waiters": _metrics.peak_waiters,
+        "acquisitions": acquisitions,
+        "acquire_timeouts": _metrics.timeouts,
+        "avg_acquire_wait_ms": (_metrics.total_wait_seconds / acquisitions * 1000) if acquisitions else 0.0,
+        "acquire_wait_histogram": histogram,
+    }
+
+
+class LazyConnection:
+    """
+    Request-scoped database handle that checks out a pooled connection
+    only while a query is running.
+    
+    Each fetch/fetchrow/fetchval/execute call acquires a connection, runs
+    the statement and releases it straight away, so requests that never
+    touch the database never hold a connection. Inside acquire() or
+    transaction() every call on the handle reuses the connection already
+    checked out, so one request never holds two connections.
+    
+    Statements may be SQL text or registered app.db.queries.Query objects;
+    registered hot queries run on the connection's prepared statements.
+    
+    Not meant for concurrent use by several tasks at once.
+    """
+    
+    def __init__(self, pool: asyncpg.Pool):
+        self._pool = pool
+        self._connection: Optional[asyncpg.Connection] = None
+    
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[asyncpg.Connection]:
+        """
+        Hold one connection for the duration of the block.
+        
+        Re-entrant: nested use yields the connection already held.
+        """
+        if self._connection is not None:
+            yield self._connection
+            return
+        
+        async with _acquire(self._pool) as connection:
+            self._connection = connection
+            try:
+                yield connection
+            finally:
+                self._connection = None
+    
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator["LazyConnection"]:
+        """
+        Run the block inside a transaction on a single connection.
+        
+        Yields the handle itself; every call on it inside the block runs
+        on the transaction's connection.
+        """
+        async with self.acquire() as connection:
+            async with connection.transaction():
+                yield self
+    
+    async def fetch(self, query: Any, *args: Any, **kwargs: Any) -> List[asyncpg.Record]:
+        """Return all result rows"""
+        async with self.acquire() as connection:
+            return await queries.run(connection, "fetch", query, *args, **kwargs)
+    
+    async def fetchrow(self, query: Any, *args: Any, **kwargs: Any) -> Optional[asyncpg.Record]:
+        """Return the first result row"""
+        async with self.acquire() as connection:
+            return await queries.run(connection, "fetchrow", query, *args, **kwargs)
+    
+    async def fetchval(self, query: Any, *args: Any, **kwargs: Any) -> Any:
+        """Return a single value from the first row"""
+        async with self.acquire() as connection:
+            return await queries.run(connection, "fetchval", query, *args, **kwargs)
+    
+    async def execute(self, query: Any, *args: Any, **kwargs: Any) -> str:
+        """Execute a statement and return its status"""
+        async with self.acquire() as connection:
+            return await queries.run(connection, "execute", query, *args, **kwargs)
+    
+    async def executemany(self, query: Any, args: Any, **kwargs: Any) -> None:
+        """Execute a statement for each set of arguments"""
+        async with self.acquire() as connection:
+            return await queries.run(connection, "executemany", query, args, **kwargs)
+
+
+async def get_db() -> LazyConnection:
     """
     Database dependency for FastAPI routes.
     
-    Yields a connection from the pool for the duration of the request.
-    Automatically returns the connection to the pool when done.
+    Returns a lazy, request-scoped handle. A pooled connection is checked
+    out only when a query runs and is returned as soon as it finishes.
+    FastAPI caches the dependency per request, so get_current_user and
+    the route share the same handle.
     
     Usage in routes:
         @router.get("/example")
         async def example(db = Depends(get_db)):
             result = await db.fetch("SELECT * FROM users")
             return result
+        
+        async with db.transaction():
+            await db.execute(...)
+            await db.execute(...)
     
     Note: Uses raw SQL queries only - Drizzle-compatible.
     """
     if not _pool:
         raise RuntimeError("Database pool not initialized. Call connect_to_db() first.")
     
-    # Acquire connection from pool
-    connection = await _pool.acquire()
-    try:
-        yield connection
-    finally:
-        # Always return connection to pool
-        await _pool.release(connection)
+    return LazyConnection(_pool)
 
 
 async def get_db_pool() -> asyncpg.Pool:
@@ -0,0 +1,125 @@
+"""
+Assessment Export
+
+Streams assessments as NDJSON or CSV from a server-side cursor, so memory
+use stays constant however many rows match. Used by GET /assessments/export
+and the export_assessments.py CLI.
+
+The export runs in a read-only REPEATABLE READ transaction: every row comes
+from one consistent snapshot even while new assessments are submitted.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import asyncpg
+
+from app.core.instruments import get_instrument
+from app.db import queries
+from app.db.queries import EXPORT_ASSESSMENTS
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+EXPORT_COLUMNS = ["id", "user_id", "type", "total_score", "risk_level", "created_at", "responses"]
+
+# Rows fetched from the server per cursor round trip
+EXPORT_PREFETCH_ROWS = 1000
+
+# Output is yielded in chunks of about this many bytes
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def _export_responses(row: asyncpg.Record) -> List[Dict[str, int]]:
+    """Answers as [{"question_id", "score"}], from packed scores or legacy JSONB"""
+    if row["scores"] is None:
+        return json.loads(row["responses"])
+
+    instrument = get_instrument(row["type"])
+    if instrument is None:
+        return []
+    return [
+        {"question_id": question_id, "score": score}
+        for question_id, score in instrument.unpack(row["scores"])
+    ]
+
+
+def _export_row(row: asyncpg.Record) -> Dict[str, Any]:
+    return {
+        "id": str(row["id"]),
+        "user_id": str(row["user_id"]),
+        "type": row["type"],
+        "total_score": row["total_score"],
+        "risk_level": row["risk_level"],
+        "created_at": row["created_at"].isoformat(),
+        "responses": _export_responses(row),
+    }
+
+
+async def iter_assessment_export(
+    connection: asyncpg.Connection,
+    export_format: str,
+    user_id: Any = None,
+    assessment_type: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    risk_level: Optional[str] = None
+) -> AsyncIterator[bytes]:
+    """
+    Stream matching assessments, oldest first, as encoded chunks.
+
+    Args:
+        connection: Connection held for the whole export
+        export_format: "ndjson" (one JSON object per line) or "csv" (with header)
+        user_id, assessment_type, since, until, risk_level: Optional filters
+
+    Yields:
+        UTF-8 encoded chunks of about EXPORT_CHUNK_BYTES
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    buffer = io.StringIO()
+    writer = None
+    if export_format == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+
+    async with connection.transaction(isolation="repeatable_read", readonly=True):
+        rows = queries.cursor(
+            connection,
+            EXPORT_ASSESSMENTS,
+            user_id,
+            assessment_type,
+            since,
+            until,
+            risk_level,
+            prefetch=EXPORT_PREFETCH_ROWS
+        )
+
+        async for row in rows:
+            record = _export_row(row)
+
+            if writer is not None:
+                # responses is written as a JSON string in its CSV column
+                record["responses"] = json.dumps(record["responses"], separators=(",", ":"))
+                writer.writerow([record[column] for column in EXPORT_COLUMNS])
+            else:
+                buffer.write(json.dumps(record, separators=(",", ":")))
+                buffer.write("\n")
+
+            if buffer.tell() >= EXPORT_CHUNK_BYTES:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
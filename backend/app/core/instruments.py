@@ -0,0 +1,197 @@
+"""
+Questionnaire Instrument Registry
+
+Instruments (PHQ-9, GAD-7, ...) are defined as JSON files in app/instruments
+and loaded once at import, in file name order (hence the numeric prefixes).
+Each definition holds the items, the shared answer options and the scoring
+bands:
+
+    {
+      "type": "PHQ-9",
+      "title": "Mental Wellness Check",
+      "duration": "5 min",
+      "options": [{"value": 0, "label": "Not at all"}, ...],
+      "items": [{"id": 1, "text": "..."}, ...],
+      "bands": [{"min_score": 0, "risk_level": "low"}, ...]
+    }
+
+The total score is the sum of the answers; the risk level is the last band
+whose min_score it reaches. Adding an instrument means adding a file - the
+assessments table's type CHECK constraint must list the new type as well.
+
+Answers are stored packed, one byte per item in item order (see
+Instrument.pack), so never reorder the items of an instrument in use.
+
+The public representations (types list, questions per type) are serialized
+once with a strong ETag, so the API serves them without re-validating or
+re-encoding anything per request.
+"""
+
+import bisect
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+INSTRUMENTS_DIR = Path(__file__).resolve().parent.parent / "instruments"
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+@dataclass(frozen=True)
+class Instrument:
+    """A questionnaire definition with its pre-serialized questions"""
+    type: str
+    title: str
+    duration: str
+    item_ids: Tuple[int, ...]
+    option_values: frozenset
+    band_min_scores: Tuple[int, ...]
+    band_risk_levels: Tuple[str, ...]
+    questions_body: bytes = field(repr=False)
+    questions_etag: str
+
+    def risk_level(self, total_score: int) -> str:
+        """Risk level of the band the total score falls in"""
+        index = bisect.bisect_right(self.band_min_scores, total_score) - 1
+        return self.band_risk_levels[max(index, 0)]
+
+    def score(self, answers: Sequence[Tuple[int, int]]) -> Tuple[int, str]:
+        """
+        Validate answers and calculate the total score and risk level.
+
+        Args:
+            answers: (question_id, score) pairs, one per item
+
+        Returns:
+            Tuple of (total_score, risk_level)
+
+        Raises:
+            ValueError: If an item is missing, duplicated or unknown, or a
+                score is not one of the instrument's option values
+        """
+        if len(answers) != len(self.item_ids):
+            raise ValueError(f"{self.type} requires exactly {len(self.item_ids)} responses")
+
+        question_ids = [question_id for question_id, _ in answers]
+        if len(question_ids) != len(set(question_ids)):
+            raise ValueError("Duplicate question IDs found")
+
+        total_score = 0
+        for question_id, score in answers:
+            if question_id not in self.item_ids:
+                raise ValueError(f"Invalid question_id: {question_id}")
+            if score not in self.option_values:
+                raise ValueError(
+                    f"Invalid score: {score}. Must be one of {sorted(self.option_values)}"
+                )
+            total_score += score
+
+        return total_score, self.risk_level(total_score)
+
+    def pack(self, answers: Sequence[Tuple[int, int]]) -> bytes:
+        """
+        Compact storage form of validated answers: one byte per item, in
+        item order (so question ids are implied by position).
+        """
+        scores = dict(answers)
+        return bytes(scores[item_id] for item_id in self.item_ids)
+
+    def unpack(self, packed: bytes) -> List[Tuple[int, int]]:
+        """(question_id, score) pairs from the compact storage form"""
+        return list(zip(self.item_ids, packed))
+
+
+def parse_instrument(definition: Dict[str, Any]) -> Instrument:
+    """
+    Build an Instrument from its JSON definition.
+
+    Raises:
+        ValueError: If the definition is incomplete or inconsistent
+    """
+    try:
+        options = definition["options"]
+        items = definition["items"]
+        bands = sorted(definition["bands"], key=lambda band: band["min_score"])
+        instrument_type = definition["type"]
+        title = definition["title"]
+        duration = definition["duration"]
+    except KeyError as e:
+        raise ValueError(f"Instrument definition is missing {e}")
+
+    if not options or not items or not bands:
+        raise ValueError(f"Instrument '{instrument_type}' needs options, items and bands")
+
+    if any(not 0 <= option["value"] <= 255 for option in options):
+        raise ValueError(f"Instrument '{instrument_type}' option values must be 0-255 (stored as bytes)")
+
+    item_ids = tuple(item["id"] for item in items)
+    if len(item_ids) != len(set(item_ids)):
+        raise ValueError(f"Instrument '{instrument_type}' has duplicate item ids")
+
+    questions = [
+        {"id": item["id"], "text": item["text"], "options": options}
+        for item in items
+    ]
+    questions_body = _dumps(questions)
+
+    return Instrument(
+        type=instrument_type,
+        title=title,
+        duration=duration,
+        item_ids=item_ids,
+        option_values=frozenset(option["value"] for option in options),
+        band_min_scores=tuple(band["min_score"] for band in bands),
+        band_risk_levels=tuple(band["risk_level"] for band in bands),
+        questions_body=questions_body,
+        questions_etag=_etag(questions_body),
+    )
+
+
+def load_instruments(directory: Path = INSTRUMENTS_DIR) -> Dict[str, Instrument]:
+    """
+    Load every *.json definition in a directory, ordered by file name.
+
+    Raises:
+        ValueError: If a definition is invalid or a type is defined twice
+    """
+    loaded: Dict[str, Instrument] = {}
+
+    for path in sorted(directory.glob("*.json")):
+        with open(path, encoding="utf-8") as f:
+            try:
+                instrument = parse_instrument(json.load(f))
+            except ValueError as e:
+                raise ValueError(f"{path.name}: {e}")
+
+        if instrument.type in loaded:
+            raise ValueError(f"{path.name}: instrument '{instrument.type}' is already defined")
+        loaded[instrument.type] = instrument
+
+    logger.info(f"Loaded {len(loaded)} instruments: {', '.join(loaded)}")
+    return loaded
+
+
+# Registry loaded once per worker
+instruments: Dict[str, Instrument] = load_instruments()
+
+TYPES_BODY = _dumps([
+    {"type": i.type, "title": i.title, "duration": i.duration}
+    for i in instruments.values()
+])
+TYPES_ETAG = _etag(TYPES_BODY)
+
+
+def get_instrument(assessment_type: str) -> Optional[Instrument]:
+    """Look up an instrument by type (e.g. "PHQ-9")"""
+    return instruments.get(assessment_type)
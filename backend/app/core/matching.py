@@ -0,0 +1,490 @@
+"""
+Profile Matching Index
+
+Ranks active buddies and therapists by how many languages and interests
+they share with a user. Each worker keeps an in-memory inverted index
+(language or interest -> the profiles that have it), so a top-k query is
+a handful of bitset operations instead of a scan of user_profiles.
+
+The index is loaded when the LISTEN/NOTIFY listener (re)connects and kept
+up to date one profile at a time: triggers on user_profiles and users
+NOTIFY PROFILE_CHANNEL with the user id whenever a profile, role or
+active flag changes. Until the first load completes, matches come from
+PostgreSQL (MATCH_PROFILES, served by GIN indexes on match_terms()).
+
+Profiles keep the terms as the user wrote them; matching compares them
+normalized (normalize_terms: whitespace collapsed, lowercased, at most
+MAX_PROFILE_TERMS per list), here when a profile is indexed and in
+PostgreSQL by match_terms(), which must stay in step with it.
+"""
+
+import logging
+from typing import Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+import asyncpg
+
+from app.core.database import acquire_connection
+from app.core.notifications import NotificationListener, run_handler
+from app.db import queries
+from app.db.queries import MATCH_CANDIDATE, MATCH_CANDIDATES
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY channel raised by the profile triggers, payload "<user_id>"
+PROFILE_CHANNEL = "neuronet_profile_updated"
+
+# Roles that can be matched with
+MATCH_ROLES = ["buddy", "therapist"]
+
+# A shared language counts this many shared interests
+LANGUAGE_WEIGHT = 2
+
+# Languages (and interests) kept per profile, and the longest term
+MAX_PROFILE_TERMS = 20
+MAX_TERM_LENGTH = 50
+
+# A term's profiles are kept as a set of slots until it has at least this
+# many, or one per _DENSE_SLOT_RATIO slots in the index if that is more;
+# then as a bitmap, which is smaller from there on (at most 64 bytes per
+# profile) and turns into a query bitset without a Python loop
+_DENSE_MIN_SLOTS = 1024
+_DENSE_SLOT_RATIO = 512
+
+# Rows fetched per round trip while loading the index
+_LOAD_PREFETCH_ROWS = 5000
+
+
+class MatchProfile(NamedTuple):
+    role: str
+    full_name: Optional[str]
+    languages: FrozenSet[str]
+    interests: FrozenSet[str]
+
+
+class Match(NamedTuple):
+    user_id: str
+    profile: MatchProfile
+    shared_languages: List[str]
+    shared_interests: List[str]
+    score: int
+
+
+def match_score(shared_languages: int, shared_interests: int) -> int:
+    """Rank of a candidate (higher is better)"""
+    return LANGUAGE_WEIGHT * shared_languages + shared_interests
+
+
+def normalize_term(term: str) -> str:
+    """Canonical form of a language or interest"""
+    return " ".join(term.split()).lower()
+
+
+def normalize_terms(values: Optional[Iterable[str]]) -> List[str]:
+    """Normalized, de-duplicated terms in their original order, capped at MAX_PROFILE_TERMS"""
+    terms: Dict[str, None] = {}
+    for value in values or ():
+        term = normalize_term(value)[:MAX_TERM_LENGTH]
+        if term:
+            terms[term] = None
+            if len(terms) == MAX_PROFILE_TERMS:
+                break
+    return list(terms)
+
+
+def _terms(values: Optional[Iterable[str]]) -> FrozenSet[str]:
+    return frozenset(normalize_terms(values))
+
+
+def _bitset(slots: Iterable[int]) -> int:
+    """Integer with the given bit positions set"""
+    return int.from_bytes(_bitmap(slots), "little")
+
+
+def _bitmap(slots: Iterable[int]) -> bytearray:
+    """Bitmap (bit i of byte i // 8 per slot) with the given slots set"""
+    slots = list(slots)
+    bitmap = bytearray((max(slots) >> 3) + 1)
+    for slot in slots:
+        bitmap[slot >> 3] |= 1 << (slot & 7)
+    return bitmap
+
+
+def _bitmap_slots(bitmap: bytearray) -> Set[int]:
+    """The slots set in a bitmap"""
+    bits = int.from_bytes(bitmap, "little")
+    slots = set()
+    while bits:
+        lowest = bits & -bits
+        slots.add(lowest.bit_length() - 1)
+        bits ^= lowest
+    return slots
+
+
+def dense_threshold(capacity: int) -> int:
+    """Profiles a term needs before its postings switch to a bitmap"""
+    return max(_DENSE_MIN_SLOTS, capacity // _DENSE_SLOT_RATIO)
+
+
+class Postings:
+    """
+    The slots of the profiles holding each term.
+
+    Rare terms (most interests) keep a set of slots, so memory grows with
+    the number of postings rather than terms times profiles. Terms held
+    by at least dense_threshold() profiles keep a bitmap, updated in
+    place; it goes back to a set once the term drops to a quarter of the
+    threshold. Either way adding or removing a profile is O(1).
+    """
+
+    def __init__(self):
+        self._sparse: Dict[str, Set[int]] = {}
+        self._dense: Dict[str, bytearray] = {}
+        self._dense_counts: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._sparse) + len(self._dense)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._sparse
+        yield from self._dense
+
+    def is_dense(self, term: str) -> bool:
+        return term in self._dense
+
+    @classmethod
+    def build(cls, slots_by_term: Dict[str, List[int]], threshold: int) -> "Postings":
+        """Bulk-load postings, choosing each term's representation once"""
+        postings = cls()
+        for term, slots in slots_by_term.items():
+            if len(slots) >= threshold:
+                postings._dense[term] = _bitmap(slots)
+                postings._dense_counts[term] = len(slots)
+            else:
+                postings._sparse[term] = set(slots)
+        return postings
+
+    def add(self, term: str, slot: int, threshold: int) -> None:
+        bitmap = self._dense.get(term)
+        if bitmap is not None:
+            if slot >> 3 >= len(bitmap):
+                bitmap.extend(bytes((slot >> 3) + 1 - len(bitmap)))
+            bitmap[slot >> 3] |= 1 << (slot & 7)
+            self._dense_counts[term] += 1
+            return
+
+        slots = self._sparse.setdefault(term, set())
+        slots.add(slot)
+        if len(slots) >= threshold:
+            del self._sparse[term]
+            self._dense[term] = _bitmap(slots)
+            self._dense_counts[term] = len(slots)
+
+    def remove(self, term: str, slot: int, threshold: int) -> None:
+        bitmap = self._dense.get(term)
+        if bitmap is not None:
+            bitmap[slot >> 3] &= ~(1 << (slot & 7)) & 0xFF
+            count = self._dense_counts[term] - 1
+            if count * 4 >= threshold:
+                self._dense_counts[term] = count
+                return
+            del self._dense[term]
+            del self._dense_counts[term]
+            if count:
+                self._sparse[term] = _bitmap_slots(bitmap)
+            return
+
+        slots = self._sparse.get(term)
+        if slots is not None:
+            slots.discard(slot)
+            if not slots:
+                del self._sparse[term]
+
+    def bitset(self, term: str) -> int:
+        """Integer bitset of the term's slots (0 if no profile has it)"""
+        bitmap = self._dense.get(term)
+        if bitmap is not None:
+            return int.from_bytes(bitmap, "little")
+        slots = self._sparse.get(term)
+        return _bitset(slots) if slots else 0
+
+
+class MatchIndex:
+    """
+    Inverted index over the languages and interests of matchable profiles.
+
+    Every profile occupies a slot. A query turns the posting lists of the
+    caller's terms (and the role filter) into integer bitsets of slots and
+    ranks with a few dozen whole-bitset operations done in C rather than a
+    loop over candidates:
+
+    - The weighted overlap of every profile is summed at once as a
+      bit-sliced counter (one bitset per binary digit of the score).
+    - Profiles are then taken score level by score level, highest first,
+      until the limit is reached.
+
+    Ties within a score level come out in slot order. Not thread-safe:
+    intended to be used from the event loop only.
+    """
+
+    def __init__(self):
+        self._slots: Dict[str, int] = {}
+        self._user_ids: List[Optional[str]] = []
+        self._profiles: List[Optional[MatchProfile]] = []
+        self._free_slots: List[int] = []
+        self._by_role = Postings()
+        self._by_language = Postings()
+        self._by_interest = Postings()
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    @classmethod
+    def build(cls, profiles: Iterable[Tuple[str, MatchProfile]]) -> "MatchIndex":
+        """Bulk-load an index, building each posting list once"""
+        index = cls()
+        by_role: Dict[str, List[int]] = {}
+        by_language: Dict[str, List[int]] = {}
+        by_interest: Dict[str, List[int]] = {}
+
+        for user_id, profile in profiles:
+            slot = len(index._user_ids)
+            index._slots[user_id] = slot
+            index._user_ids.append(user_id)
+            index._profiles.append(profile)
+            by_role.setdefault(profile.role, []).append(slot)
+            for language in profile.languages:
+                by_language.setdefault(language, []).append(slot)
+            for interest in profile.interests:
+                by_interest.setdefault(interest, []).append(slot)
+
+        threshold = dense_threshold(len(index._user_ids))
+        index._by_role = Postings.build(by_role, threshold)
+        index._by_language = Postings.build(by_language, threshold)
+        index._by_interest = Postings.build(by_interest, threshold)
+        return index
+
+    def _postings(self, profile: MatchProfile) -> Iterator[Tuple[Postings, str]]:
+        yield self._by_role, profile.role
+        for language in profile.languages:
+            yield self._by_language, language
+        for interest in profile.interests:
+            yield self._by_interest, interest
+
+    def upsert(self, user_id: str, profile: MatchProfile) -> None:
+        """Add or replace a profile"""
+        self.remove(user_id)
+
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._user_ids[slot] = user_id
+            self._profiles[slot] = profile
+        else:
+            slot = len(self._user_ids)
+            self._user_ids.append(user_id)
+            self._profiles.append(profile)
+        self._slots[user_id] = slot
+
+        threshold = dense_threshold(len(self._user_ids))
+        for postings, term in self._postings(profile):
+            postings.add(term, slot, threshold)
+
+    def remove(self, user_id: str) -> None:
+        """Drop a profile (no-op if it is not indexed)"""
+        slot = self._slots.pop(user_id, None)
+        if slot is None:
+            return
+
+        profile = self._profiles[slot]
+        self._user_ids[slot] = None
+        self._profiles[slot] = None
+        self._free_slots.append(slot)
+
+        threshold = dense_threshold(len(self._user_ids))
+        for postings, term in self._postings(profile):
+            postings.remove(term, slot, threshold)
+
+    def replace(self, other: "MatchIndex") -> None:
+        """Swap in a freshly loaded index"""
+        self.__dict__.update(other.__dict__)
+        self.loaded = True
+
+    def top_matches(
+        self,
+        user_id: str,
+        languages: Iterable[str],
+        interests: Iterable[str],
+        limit: int,
+        role: Optional[str] = None
+    ) -> List[Match]:
+        """
+        Best matches for a user, highest score first.
+
+        Args:
+            user_id: The caller, never matched with themselves
+            languages, interests: The caller's profile terms (normalized here)
+            limit: Maximum number of matches
+            role: Only match profiles with this role
+        """
+        languages = _terms(languages)
+        interests = _terms(interests)
+
+        # Bit-sliced counter: bit j of a profile's score is its bit in slices[j]
+        slices: List[int] = []
+
+        def add(bitset: int, weight: int) -> None:
+            for shift in range(weight.bit_length()):
+                if not (weight >> shift) & 1:
+                    continue
+                while len(slices) < shift:
+                    slices.append(0)
+                carry, j = bitset, shift
+                while carry:
+                    if j == len(slices):
+                        slices.append(carry)
+                        break
+                    slices[j], carry = slices[j] ^ carry, slices[j] & carry
+                    j += 1
+
+        max_score = 0
+        for postings, terms, weight in (
+            (self._by_language, languages, LANGUAGE_WEIGHT),
+            (self._by_interest, interests, 1),
+        ):
+            for term in terms:
+                bitset = postings.bitset(term)
+                if bitset:
+                    add(bitset, weight)
+                    max_score += weight
+
+        if role is not None:
+            eligible = self._by_role.bitset(role)
+        else:
+            eligible = 0
+            for indexed_role in self._by_role:
+                eligible |= self._by_role.bitset(indexed_role)
+        caller_slot = self._slots.get(user_id)
+        if caller_slot is not None:
+            eligible &= ~(1 << caller_slot)
+
+        matches: List[Match] = []
+        for score in range(max_score, 0, -1):
+            if score >> len(slices):
+                continue
+
+            # Profiles whose counter equals score, digit by digit
+            level = eligible
+            for j, digits in enumerate(slices):
+                level &= digits if (score >> j) & 1 else ~digits
+                if not level:
+                    break
+
+            while level and len(matches) < limit:
+                lowest = level & -level
+                level ^= lowest
+                slot = lowest.bit_length() - 1
+                profile = self._profiles[slot]
+                matches.append(Match(
+                    user_id=self._user_ids[slot],
+                    profile=profile,
+                    shared_languages=sorted(profile.languages & languages),
+                    shared_interests=sorted(profile.interests & interests),
+                    score=score,
+                ))
+
+            if len(matches) >= limit:
+                break
+
+        return matches
+
+
+def _profile_from_row(row: asyncpg.Record) -> MatchProfile:
+    return MatchProfile(
+        role=row["role"],
+        full_name=row["full_name"],
+        languages=_terms(row["languages"]),
+        interests=_terms(row["interests"]),
+    )
+
+
+# Global match index for this worker
+match_index = MatchIndex()
+
+# Profiles being refreshed, and those changed again meanwhile
+_refreshing: Set[str] = set()
+_stale: Set[str] = set()
+
+# Profiles changed while a full load is running (None when not loading)
+_changed_during_load: Optional[Set[str]] = None
+
+
+async def refresh_profile(user_id: str) -> None:
+    """
+    Re-read one profile into the index.
+
+    Refreshes of the same profile are serialized, and a change reported
+    while one is running triggers another read, so the last state wins.
+    """
+    if _changed_during_load is not None:
+        _changed_during_load.add(user_id)
+
+    if user_id in _refreshing:
+        _stale.add(user_id)
+        return
+
+    _refreshing.add(user_id)
+    try:
+        while True:
+            _stale.discard(user_id)
+            async with acquire_connection() as db:
+                row = await db.fetchrow(MATCH_CANDIDATE, user_id, MATCH_ROLES)
+
+            if row is None:
+                match_index.remove(user_id)
+            else:
+                match_index.upsert(user_id, _profile_from_row(row))
+
+            if user_id not in _stale:
+                break
+    except Exception as e:
+        logger.error(f"Could not refresh match profile {user_id}: {e}")
+    finally:
+        _refreshing.discard(user_id)
+
+
+async def handle_profile_update(payload: str) -> None:
+    """Apply a profile change announced by NOTIFY"""
+    await refresh_profile(payload)
+
+
+async def load_match_index(connection: asyncpg.Connection) -> None:
+    """
+    Build the index from every matchable profile and swap it in.
+
+    Profiles changed while loading are re-read afterwards, since the load
+    may have seen them before the change.
+    """
+    global _changed_during_load
+
+    _changed_during_load = set()
+    try:
+        async with connection.transaction(readonly=True):
+            rows = queries.cursor(connection, MATCH_CANDIDATES, MATCH_ROLES, prefetch=_LOAD_PREFETCH_ROWS)
+            profiles = [(str(row["user_id"]), _profile_from_row(row)) async for row in rows]
+
+        loaded = MatchIndex.build(profiles)
+        match_index.replace(loaded)
+        changed = _changed_during_load
+    finally:
+        _changed_during_load = None
+
+    logger.info(f"Loaded {len(loaded)} profiles into the match index")
+
+    for user_id in changed:
+        run_handler(refresh_profile(user_id), f"Match profile refresh for {user_id}")
+
+
+def register_match_listener(listener: NotificationListener) -> None:
+    """Keep this worker's match index in sync through the listener"""
+    listener.subscribe(PROFILE_CHANNEL, handle_profile_update)
+    listener.on_connect(load_match_index)
@@ -0,0 +1,155 @@
+"""
+PostgreSQL LISTEN/NOTIFY Listener
+
+Keeps per-worker in-memory state (revoked sessions, caches) in sync across
+uvicorn workers and hosts. One dedicated connection per worker LISTENs on
+the subscribed channels - it is not taken from the request pool.
+
+Publishers call notify() inside their own transaction, so a notification
+is only delivered if the change it announces was committed.
+
+Note: LISTEN needs a session-level connection. With Neon, point
+DATABASE_LISTEN_URL at the direct (non-pooled) endpoint.
+"""
+
+import asyncio
+import inspect
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+import asyncpg
+
+from app.core.config import settings
+from app.core.database import LazyConnection
+from app.db.queries import NOTIFY
+
+logger = logging.getLogger(__name__)
+
+NotificationHandler = Callable[[str], Any]
+ConnectHandler = Callable[[asyncpg.Connection], Awaitable[None]]
+
+# Delay between reconnect attempts (seconds), doubled up to the maximum
+_RECONNECT_DELAY = 1.0
+_MAX_RECONNECT_DELAY = 30.0
+
+# Handler tasks still running; the event loop only keeps weak references
+_handler_tasks: Set[asyncio.Task] = set()
+
+
+def _handler_done(task: asyncio.Task) -> None:
+    _handler_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"{task.get_name()} failed: {task.exception()!r}")
+
+
+def run_handler(coroutine: Awaitable[Any], name: str) -> asyncio.Task:
+    """
+    Run a handler coroutine in the background.
+
+    The task is referenced until it finishes, its exception (if any) is
+    logged, and it is cancelled when the listener stops.
+    """
+    task = asyncio.ensure_future(coroutine)
+    task.set_name(name)
+    _handler_tasks.add(task)
+    task.add_done_callback(_handler_done)
+    return task
+
+
+class NotificationListener:
+    """
+    Dispatches NOTIFY payloads to handlers and reconnects on failure.
+
+    Handlers registered with on_connect() run after every (re)connect,
+    before notifications are dispatched, so they can reload any state that
+    may have changed while the listener was disconnected.
+    """
+
+    def __init__(self, dsn: str):
+        self._dsn = dsn
+        self._handlers: Dict[str, List[NotificationHandler]] = {}
+        self._connect_handlers: List[ConnectHandler] = []
+        self._connection: Optional[asyncpg.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, channel: str, handler: NotificationHandler) -> None:
+        """Call handler(payload) for every notification on channel"""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def on_connect(self, handler: ConnectHandler) -> None:
+        """Call handler(connection) after each (re)connect"""
+        self._connect_handlers.append(handler)
+
+    async def start(self) -> None:
+        """Start listening in a background task"""
+        if self._task is None and self._handlers:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop listening, close the connection and cancel running handlers"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        pending = list(_handler_tasks)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    def _dispatch(self, connection, pid, channel: str, payload: str) -> None:
+        for handler in self._handlers.get(channel, []):
+            try:
+                result = handler(payload)
+                if inspect.isawaitable(result):
+                    run_handler(result, f"Notification handler for '{channel}'")
+            except Exception as e:
+                logger.error(f"Notification handler for '{channel}' failed: {e}")
+
+    async def _run(self) -> None:
+        delay = _RECONNECT_DELAY
+
+        while True:
+            closed = asyncio.Event()
+            try:
+                self._connection = await asyncpg.connect(self._dsn)
+                self._connection.add_termination_listener(lambda _: closed.set())
+
+                for channel in self._handlers:
+                    await self._connection.add_listener(channel, self._dispatch)
+
+                for handler in self._connect_handlers:
+                    await handler(self._connection)
+
+                logger.info(f"Listening for notifications on: {', '.join(self._handlers)}")
+                delay = _RECONNECT_DELAY
+                await closed.wait()
+                logger.warning("Notification listener connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Notification listener error: {e}")
+            finally:
+                if self._connection is not None and not self._connection.is_closed():
+                    await self._connection.close()
+                self._connection = None
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _MAX_RECONNECT_DELAY)
+
+
+# Global listener instance (one dedicated connection per worker)
+listener = NotificationListener(settings.DATABASE_LISTEN_URL or settings.DATABASE_URL)
+
+
+async def notify(db: LazyConnection, channel: str, payload: str) -> None:
+    """
+    Publish a notification.
+
+    Delivered to every listener (including this worker) when the
+    surrounding transaction commits.
+    """
+    await db.execute(NOTIFY, channel, payload)
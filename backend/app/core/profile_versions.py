@@ -0,0 +1,66 @@
+"""
+Profile Version Cache
+
+Every profile carries a version, bumped by each update. GET /users/profile
+derives its ETag from it, so a client revalidating with If-None-Match can
+be answered 304 from this per-worker cache of versions without querying
+the profile at all.
+
+Entries are dropped when the profile trigger NOTIFYs PROFILE_CHANNEL (any
+worker's update), and the whole cache is cleared whenever the listener
+(re)connects, since notifications may have been missed meanwhile. The TTL
+bounds staleness should the listener be down.
+"""
+
+import asyncpg
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.matching import PROFILE_CHANNEL
+from app.core.notifications import NotificationListener
+
+# Per-worker cache of profile versions, keyed by user id string
+profile_versions: TTLCache[int] = TTLCache(
+    max_entries=settings.PROFILE_VERSION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PROFILE_VERSION_CACHE_TTL_SECONDS
+)
+
+# Bumped on every invalidation, so a version read from the database is
+# not cached if a change was announced while the read was in flight
+_generation = 0
+
+
+def current_generation() -> int:
+    """Take before reading a version; pass to remember_version()"""
+    return _generation
+
+
+def remember_version(user_id: str, version: int, generation: int) -> None:
+    """Cache a version read from the database, unless it may be stale"""
+    if generation == _generation:
+        profile_versions.set(user_id, version)
+
+
+def forget_version(user_id: str) -> None:
+    """Drop a profile's cached version (it has changed)"""
+    global _generation
+    _generation += 1
+    profile_versions.invalidate(user_id)
+
+
+def handle_profile_update(payload: str) -> None:
+    """Forget the version of a profile changed by any worker"""
+    forget_version(payload)
+
+
+async def clear_profile_versions(connection: asyncpg.Connection) -> None:
+    """Forget every version (changes may have been missed while disconnected)"""
+    global _generation
+    _generation += 1
+    profile_versions.clear()
+
+
+def register_profile_version_listener(listener: NotificationListener) -> None:
+    """Keep this worker's version cache in sync through the listener"""
+    listener.subscribe(PROFILE_CHANNEL, handle_profile_update)
+    listener.on_connect(clear_profile_versions)
@@ -0,0 +1,153 @@
+"""
+HTTP Response Helpers
+
+Conditional responses: a representation is sent with its ETag, and a
+request whose If-None-Match already names that ETag gets an empty 304
+instead. For representations serialized ahead of time use
+cached_response(); for per-user ones, derive the ETag from what the
+body is built from (entity_etag) and check not_modified() before
+building it.
+
+Fast JSON: with FAST_JSON_RESPONSES enabled, handlers that return
+fast_json(...) have their result serialized by orjson straight into the
+response, skipping FastAPI's re-validation against response_model and
+its jsonable_encoder pass. response_model still documents the shape.
+"""
+
+import hashlib
+from typing import Any, Optional
+from uuid import UUID
+
+import orjson
+from fastapi import Request, Response, status
+
+from app.core.config import settings
+
+# Cache-Control for per-user representations: cacheable by the client
+# only, and revalidated on every use
+PRIVATE_REVALIDATE = "private, no-cache"
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag.
+
+    Uses the weak comparison RFC 9110 requires for If-None-Match, so a
+    W/ prefix added by a proxy still matches.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    bare_etag = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == bare_etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def _json_default(value: Any) -> Any:
+    """Values orjson does not encode itself (e.g. asyncpg's UUID subclass)"""
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dump_json(content: Any) -> bytes:
+    """
+    Serialize like FastAPI's default path would: UUIDs as strings and
+    datetimes in ISO 8601, with "Z" for UTC as Pydantic writes it.
+    """
+    return orjson.dumps(content, default=_json_default, option=orjson.OPT_UTC_Z)
+
+
+def fast_json(content: Any, response: Optional[Response] = None) -> Any:
+    """
+    Send a handler's result without re-validating it.
+
+    The content must already have the endpoint's response_model shape
+    (plain dicts and lists, e.g. built from asyncpg Records) since nothing
+    checks it. With FAST_JSON_RESPONSES off it is returned unchanged, for
+    FastAPI's regular validate-and-encode path.
+
+    Args:
+        content: Response body
+        response: The handler's injected Response, whose status code and
+            headers are carried over (FastAPI ignores them once a handler
+            returns a Response of its own)
+    """
+    if not settings.FAST_JSON_RESPONSES:
+        return content
+
+    headers = None
+    status_code = status.HTTP_200_OK
+    if response is not None:
+        headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+        status_code = response.status_code or status_code
+
+    return Response(
+        content=dump_json(content),
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers
+    )
+
+
+def entity_etag(*parts: Any) -> str:
+    """
+    Strong ETag for a representation built from the given values.
+
+    Equal values give equal ETags, so the parts must cover everything the
+    body is built from (e.g. a version counter plus the fields it does
+    not track).
+    """
+    digest = hashlib.blake2b(
+        "\x1f".join(str(part) for part in parts).encode("utf-8"),
+        digest_size=12
+    )
+    return f'"{digest.hexdigest()}"'
+
+
+def not_modified(request: Request, etag: str, cache_control: str) -> Optional[Response]:
+    """
+    304 Not Modified if the client already has this ETag, otherwise None.
+
+    Call before building the body, so a revalidation costs no serialization.
+    """
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": cache_control}
+        )
+    return None
+
+
+def cached_response(
+    request: Request,
+    body: bytes,
+    etag: str,
+    cache_control: str,
+    media_type: str = "application/json"
+) -> Response:
+    """
+    Serve pre-serialized bytes, or 304 Not Modified if the client has them.
+
+    Args:
+        request: Incoming request (for If-None-Match)
+        body: Serialized representation
+        etag: Quoted ETag of the body
+        cache_control: Cache-Control header value
+
+    Returns:
+        200 response with the body, or an empty 304 response
+    """
+    unchanged = not_modified(request, etag, cache_control)
+    if unchanged is not None:
+        return unchanged
+
+    return Response(
+        content=body,
+        media_type=media_type,
+        headers={"ETag": etag, "Cache-Control": cache_control}
+    )
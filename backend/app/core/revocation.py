@@ -0,0 +1,124 @@
+"""
+Session Revocation Filter
+
+Access tokens carry the id of the login session they belong to ("sid").
+When a session is revoked (logout, refresh-token reuse) its id is kept in
+an in-memory set until every access token issued for it has expired, so
+get_current_user can reject those tokens with a dictionary lookup instead
+of a database query.
+
+The set is kept in sync across workers with PostgreSQL LISTEN/NOTIFY and
+reloaded from auth_sessions whenever the listener (re)connects.
+"""
+
+import logging
+import time
+from typing import Dict
+
+import asyncpg
+
+from app.core.config import settings
+from app.core.database import LazyConnection
+from app.core.notifications import NotificationListener, notify
+from app.db import queries
+from app.db.queries import RECENTLY_REVOKED_SESSIONS, REVOKE_SESSION
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY channel carrying "<session_id>:<revoked-until epoch seconds>"
+REVOCATION_CHANNEL = "neuronet_session_revoked"
+
+
+class RevocationSet:
+    """
+    Revoked session ids, each kept until its last access token expires.
+
+    Not thread-safe: intended to be used from the event loop only.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, float] = {}
+        self._next_prune = 0.0
+
+    def add(self, session_id: str, until: float) -> None:
+        """Mark a session revoked until the given epoch time"""
+        self._entries[str(session_id)] = max(until, self._entries.get(str(session_id), 0.0))
+        self._prune()
+
+    def is_revoked(self, session_id: str) -> bool:
+        """Check whether a session has been revoked"""
+        until = self._entries.get(session_id)
+        if until is None:
+            return False
+        if until <= time.time():
+            del self._entries[session_id]
+            return False
+        return True
+
+    def replace(self, entries: Dict[str, float]) -> None:
+        """Swap in a freshly loaded set of revocations"""
+        self._entries = dict(entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _prune(self) -> None:
+        now = time.time()
+        if now < self._next_prune:
+            return
+        self._entries = {sid: until for sid, until in self._entries.items() if until > now}
+        self._next_prune = now + 60
+
+
+# Global revocation set for this worker
+revoked_sessions = RevocationSet()
+
+
+def _access_token_lifetime() -> float:
+    return settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+
+async def revoke_session(db: LazyConnection, session_id) -> bool:
+    """
+    Revoke a login session and broadcast it to all workers.
+
+    Run inside a transaction so the notification is only sent on commit.
+
+    Returns:
+        True if the session was active and is now revoked
+    """
+    revoked = await db.fetchval(REVOKE_SESSION, session_id)
+
+    until = time.time() + _access_token_lifetime()
+    revoked_sessions.add(str(session_id), until)
+
+    if revoked is not None:
+        await notify(db, REVOCATION_CHANNEL, f"{session_id}:{until:.0f}")
+
+    return revoked is not None
+
+
+def handle_revocation(payload: str) -> None:
+    """Apply a revocation broadcast by another worker"""
+    try:
+        session_id, until = payload.rsplit(":", 1)
+        revoked_sessions.add(session_id, float(until))
+    except ValueError:
+        logger.warning(f"Ignoring malformed revocation notification: {payload!r}")
+
+
+async def load_revoked_sessions(connection: asyncpg.Connection) -> None:
+    """Reload sessions revoked recently enough to still have live access tokens"""
+    rows = await queries.run(connection, "fetch", RECENTLY_REVOKED_SESSIONS, _access_token_lifetime())
+
+    revoked_sessions.replace({
+        str(row["id"]): float(row["revoked_at"]) + _access_token_lifetime()
+        for row in rows
+    })
+    logger.info(f"Loaded {len(rows)} revoked sessions")
+
+
+def register_revocation_listener(listener: NotificationListener) -> None:
+    """Keep this worker's revocation set in sync through the listener"""
+    listener.subscribe(REVOCATION_CHANNEL, handle_revocation)
+    listener.on_connect(load_revoked_sessions)
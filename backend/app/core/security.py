@@ -3,30 +3,71 @@ Security Utilities
 
 STEP 3: JWT Authentication and Password Hashing
 Implements secure password hashing with bcrypt and JWT token management
+
+bcrypt is deliberately slow, so the async variants (hash_password_async,
+verify_password_async) run it in a bounded worker pool instead of on the
+event loop. A login burst then queues in the pool rather than stalling
+every other request handled by the same uvicorn worker.
 """
 
-from datetime import datetime, timedelta
-from typing import Optional
+import asyncio
+import hashlib
+import logging
+import secrets
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
 
 import bcrypt
 from jose import JWTError, jwt
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+# Worker pool for bcrypt (created lazily or by start_password_hasher)
+_hash_executor: Optional[Executor] = None
+
+# Hashing jobs currently queued or running in the pool
+_hash_in_flight = 0
+
+# Cumulative pool metrics, see get_password_hasher_stats()
+_hash_metrics: Dict[str, float] = {
+    "submitted": 0,
+    "completed": 0,
+    "failed": 0,
+    "rejected": 0,
+    "peak_in_flight": 0,
+    "queue_wait_seconds": 0.0,
+    "run_seconds": 0.0,
+}
+
 
-def hash_password(password: str) -> str:
+# Active bcrypt cost (BCRYPT_ROUNDS, or the value found by calibration)
+_bcrypt_rounds: int = settings.BCRYPT_ROUNDS
+
+
+class PasswordHasherBusyError(RuntimeError):
+    """Raised when the password hashing queue is full."""
+
+
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
     """
     Hash a plain text password using bcrypt.
     
     Args:
         password: Plain text password
+        rounds: bcrypt cost (default: the active cost, see get_bcrypt_rounds)
         
     Returns:
         Hashed password string safe for database storage
     """
     # Encode password and generate salt
     password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=rounds or _bcrypt_rounds)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
@@ -47,13 +88,184 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(password_bytes, hashed_bytes)
 
 
+def get_bcrypt_rounds() -> int:
+    """Get the bcrypt cost used for new hashes"""
+    return _bcrypt_rounds
+
+
+def get_hash_rounds(hashed_password: str) -> Optional[int]:
+    """
+    Read the cost factor from a stored bcrypt hash ("$2b$12$...").
+    
+    Returns:
+        The cost, or None if the hash is not in bcrypt format
+    """
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Check whether a stored hash uses a lower cost than the active one.
+    
+    Hashes at a higher cost are kept: workers can calibrate slightly
+    different costs, and rehashing downwards would let them undo each
+    other's upgrades on every login.
+    """
+    rounds = get_hash_rounds(hashed_password)
+    return rounds is None or rounds < _bcrypt_rounds
+
+
+def _measure_hash_seconds(rounds: int, samples: int = 3) -> float:
+    """Median time of one bcrypt hash at the given cost"""
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        bcrypt.hashpw(b"calibration-password", bcrypt.gensalt(rounds=rounds))
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)[len(timings) // 2]
+
+
+# ========================================
+# JWT BACKENDS
+# ========================================
+
+class JWTBackend(ABC):
+    """
+    Signs and verifies JWTs.
+    
+    Implementations must raise jose.JWTError for any invalid, expired or
+    malformed token so callers never depend on a specific JWT library.
+    A backend missing either method cannot be instantiated.
+    """
+    
+    def __init__(self, secret_key: str, algorithm: str):
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+    
+    @abstractmethod
+    def encode(self, claims: Dict[str, Any]) -> str:
+        """Sign claims into a token"""
+    
+    @abstractmethod
+    def decode(self, token: str) -> Dict[str, Any]:
+        """Verify a token and return its claims"""
+
+
+class JoseJWTBackend(JWTBackend):
+    """Default backend using python-jose"""
+    
+    def encode(self, claims: Dict[str, Any]) -> str:
+        return jwt.encode(claims, self.secret_key, algorithm=self.algorithm)
+    
+    def decode(self, token: str) -> Dict[str, Any]:
+        return jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+
+
+class PyJWTBackend(JWTBackend):
+    """
+    Faster backend using PyJWT.
+    
+    Optional dependency: install with `pip install PyJWT`.
+    """
+    
+    def __init__(self, secret_key: str, algorithm: str):
+        super().__init__(secret_key, algorithm)
+        try:
+            import jwt as pyjwt
+        except ImportError as e:
+            raise RuntimeError("JWT_BACKEND=pyjwt requires the PyJWT package") from e
+        self._pyjwt = pyjwt
+    
+    def encode(self, claims: Dict[str, Any]) -> str:
+        return self._pyjwt.encode(claims, self.secret_key, algorithm=self.algorithm)
+    
+    def decode(self, token: str) -> Dict[str, Any]:
+        try:
+            return self._pyjwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        except self._pyjwt.PyJWTError as e:
+            raise JWTError(str(e))
+
+
+# Backend factories selectable through settings.JWT_BACKEND
+_jwt_backend_factories: Dict[str, Callable[[str, str], JWTBackend]] = {
+    "jose": JoseJWTBackend,
+    "pyjwt": PyJWTBackend,
+}
+
+# Active backend (created on first use)
+_jwt_backend: Optional[JWTBackend] = None
+
+# Verified token payloads keyed by SHA-256 digest of the token.
+# Entries expire at the token's "exp" claim.
+_token_cache: TTLCache[Dict[str, Any]] = TTLCache(
+    max_entries=settings.TOKEN_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
+
+
+def register_jwt_backend(name: str, factory: Callable[[str, str], JWTBackend]) -> None:
+    """
+    Make a JWT backend selectable through the JWT_BACKEND setting.
+    
+    Args:
+        name: Value of JWT_BACKEND that selects this backend
+        factory: Callable taking (secret_key, algorithm) and returning a JWTBackend
+    """
+    _jwt_backend_factories[name] = factory
+
+
+def get_jwt_backend() -> JWTBackend:
+    """
+    Get the active JWT backend, creating it from settings on first use.
+    
+    Raises:
+        RuntimeError: If JWT_BACKEND names an unknown backend
+    """
+    global _jwt_backend
+    
+    if _jwt_backend is None:
+        factory = _jwt_backend_factories.get(settings.JWT_BACKEND)
+        if factory is None:
+            raise RuntimeError(f"Unknown JWT_BACKEND: {settings.JWT_BACKEND}")
+        _jwt_backend = factory(settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
+    
+    return _jwt_backend
+
+
+def set_jwt_backend(backend: Optional[JWTBackend]) -> None:
+    """
+    Replace the active JWT backend (None re-reads JWT_BACKEND on next use).
+    
+    Clears the verified-token cache, since cached entries were verified
+    by the previous backend.
+    """
+    global _jwt_backend
+    
+    _jwt_backend = backend
+    _token_cache.clear()
+
+
+def get_token_cache_stats() -> Dict[str, Any]:
+    """Get hit/miss counters for the verified-token cache"""
+    return _token_cache.stats()
+
+
+def _token_digest(token: str) -> bytes:
+    """Cache key for a token (never keep raw bearer tokens in memory)"""
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token.
     
     Args:
         data: Dictionary containing claims to encode (must include 'sub')
-        expires_delta: Optional custom expiration time (default: 30 minutes)
+        expires_delta: Optional custom expiration time
+            (default: JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
         
     Returns:
         Encoded JWT token string
@@ -62,26 +274,23 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     
     # Set expiration time
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=30)
+        expire = datetime.now(timezone.utc) + timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": int(expire.timestamp())})
     
     # Encode JWT
-    encoded_jwt = jwt.encode(
-        to_encode,
-        settings.JWT_SECRET_KEY,
-        algorithm=settings.JWT_ALGORITHM
-    )
-    
-    return encoded_jwt
+    return get_jwt_backend().encode(to_encode)
 
 
 def decode_access_token(token: str) -> dict:
     """
     Decode and validate a JWT access token.
     
+    Verified payloads are cached until the token expires, so a client
+    re-sending the same bearer token skips signature verification.
+    
     Args:
         token: JWT token string
         
@@ -91,12 +300,207 @@ def decode_access_token(token: str) -> dict:
     Raises:
         JWTError: If token is invalid, expired, or malformed
     """
+    digest = _token_digest(token)
+    cached = _token_cache.get(digest)
+    if cached is not None:
+        return dict(cached)
+    
     try:
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM]
-        )
-        return payload
+        payload = get_jwt_backend().decode(token)
     except JWTError as e:
         raise JWTError(f"Invalid token: {str(e)}")
+    
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        _token_cache.set(digest, dict(payload), ttl_seconds=exp - time.time())
+    
+    return payload
+
+
+def create_refresh_token() -> Tuple[str, bytes]:
+    """
+    Create an opaque refresh token.
+    
+    Refresh tokens are random, so a fast SHA-256 digest (not bcrypt) is
+    enough to store them safely.
+    
+    Returns:
+        Tuple of (token for the client, digest for the database)
+    """
+    token = secrets.token_urlsafe(32)
+    return token, hash_refresh_token(token)
+
+
+def hash_refresh_token(token: str) -> bytes:
+    """Digest under which a refresh token is stored"""
+    return _token_digest(token)
+
+
+# ========================================
+# ASYNC PASSWORD HASHING (WORKER POOL)
+# ========================================
+
+def start_password_hasher() -> None:
+    """
+    Create the bcrypt worker pool.
+    
+    Called on application startup. The pool type and size come from
+    PASSWORD_HASH_EXECUTOR and PASSWORD_HASH_WORKERS.
+    """
+    global _hash_executor
+    
+    if _hash_executor is not None:
+        return
+    
+    if settings.PASSWORD_HASH_EXECUTOR == "process":
+        _hash_executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+    else:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            thread_name_prefix="bcrypt"
+        )
+    
+    logger.info(
+        f"Password hasher started ({settings.PASSWORD_HASH_EXECUTOR} pool, "
+        f"{settings.PASSWORD_HASH_WORKERS} workers)"
+    )
+
+
+def shutdown_password_hasher() -> None:
+    """
+    Shut down the bcrypt worker pool.
+    
+    Called on application shutdown. Waits for running jobs to finish.
+    """
+    global _hash_executor
+    
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=True)
+        _hash_executor = None
+        logger.info("Password hasher stopped")
+
+
+def _timed_call(func: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    """Run func in a worker and report how long it ran for."""
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+async def _run_in_hash_pool(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a bcrypt function in the worker pool.
+    
+    Raises:
+        PasswordHasherBusyError: If PASSWORD_HASH_MAX_QUEUE jobs are already pending
+    """
+    global _hash_in_flight
+    
+    if _hash_in_flight >= settings.PASSWORD_HASH_MAX_QUEUE:
+        _hash_metrics["rejected"] += 1
+        raise PasswordHasherBusyError("Password hashing queue is full")
+    
+    if _hash_executor is None:
+        start_password_hasher()
+    
+    loop = asyncio.get_running_loop()
+    _hash_in_flight += 1
+    _hash_metrics["submitted"] += 1
+    _hash_metrics["peak_in_flight"] = max(_hash_metrics["peak_in_flight"], _hash_in_flight)
+    submitted_at = time.perf_counter()
+    
+    try:
+        result, run_seconds = await loop.run_in_executor(_hash_executor, _timed_call, func, *args)
+    except Exception:
+        _hash_metrics["failed"] += 1
+        raise
+    finally:
+        _hash_in_flight -= 1
+    
+    total_seconds = time.perf_counter() - submitted_at
+    _hash_metrics["completed"] += 1
+    _hash_metrics["run_seconds"] += run_seconds
+    _hash_metrics["queue_wait_seconds"] += max(total_seconds - run_seconds, 0.0)
+    
+    return result
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a password in the worker pool without blocking the event loop.
+    
+    Raises:
+        PasswordHasherBusyError: If the hashing queue is full
+    """
+    # Pass the cost explicitly so process workers use the calibrated value
+    return await _run_in_hash_pool(hash_password, password, _bcrypt_rounds)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password in the worker pool without blocking the event loop.
+    
+    Raises:
+        PasswordHasherBusyError: If the hashing queue is full
+    """
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
+async def calibrate_bcrypt_rounds() -> int:
+    """
+    Pick the bcrypt cost for this host from BCRYPT_TARGET_HASH_MS.
+    
+    Times a hash at BCRYPT_MIN_ROUNDS in the worker pool and, since each
+    extra round doubles the work, selects the highest cost up to
+    BCRYPT_MAX_ROUNDS whose estimated hash time stays under the target.
+    Does nothing when no target is configured.
+    
+    Returns:
+        The active bcrypt cost
+    """
+    global _bcrypt_rounds
+    
+    if settings.BCRYPT_TARGET_HASH_MS <= 0:
+        return _bcrypt_rounds
+    
+    min_rounds = settings.BCRYPT_MIN_ROUNDS
+    max_rounds = max(settings.BCRYPT_MAX_ROUNDS, min_rounds)
+    base_ms = await _run_in_hash_pool(_measure_hash_seconds, min_rounds) * 1000
+    
+    rounds = min_rounds
+    while rounds < max_rounds and base_ms * 2 ** (rounds + 1 - min_rounds) <= settings.BCRYPT_TARGET_HASH_MS:
+        rounds += 1
+    
+    _bcrypt_rounds = rounds
+    logger.info(
+        f"bcrypt cost calibrated to {rounds} "
+        f"(~{base_ms * 2 ** (rounds - min_rounds):.0f} ms, target {settings.BCRYPT_TARGET_HASH_MS:.0f} ms)"
+    )
+    
+    return rounds
+
+
+def get_password_hasher_stats() -> Dict[str, Any]:
+    """
+    Get live metrics for the password hashing pool.
+    
+    Returns:
+        Dictionary with job counters, current queue depth and average
+        queue wait / run time in milliseconds
+    """
+    completed = _hash_metrics["completed"]
+    
+    return {
+        "bcrypt_rounds": _bcrypt_rounds,
+        "executor": settings.PASSWORD_HASH_EXECUTOR,
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "max_queue": settings.PASSWORD_HASH_MAX_QUEUE,
+        "in_flight": _hash_in_flight,
+        "peak_in_flight": int(_hash_metrics["peak_in_flight"]),
+        "submitted": int(_hash_metrics["submitted"]),
+        "completed": int(completed),
+        "failed": int(_hash_metrics["failed"]),
+        "rejected": int(_hash_metrics["rejected"]),
+        "avg_queue_wait_ms": (_hash_metrics["queue_wait_seconds"] / completed * 1000) if completed else 0.0,
+        "avg_run_ms": (_hash_metrics["run_seconds"] / completed * 1000) if completed else 0.0,
+    }
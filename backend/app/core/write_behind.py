@@ -0,0 +1,587 @@
+"""
+Write-Behind Assessment Journal
+
+With ASSESSMENT_WRITE_BEHIND enabled, a submission is acknowledged as soon
+as it is appended to a local journal file and fsync'd; a background task
+writes journaled submissions to PostgreSQL in batches (one multi-row
+INSERT per batch), so database latency and pool pressure stay off the
+request path.
+
+- Group commit: appends that arrive while an fsync is running are written
+  and fsync'd together by the next one.
+- Idempotent flushes: ids and created_at are assigned at append time and
+  the batch INSERT skips ids already stored, so a batch that committed just
+  before a crash can safely be written again.
+- Replay: journal segments are deleted once all their records are in
+  PostgreSQL; whatever is left is replayed on the next startup.
+- Backpressure: at most WRITE_BEHIND_MAX_PENDING submissions may be waiting
+  for PostgreSQL. Further appends wait up to WRITE_BEHIND_ENQUEUE_TIMEOUT
+  and then fail with WriteBehindFullError (503 in the API).
+
+Each worker process claims its own worker-N subdirectory, held with an
+advisory lock, and adopts the segments of directories no running worker
+holds (e.g. after scaling down). Without fcntl (Windows) a single worker
+is assumed.
+
+Read-your-writes: a submission shows up in history and summaries once it
+has been flushed, normally within WRITE_BEHIND_FLUSH_INTERVAL.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Deque, Dict, List, Optional, Sequence, Tuple
+
+import asyncpg
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from app.core.config import settings
+from app.core.database import acquire_connection
+from app.core.instruments import get_instrument
+from app.db.queries import RECORD_ASSESSMENT_BATCH
+
+logger = logging.getLogger(__name__)
+
+# Records per journal segment before a new one is started. Fully flushed
+# segments are deleted, so this bounds how much is replayed needlessly.
+SEGMENT_MAX_RECORDS = 10000
+
+# Delay between flush retries (seconds), doubled up to the maximum
+_RETRY_DELAY = 1.0
+_MAX_RETRY_DELAY = 30.0
+
+# Seconds stop() spends writing what is left before leaving it to replay
+_SHUTDOWN_FLUSH_TIMEOUT = 10.0
+
+# (id, user_id, type, packed scores, total_score, risk_level, created_at)
+JournalRecord = Tuple[str, str, str, bytes, int, str, datetime]
+
+# (user_id, type, packed scores, total_score, risk_level)
+Submission = Tuple[Any, str, bytes, int, str]
+
+
+class WriteBehindFullError(RuntimeError):
+    """Raised when the journal has no room within the enqueue timeout."""
+
+
+def stamp_submissions(submissions: Sequence[Submission]) -> List[JournalRecord]:
+    """
+    Assign ids and created_at to submissions.
+
+    created_at values are one microsecond apart in the order given, so the
+    submissions keep their order wherever assessments are ordered by
+    (created_at, id).
+    """
+    now = datetime.now(timezone.utc)
+    return [
+        (str(uuid.uuid4()), str(user_id), assessment_type, scores, total_score, risk_level,
+         now + timedelta(microseconds=offset))
+        for offset, (user_id, assessment_type, scores, total_score, risk_level) in enumerate(submissions)
+    ]
+
+
+async def record_assessments(db, records: Sequence[JournalRecord], rolling_window: int) -> None:
+    """Insert stamped records and fold them into the summaries (one statement)"""
+    ids, user_ids, types, scores, total_scores, risk_levels, created_ats = zip(*records)
+
+    await db.execute(
+        RECORD_ASSESSMENT_BATCH,
+        list(ids),
+        list(user_ids),
+        list(types),
+        list(scores),
+        list(total_scores),
+        list(risk_levels),
+        list(created_ats),
+        rolling_window
+    )
+
+
+def _encode(record: JournalRecord) -> bytes:
+    record_id, user_id, assessment_type, scores, total_score, risk_level, created_at = record
+    return json.dumps({
+        "id": record_id,
+        "user_id": user_id,
+        "type": assessment_type,
+        "scores": scores.hex(),
+        "total_score": total_score,
+        "risk_level": risk_level,
+        "created_at": created_at.isoformat(),
+    }, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _decode(line: bytes) -> JournalRecord:
+    data = json.loads(line)
+
+    if "scores" in data:
+        scores = bytes.fromhex(data["scores"])
+    else:
+        # Journaled before answers were stored packed
+        instrument = get_instrument(data["type"])
+        if instrument is None:
+            raise ValueError(f"Unknown assessment type: {data['type']}")
+        answers = json.loads(data["responses"])
+        scores = instrument.pack([(answer["question_id"], answer["score"]) for answer in answers])
+
+    return (
+        data["id"],
+        data["user_id"],
+        data["type"],
+        scores,
+        data["total_score"],
+        data["risk_level"],
+        datetime.fromisoformat(data["created_at"]),
+    )
+
+
+def _segment_name(seq: int) -> str:
+    return f"{seq:012d}.journal"
+
+
+def _segment_paths(directory: Path) -> List[Path]:
+    return sorted(directory.glob("*.journal"))
+
+
+def _read_segment(path: Path) -> List[JournalRecord]:
+    """Read a segment, skipping a torn last line and unreadable records"""
+    records = []
+    with open(path, "rb") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.endswith(b"\n"):
+                logger.warning(f"Ignoring incomplete last record in {path.name}")
+                break
+            try:
+                records.append(_decode(line))
+            except (ValueError, KeyError) as e:
+                logger.error(f"Skipping unreadable record {path.name}:{line_number}: {e}")
+    return records
+
+
+def _fsync_directory(directory: Path) -> None:
+    # Makes a new segment's directory entry durable (POSIX only)
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_and_sync(segment: BinaryIO, data: bytes) -> None:
+    segment.write(data)
+    segment.flush()
+    os.fsync(segment.fileno())
+
+
+class AssessmentJournal:
+    """
+    Durable local queue of assessment submissions, flushed to PostgreSQL
+    in the background.
+
+    Not thread-safe: append() must be called from the event loop.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_pending: int,
+        batch_size: int,
+        flush_interval: float,
+        enqueue_timeout: float
+    ):
+        self._root = Path(directory)
+        self._max_pending = max_pending
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._enqueue_timeout = enqueue_timeout
+        self._rolling_window = 5
+
+        self._dir: Optional[Path] = None
+        self._lock_file: Optional[Any] = None
+        self._segment: Optional[BinaryIO] = None
+        self._segment_seq = 0
+        self._segment_records = 0
+        # Records not yet in PostgreSQL, per segment
+        self._outstanding: Dict[int, int] = {}
+
+        # Appends waiting for the next group commit
+        self._appending: List[Tuple[List[JournalRecord], asyncio.Future]] = []
+        # Journaled records waiting to be flushed, in append order
+        self._pending: Deque[Tuple[int, JournalRecord]] = deque()
+        # Accepted submissions not yet in PostgreSQL (bounded by max_pending)
+        self._unflushed = 0
+
+        self._room = asyncio.Condition()
+        self._write_wakeup = asyncio.Event()
+        self._flush_wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+        self._appended = 0
+        self._flushed = 0
+        self._replayed = 0
+        self._rejected = 0
+        self._flush_failures = 0
+        self._dead_lettered = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    # ==================== LIFECYCLE ====================
+
+    async def start(self, rolling_window: int) -> None:
+        """
+        Claim a journal directory, replay what it holds and start the
+        writer and flusher tasks.
+
+        Args:
+            rolling_window: Summary rolling window size (as in RECORD_ASSESSMENT)
+        """
+        if self._tasks:
+            return
+
+        self._rolling_window = rolling_window
+        self._dir = self._claim_directory()
+        self._adopt_orphaned_directories()
+
+        for path in _segment_paths(self._dir):
+            seq = int(path.stem)
+            records = _read_segment(path)
+            self._segment_seq = max(self._segment_seq, seq)
+            if not records:
+                path.unlink()
+                continue
+            self._outstanding[seq] = len(records)
+            self._pending.extend((seq, record) for record in records)
+
+        self._replayed = len(self._pending)
+        self._unflushed = len(self._pending)
+        self._open_segment(self._segment_seq + 1)
+
+        self._tasks = [
+            asyncio.create_task(self._write_loop()),
+            asyncio.create_task(self._flush_loop()),
+        ]
+        if self._pending:
+            logger.info(f"Replaying {len(self._pending)} journaled assessments")
+            self._flush_wakeup.set()
+
+        logger.info(f"Assessment write-behind journal at {self._dir}")
+
+    async def stop(self) -> None:
+        """
+        Stop the background tasks and write what is left.
+
+        Records that cannot be written in time stay in the journal and are
+        replayed on the next start.
+        """
+        if not self._tasks:
+            return
+
+        # Let the writer finish appends that are already waiting
+        while self._appending:
+            self._write_wakeup.set()
+            await asyncio.sleep(0.01)
+
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+        try:
+            await asyncio.wait_for(self._flush_pending(), timeout=_SHUTDOWN_FLUSH_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Could not write journaled assessments on shutdown: {e}")
+
+        if self._pending:
+            logger.warning(f"{len(self._pending)} assessments remain journaled and will be replayed")
+
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+            if not self._outstanding.get(self._segment_seq):
+                (self._dir / _segment_name(self._segment_seq)).unlink(missing_ok=True)
+
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _claim_directory(self) -> Path:
+        """Lock the first worker-N directory no other process holds"""
+        self._root.mkdir(parents=True, exist_ok=True)
+
+        index = 0
+        while True:
+            directory = self._root / f"worker-{index}"
+            directory.mkdir(exist_ok=True)
+            if fcntl is None:
+                return directory
+
+            lock_file = open(directory / "lock", "a")
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                index += 1
+                continue
+
+            self._lock_file = lock_file
+            return directory
+
+    def _adopt_orphaned_directories(self) -> None:
+        """Move segments of directories no running worker holds into ours"""
+        if fcntl is None:
+            return
+
+        next_seq = max((int(p.stem) for p in _segment_paths(self._dir)), default=0) + 1
+
+        for directory in sorted(self._root.glob("worker-*")):
+            if directory == self._dir:
+                continue
+
+            with open(directory / "lock", "a") as lock_file:
+                try:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+
+                for path in _segment_paths(directory):
+                    os.replace(path, self._dir / _segment_name(next_seq))
+                    logger.info(f"Adopted journal segment {directory.name}/{path.name}")
+                    next_seq += 1
+
+        _fsync_directory(self._dir)
+
+    def _open_segment(self, seq: int) -> None:
+        if self._segment is not None:
+            self._segment.close()
+            if not self._outstanding.get(self._segment_seq):
+                (self._dir / _segment_name(self._segment_seq)).unlink(missing_ok=True)
+                self._outstanding.pop(self._segment_seq, None)
+
+        self._segment = open(self._dir / _segment_name(seq), "ab")
+        _fsync_directory(self._dir)
+        self._segment_seq = seq
+        self._segment_records = 0
+        self._outstanding.setdefault(seq, 0)
+
+    # ==================== APPEND ====================
+
+    async def append(self, submissions: Sequence[Submission]) -> List[JournalRecord]:
+        """
+        Durably journal scored submissions.
+
+        Returns once the records are fsync'd. Submissions in one call get
+        increasing created_at values so they keep their order.
+
+        Returns:
+            The journaled records (with their assigned ids and created_at)
+
+        Raises:
+            WriteBehindFullError: If there is no room within the enqueue timeout
+            RuntimeError: If the journal is not running
+            OSError: If the journal could not be written
+        """
+        if not self._tasks:
+            raise RuntimeError("Assessment journal not started")
+
+        await self._reserve(len(submissions))
+
+        records = stamp_submissions(submissions)
+
+        future = asyncio.get_running_loop().create_future()
+        self._appending.append((records, future))
+        self._write_wakeup.set()
+
+        # Shielded: once handed to the writer, the append completes even if
+        # the request is cancelled
+        await asyncio.shield(future)
+        return records
+
+    def _has_room(self, count: int) -> bool:
+        return self._unflushed == 0 or self._unflushed + count <= self._max_pending
+
+    async def _reserve(self, count: int) -> None:
+        async with self._room:
+            if not self._has_room(count):
+                try:
+                    await asyncio.wait_for(
+                        self._room.wait_for(lambda: self._has_room(count)),
+                        timeout=self._enqueue_timeout
+                    )
+                except asyncio.TimeoutError:
+                    self._rejected += count
+                    raise WriteBehindFullError(
+                        f"{self._unflushed} assessments are waiting to be written"
+                    )
+            self._unflushed += count
+
+    async def _release(self, count: int) -> None:
+        async with self._room:
+            self._unflushed -= count
+            self._room.notify_all()
+
+    async def _write_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            await self._write_wakeup.wait()
+            self._write_wakeup.clear()
+
+            batch, self._appending = self._appending, []
+            if not batch:
+                continue
+
+            if self._segment_records >= SEGMENT_MAX_RECORDS:
+                self._open_segment(self._segment_seq + 1)
+
+            data = b"".join(_encode(record) for records, _ in batch for record in records)
+            count = sum(len(records) for records, _ in batch)
+
+            try:
+                await loop.run_in_executor(None, _write_and_sync, self._segment, data)
+            except Exception as e:
+                logger.error(f"Write-behind journal append failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                await self._release(count)
+                # The failed write may have left a partial line behind
+                try:
+                    self._open_segment(self._segment_seq + 1)
+                except OSError as open_error:
+                    logger.error(f"Could not start a new journal segment: {open_error}")
+                continue
+
+            seq = self._segment_seq
+            for records, future in batch:
+                self._pending.extend((seq, record) for record in records)
+                if not future.done():
+                    future.set_result(None)
+
+            self._segment_records += count
+            self._outstanding[seq] += count
+            self._appended += count
+            self._flush_wakeup.set()
+
+    # ==================== FLUSH ====================
+
+    async def _flush_loop(self) -> None:
+        delay = _RETRY_DELAY
+
+        while True:
+            await self._flush_wakeup.wait()
+            self._flush_wakeup.clear()
+
+            # Let a small batch grow for up to one interval
+            if len(self._pending) < self._batch_size:
+                await asyncio.sleep(self._flush_interval)
+
+            try:
+                await self._flush_pending()
+                delay = _RETRY_DELAY
+            except Exception as e:
+                self._flush_failures += 1
+                logger.warning(
+                    f"Write-behind flush failed ({len(self._pending)} pending), "
+                    f"retrying in {delay:.0f}s: {e}"
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _MAX_RETRY_DELAY)
+                self._flush_wakeup.set()
+
+    async def _flush_pending(self) -> None:
+        """Write pending records in batches until none are left"""
+        while self._pending:
+            count = min(self._batch_size, len(self._pending))
+            batch = [self._pending[i][1] for i in range(count)]
+
+            try:
+                await self._insert(batch)
+            except (asyncpg.IntegrityConstraintViolationError, asyncpg.DataError) as e:
+                # A record the database will never accept (e.g. its user was
+                # deleted) must not block the rest: write one by one
+                logger.error(f"Write-behind batch rejected, retrying records individually: {e}")
+                for record in batch:
+                    try:
+                        await self._insert([record])
+                    except (asyncpg.IntegrityConstraintViolationError, asyncpg.DataError) as record_error:
+                        self._dead_letter(record, record_error)
+
+            await self._complete(count)
+
+    async def _insert(self, records: List[JournalRecord]) -> None:
+        async with acquire_connection() as db:
+            await record_assessments(db, records, self._rolling_window)
+
+    def _dead_letter(self, record: JournalRecord, error: Exception) -> None:
+        """Keep a record PostgreSQL refused next to the journal for inspection"""
+        self._dead_lettered += 1
+        logger.error(f"Assessment {record[0]} could not be written and was dead-lettered: {error}")
+        with open(self._dir / "rejected.jsonl", "ab") as f:
+            f.write(_encode(record))
+
+    async def _complete(self, count: int) -> None:
+        """Drop the first count pending records, now stored in PostgreSQL"""
+        finished = set()
+        for _ in range(count):
+            seq, _record = self._pending.popleft()
+            self._outstanding[seq] -= 1
+            if self._outstanding[seq] == 0 and seq != self._segment_seq:
+                finished.add(seq)
+
+        for seq in finished:
+            (self._dir / _segment_name(seq)).unlink(missing_ok=True)
+            del self._outstanding[seq]
+
+        self._flushed += count
+        await self._release(count)
+
+    # ==================== STATS ====================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get journal statistics.
+
+        Returns:
+            Dictionary with queue depth (unflushed, pending flush), lifetime
+            counters and the number of journal segments on disk
+        """
+        return {
+            "running": self.running,
+            "directory": str(self._dir) if self._dir else None,
+            "unflushed": self._unflushed,
+            "pending_flush": len(self._pending),
+            "max_pending": self._max_pending,
+            "appended": self._appended,
+            "flushed": self._flushed,
+            "replayed": self._replayed,
+            "rejected": self._rejected,
+            "flush_failures": self._flush_failures,
+            "dead_lettered": self._dead_lettered,
+            "segments": len(self._outstanding),
+        }
+
+
+# Global journal instance (started in the app lifespan when enabled)
+assessment_journal = AssessmentJournal(
+    settings.WRITE_BEHIND_JOURNAL_DIR,
+    max_pending=settings.WRITE_BEHIND_MAX_PENDING,
+    batch_size=settings.WRITE_BEHIND_BATCH_SIZE,
+    flush_interval=settings.WRITE_BEHIND_FLUSH_INTERVAL,
+    enqueue_timeout=settings.WRITE_BEHIND_ENQUEUE_TIMEOUT
+)
@@ -0,0 +1,3 @@
+"""
+Database module - SQL schema files and the query registry
+"""
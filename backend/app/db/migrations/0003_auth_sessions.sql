@@ -0,0 +1,31 @@
+-- Login Sessions and Refresh Tokens
+-- Backs POST /auth/refresh (rotating refresh tokens) and POST /auth/logout
+
+-- One row per login. Access tokens carry the session id ("sid" claim),
+-- so revoking the session invalidates every token issued for it.
+CREATE TABLE IF NOT EXISTS auth_sessions (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    -- Extended on every refresh
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    revoked_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- Index for reloading recent revocations on worker startup
+CREATE INDEX IF NOT EXISTS idx_auth_sessions_revoked_at
+    ON auth_sessions(revoked_at)
+    WHERE revoked_at IS NOT NULL;
+
+-- Single-use refresh tokens, stored as SHA-256 digests (never in plain text).
+-- A token is consumed (used_at set) when exchanged for a new one.
+CREATE TABLE IF NOT EXISTS refresh_tokens (
+    token_hash BYTEA PRIMARY KEY,
+    session_id UUID NOT NULL REFERENCES auth_sessions(id) ON DELETE CASCADE,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    used_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- Index for cascading session deletes
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_session_id ON refresh_tokens(session_id);
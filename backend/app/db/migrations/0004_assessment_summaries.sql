@@ -0,0 +1,37 @@
+-- Per-User Assessment Summaries
+-- Rollup maintained by POST /assessments/submit in the same statement as the
+-- assessment INSERT, so GET /assessments/summary reads one row per
+-- (user, type) instead of scanning the user's history.
+
+CREATE TABLE IF NOT EXISTS assessment_summaries (
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    type TEXT NOT NULL,
+    latest_score INTEGER NOT NULL,
+    latest_risk_level TEXT NOT NULL,
+    latest_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    -- Score of the assessment before the latest one (NULL after the first)
+    previous_score INTEGER,
+    -- Most recent scores, newest first, capped at the rolling window (5)
+    recent_scores INTEGER[] NOT NULL,
+    assessment_count INTEGER NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (user_id, type)
+);
+
+-- Backfill from existing assessments (idempotent: existing rollups are kept)
+INSERT INTO assessment_summaries (
+    user_id, type, latest_score, latest_risk_level, latest_at,
+    previous_score, recent_scores, assessment_count
+)
+SELECT
+    user_id,
+    type,
+    (array_agg(total_score ORDER BY created_at DESC, id DESC))[1],
+    (array_agg(risk_level ORDER BY created_at DESC, id DESC))[1],
+    max(created_at),
+    (array_agg(total_score ORDER BY created_at DESC, id DESC))[2],
+    (array_agg(total_score ORDER BY created_at DESC, id DESC))[1:5],
+    count(*)
+FROM assessments
+GROUP BY user_id, type
+ON CONFLICT (user_id, type) DO NOTHING;
@@ -0,0 +1,8 @@
+-- migrate: no-transaction
+-- Composite index for keyset-paginated history (GET /assessments/history):
+-- serves WHERE user_id = $1 AND (created_at, id) < cursor
+-- ORDER BY created_at DESC, id DESC as a single range scan. Built online,
+-- before 0006 drops idx_assessments_user_id, which it replaces.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_assessments_user_history
+    ON assessments(user_id, created_at DESC, id DESC);
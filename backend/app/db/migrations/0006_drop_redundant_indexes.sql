@@ -0,0 +1,14 @@
+-- migrate: no-transaction
+-- Drop indexes that only add write cost, without blocking the tables.
+--
+--   idx_users_email            duplicates users_email_key (UNIQUE email)
+--   idx_user_profiles_user_id  duplicates user_profiles_user_id_key (UNIQUE user_id)
+--   idx_assessments_type       two distinct values, never selective enough to be used
+--   idx_assessments_user_id    prefix of idx_assessments_user_history
+--                              (user_id, created_at DESC, id DESC), which also
+--                              serves user_id lookups and cascading deletes
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_users_email;
+DROP INDEX CONCURRENTLY IF EXISTS idx_user_profiles_user_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_assessments_type;
+DROP INDEX CONCURRENTLY IF EXISTS idx_assessments_user_id;
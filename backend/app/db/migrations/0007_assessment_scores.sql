@@ -0,0 +1,17 @@
+-- Compact assessment answers
+-- scores holds one byte per item, in the instrument's item order (item ids
+-- are implied by position): 9 bytes for a PHQ-9 instead of ~250 bytes of
+-- JSONB. New rows store only scores; responses stays readable for rows not
+-- yet converted by 0008.
+--
+-- All metadata-only changes: no table rewrite, no scan.
+
+ALTER TABLE assessments ADD COLUMN IF NOT EXISTS scores BYTEA;
+
+ALTER TABLE assessments ALTER COLUMN responses DROP NOT NULL;
+
+-- Validated by 0008 once existing rows are converted
+ALTER TABLE assessments DROP CONSTRAINT IF EXISTS assessments_answers_present;
+ALTER TABLE assessments
+    ADD CONSTRAINT assessments_answers_present
+    CHECK (scores IS NOT NULL OR responses IS NOT NULL) NOT VALID;
@@ -0,0 +1,62 @@
+-- migrate: no-transaction
+-- Convert existing JSONB responses to packed scores, online.
+--
+-- The procedure walks assessments in id order and commits every batch, so
+-- row locks are held for one batch at a time and the table stays writable.
+-- Rows whose question ids are not exactly 1..n are left as JSONB.
+-- Safe to re-run: converted rows are skipped.
+
+CREATE OR REPLACE PROCEDURE compact_assessment_scores(batch_size INTEGER)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    last_id UUID := '00000000-0000-0000-0000-000000000000';
+    batch_last UUID;
+    done BOOLEAN;
+BEGIN
+    LOOP
+        SELECT id INTO batch_last
+        FROM assessments
+        WHERE id > last_id
+        ORDER BY id
+        OFFSET batch_size - 1
+        LIMIT 1;
+
+        done := batch_last IS NULL;
+        IF done THEN
+            batch_last := 'ffffffff-ffff-ffff-ffff-ffffffffffff';
+        END IF;
+
+        UPDATE assessments a
+        SET scores = packed.scores, responses = NULL
+        FROM (
+            SELECT
+                src.id,
+                string_agg(
+                    set_byte('\x00'::bytea, 0, (r->>'score')::int),
+                    ''::bytea
+                    ORDER BY (r->>'question_id')::int
+                ) AS scores,
+                array_agg((r->>'question_id')::int ORDER BY (r->>'question_id')::int) AS question_ids
+            FROM assessments src
+            CROSS JOIN LATERAL jsonb_array_elements(src.responses) AS r
+            WHERE src.id > last_id AND src.id <= batch_last AND src.scores IS NULL
+            GROUP BY src.id
+        ) AS packed
+        WHERE a.id = packed.id
+          AND packed.question_ids = ARRAY(SELECT generate_series(1, cardinality(packed.question_ids)));
+
+        COMMIT;
+
+        EXIT WHEN done;
+        last_id := batch_last;
+    END LOOP;
+END;
+$$;
+
+CALL compact_assessment_scores(5000);
+
+DROP PROCEDURE compact_assessment_scores(INTEGER);
+
+-- Takes SHARE UPDATE EXCLUSIVE: reads and writes continue during the scan
+ALTER TABLE assessments VALIDATE CONSTRAINT assessments_answers_present;
@@ -0,0 +1,65 @@
+-- High-Risk Assessment Alerts
+-- Assessments scored "high" are recorded in an outbox in the same statement
+-- as the assessment INSERT. A background dispatcher in each API worker fans
+-- pending alerts out to therapist inboxes in batches.
+
+-- Therapists assigned to a patient. Alerts only go to a patient's active
+-- assigned therapists (or the configured triage therapist); without one
+-- they stay pending until a therapist is assigned.
+CREATE TABLE IF NOT EXISTS therapist_patients (
+    therapist_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    patient_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (therapist_id, patient_id)
+);
+
+-- Index for finding a patient's therapists during fan-out
+CREATE INDEX IF NOT EXISTS idx_therapist_patients_patient_id ON therapist_patients(patient_id);
+
+-- Outbox: one row per high-risk assessment, dispatched at most once
+CREATE TABLE IF NOT EXISTS assessment_alerts (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    assessment_id UUID UNIQUE NOT NULL REFERENCES assessments(id) ON DELETE CASCADE,
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    type TEXT NOT NULL,
+    total_score INTEGER NOT NULL,
+    risk_level TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    dispatched_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Index for claiming pending alerts, oldest first
+CREATE INDEX IF NOT EXISTS idx_assessment_alerts_pending
+    ON assessment_alerts(created_at)
+    WHERE dispatched_at IS NULL;
+
+-- Therapist inboxes. The primary key makes fan-out idempotent.
+CREATE TABLE IF NOT EXISTS therapist_alerts (
+    alert_id UUID NOT NULL REFERENCES assessment_alerts(id) ON DELETE CASCADE,
+    therapist_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (alert_id, therapist_id)
+);
+
+-- Index for listing a therapist's alerts, newest first
+CREATE INDEX IF NOT EXISTS idx_therapist_alerts_inbox ON therapist_alerts(therapist_id, created_at DESC);
+
+-- Wake the dispatchers when alerts, or assignments that give pending
+-- alerts a recipient, are committed. Identical notifications in one
+-- transaction are delivered once.
+CREATE OR REPLACE FUNCTION notify_assessment_alert() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('neuronet_assessment_alert', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS assessment_alerts_notify ON assessment_alerts;
+CREATE TRIGGER assessment_alerts_notify
+    AFTER INSERT ON assessment_alerts
+    FOR EACH ROW EXECUTE FUNCTION notify_assessment_alert();
+
+DROP TRIGGER IF EXISTS therapist_patients_notify ON therapist_patients;
+CREATE TRIGGER therapist_patients_notify
+    AFTER INSERT ON therapist_patients
+    FOR EACH ROW EXECUTE FUNCTION notify_assessment_alert();
@@ -0,0 +1,7 @@
+-- Profile Update Timestamp
+-- PUT /users/profile sets user_profiles.updated_at, which the original
+-- schema never created. NOW() is evaluated once, so adding the column with
+-- this default does not rewrite the table.
+
+ALTER TABLE user_profiles
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW();
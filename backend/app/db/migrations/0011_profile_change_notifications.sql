@@ -0,0 +1,29 @@
+-- Profile Change Notifications
+-- Keeps each worker's in-memory match index (app/core/matching.py) current:
+-- any change to a profile, or to a user's role or active flag, NOTIFYs
+-- neuronet_profile_updated with the user id once the change commits.
+
+CREATE OR REPLACE FUNCTION notify_profile_updated() RETURNS trigger AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'users' THEN
+        PERFORM pg_notify('neuronet_profile_updated', NEW.id::text);
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('neuronet_profile_updated', OLD.user_id::text);
+    ELSE
+        PERFORM pg_notify('neuronet_profile_updated', NEW.user_id::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS user_profiles_notify ON user_profiles;
+CREATE TRIGGER user_profiles_notify
+    AFTER INSERT OR UPDATE OR DELETE ON user_profiles
+    FOR EACH ROW EXECUTE FUNCTION notify_profile_updated();
+
+DROP TRIGGER IF EXISTS users_match_notify ON users;
+CREATE TRIGGER users_match_notify
+    AFTER UPDATE OF role, is_active ON users
+    FOR EACH ROW
+    WHEN (OLD.role IS DISTINCT FROM NEW.role OR OLD.is_active IS DISTINCT FROM NEW.is_active)
+    EXECUTE FUNCTION notify_profile_updated();
@@ -0,0 +1,10 @@
+-- migrate: no-transaction
+-- GIN indexes for overlap (&&) queries on profile languages and interests,
+-- used by GET /users/matches until the in-memory match index is loaded.
+-- Built online.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_profiles_languages
+    ON user_profiles USING GIN (languages);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_profiles_interests
+    ON user_profiles USING GIN (interests);
@@ -0,0 +1,6 @@
+-- Profile Versions
+-- Bumped by every profile update; GET /users/profile derives its ETag from
+-- it. A constant default does not rewrite the table.
+
+ALTER TABLE user_profiles
+    ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 1;
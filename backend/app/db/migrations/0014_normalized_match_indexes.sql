@@ -0,0 +1,33 @@
+-- migrate: no-transaction
+-- Matching compares languages and interests normalized, as stored values
+-- keep the user's spelling: match_terms() lowercases, collapses whitespace,
+-- truncates to 50 characters, drops duplicates and keeps the first 20, the
+-- same as normalize_terms() in app/core/matching.py. GIN indexes on it
+-- replace the ones on the raw arrays from 0012 for MATCH_PROFILES. Built
+-- online.
+
+CREATE OR REPLACE FUNCTION match_terms(terms TEXT[]) RETURNS TEXT[]
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT COALESCE(array_agg(term ORDER BY first_position), '{}')
+    FROM (
+        SELECT term, min(position) AS first_position
+        FROM (
+            SELECT left(lower(btrim(regexp_replace(t, '\s+', ' ', 'g'))), 50) AS term, position
+            FROM unnest(terms) WITH ORDINALITY AS u(t, position)
+        ) normalized
+        WHERE term <> ''
+        GROUP BY term
+        ORDER BY first_position
+        LIMIT 20
+    ) kept
+$$;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_profiles_match_languages
+    ON user_profiles USING GIN (match_terms(languages));
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_profiles_match_interests
+    ON user_profiles USING GIN (match_terms(interests));
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_user_profiles_languages;
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_user_profiles_interests;
@@ -0,0 +1,695 @@
+"""
+Query Registry
+
+Every SQL statement the API runs is declared here exactly once. Statements
+marked hot are prepared on each new pooled connection (the pool's init
+hook), so the request path never pays for parsing and planning them.
+
+Statement shapes are fixed: optional values are passed as NULL parameters
+rather than by building SQL text per request, so the server only ever sees
+the statements listed in this module. SQL run outside the registry is
+counted as ad hoc in get_query_stats(), which makes new dynamic shapes easy
+to spot.
+
+Run registered statements through the request handle (get_db), which
+accepts Query objects wherever it accepts SQL text:
+
+    row = await db.fetchrow(USER_PRINCIPAL, user_id)
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# Distinct ad hoc statements tracked before further ones are only counted
+MAX_TRACKED_ADHOC_STATEMENTS = 256
+
+
+@dataclass(frozen=True)
+class Query:
+    """A registered SQL statement"""
+    name: str
+    sql: str
+    hot: bool = False
+
+
+# Registered statements by name, in declaration order
+_registry: Dict[str, Query] = {}
+
+# Per-statement counters: name -> [calls, prepared statement hits]
+_stats: Dict[str, List[int]] = {}
+
+# Ad hoc (unregistered) SQL text -> calls
+_adhoc: Dict[str, int] = {}
+_adhoc_overflow = 0
+
+
+def register(name: str, sql: str, *, hot: bool = False) -> Query:
+    """
+    Declare a statement.
+
+    Args:
+        name: Unique statement name (used in stats)
+        sql: Statement text
+        hot: Prepare the statement on every pooled connection at connect time
+
+    Raises:
+        ValueError: If the name is already registered
+    """
+    if name in _registry:
+        raise ValueError(f"Query '{name}' is already registered")
+
+    query = Query(name=name, sql=sql, hot=hot)
+    _registry[name] = query
+    _stats[name] = [0, 0]
+    return query
+
+
+class RegistryConnection(asyncpg.Connection):
+    """asyncpg connection that holds the registry's hot statements prepared"""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.registry_statements: Dict[str, Any] = {}
+
+
+async def prepare_hot_statements(connection: asyncpg.Connection) -> None:
+    """
+    Pool init hook: prepare every hot statement on a new connection.
+
+    Statements that fail to prepare (e.g. a migration has not been applied
+    yet) are skipped and fall back to asyncpg's statement cache.
+    """
+    statements = getattr(connection, "registry_statements", None)
+    if statements is None:
+        return
+
+    for query in _registry.values():
+        if not query.hot:
+            continue
+        try:
+            statements[query.name] = await connection.prepare(query.sql)
+        except asyncpg.PostgresError as e:
+            logger.warning(f"Could not prepare query '{query.name}': {e}")
+
+
+async def run(connection: asyncpg.Connection, method: str, query: Any, *args: Any, **kwargs: Any) -> Any:
+    """
+    Run a statement on a raw connection.
+
+    Uses the connection's prepared statement for registered hot queries,
+    otherwise the regular connection method (and asyncpg's own cache).
+
+    Args:
+        connection: asyncpg connection (or pool proxy)
+        method: fetch, fetchrow, fetchval, execute or executemany
+        query: Query object or SQL text
+    """
+    global _adhoc_overflow
+
+    if not isinstance(query, Query):
+        if query in _adhoc:
+            _adhoc[query] += 1
+        elif len(_adhoc) < MAX_TRACKED_ADHOC_STATEMENTS:
+            _adhoc[query] = 1
+        else:
+            _adhoc_overflow += 1
+        return await getattr(connection, method)(query, *args, **kwargs)
+
+    counters = _stats[query.name]
+    counters[0] += 1
+
+    if method != "executemany":
+        statements = getattr(connection, "registry_statements", None) or {}
+        statement = statements.get(query.name)
+        if statement is not None:
+            try:
+                if method == "execute":
+                    await statement.fetch(*args, **kwargs)
+                    result = statement.get_statusmsg()
+                else:
+                    result = await getattr(statement, method)(*args, **kwargs)
+                counters[1] += 1
+                return result
+            except asyncpg.InvalidCachedStatementError:
+                # Schema changed under the statement; let asyncpg re-prepare it
+                statements.pop(query.name, None)
+
+    return await getattr(connection, method)(query.sql, *args, **kwargs)
+
+
+def cursor(connection: asyncpg.Connection, query: Query, *args: Any, prefetch: Optional[int] = None) -> Any:
+    """
+    Server-side cursor over a registered statement.
+
+    Must be iterated inside a transaction. Rows are fetched from the
+    server prefetch at a time, so memory stays flat for any result size.
+
+    Usage:
+        async with connection.transaction():
+            async for row in queries.cursor(connection, EXPORT_ASSESSMENTS, ...):
+                ...
+    """
+    _stats[query.name][0] += 1
+    return connection.cursor(query.sql, *args, prefetch=prefetch)
+
+
+def registered_queries() -> List[Query]:
+    """All registered statements, in declaration order"""
+    return list(_registry.values())
+
+
+def get_query_stats() -> Dict[str, Any]:
+    """
+    Get registry usage statistics.
+
+    Returns:
+        Per registered query: calls, prepared statement hits and hit rate.
+        Plus the number of distinct ad hoc statements seen and their calls.
+    """
+    queries = {}
+    for name, (calls, hits) in _stats.items():
+        queries[name] = {
+            "hot": _registry[name].hot,
+            "calls": calls,
+            "prepared_hits": hits,
+            "hit_rate": (hits / calls) if calls else 0.0,
+        }
+
+    return {
+        "queries": queries,
+        "adhoc_statements": len(_adhoc) + (1 if _adhoc_overflow else 0),
+        "adhoc_calls": sum(_adhoc.values()) + _adhoc_overflow,
+        "adhoc_untracked_calls": _adhoc_overflow,
+    }
+
+
+# ==================== AUTH ====================
+
+USER_PRINCIPAL = register(
+    "user_principal",
+    "SELECT id, email, role, is_active FROM users WHERE id = $1",
+    hot=True
+)
+
+USER_BY_EMAIL = register(
+    "user_by_email",
+    """
+    SELECT id, email, hashed_password, role, is_active
+    FROM users
+    WHERE email = $1
+    """,
+    hot=True
+)
+
+REGISTER_USER = register(
+    "register_user",
+    """
+    WITH new_user AS (
+        INSERT INTO users (email, hashed_password, role, is_active)
+        VALUES ($1, $2, $3, $4)
+        RETURNING id
+    ), new_profile AS (
+        INSERT INTO user_profiles (user_id)
+        SELECT id FROM new_user
+    )
+    SELECT id FROM new_user
+    """
+)
+
+UPDATE_PASSWORD_HASH = register(
+    "update_password_hash",
+    """
+    UPDATE users
+    SET hashed_password = $1, updated_at = NOW()
+    WHERE id = $2 AND hashed_password = $3
+    """
+)
+
+CREATE_SESSION = register(
+    "create_session",
+    """
+    WITH sess AS (
+        INSERT INTO auth_sessions (user_id, expires_at)
+        VALUES ($1, NOW() + make_interval(days => $3))
+        RETURNING id, expires_at
+    )
+    INSERT INTO refresh_tokens (token_hash, session_id, expires_at)
+    SELECT $2, id, expires_at FROM sess
+    RETURNING session_id
+    """,
+    hot=True
+)
+
+ROTATE_REFRESH_TOKEN = register(
+    "rotate_refresh_token",
+    """
+    WITH used AS (
+        UPDATE refresh_tokens
+        SET used_at = NOW()
+        WHERE token_hash = $1 AND used_at IS NULL AND expires_at > NOW()
+        RETURNING session_id
+    ), sess AS (
+        UPDATE auth_sessions s
+        SET expires_at = NOW() + make_interval(days => $3)
+        FROM used
+        WHERE s.id = used.session_id AND s.revoked_at IS NULL
+        RETURNING s.id, s.user_id, s.expires_at
+    ), issued AS (
+        INSERT INTO refresh_tokens (token_hash, session_id, expires_at)
+        SELECT $2, id, expires_at FROM sess
+    )
+    SELECT sess.id AS session_id, u.id, u.email, u.role, u.is_active
+    FROM sess
+    JOIN users u ON u.id = sess.user_id
+    """,
+    hot=True
+)
+
+USED_REFRESH_TOKEN_SESSION = register(
+    "used_refresh_token_session",
+    "SELECT session_id FROM refresh_tokens WHERE token_hash = $1 AND used_at IS NOT NULL"
+)
+
+REVOKE_SESSION = register(
+    "revoke_session",
+    """
+    UPDATE auth_sessions
+    SET revoked_at = NOW()
+    WHERE id = $1 AND revoked_at IS NULL
+    RETURNING id
+    """
+)
+
+RECENTLY_REVOKED_SESSIONS = register(
+    "recently_revoked_sessions",
+    """
+    SELECT id, EXTRACT(EPOCH FROM revoked_at) AS revoked_at
+    FROM auth_sessions
+    WHERE revoked_at > NOW() - make_interval(secs => $1)
+    """
+)
+
+NOTIFY = register("notify", "SELECT pg_notify($1, $2)")
+
+
+# ==================== USERS ====================
+
+USER_PROFILE = register(
+    "user_profile",
+    """
+    SELECT
+        u.id,
+        u.email,
+        u.role,
+        p.full_name,
+        p.age,
+        p.gender,
+        p.languages,
+        p.interests,
+        p.version
+    FROM users u
+    LEFT JOIN user_profiles p ON u.id = p.user_id
+    WHERE u.id = $1
+    """,
+    hot=True
+)
+
+# Profiles of a therapist's patients with each one's latest assessment, in
+# one round trip. Ids not assigned to the therapist in therapist_patients
+# return no row. The LATERAL subquery is one index probe per user on
+# idx_assessments_user_history. $1 user ids, $2 therapist id
+USER_PROFILES_WITH_LATEST_ASSESSMENT = register(
+    "user_profiles_with_latest_assessment",
+    """
+    SELECT
+        u.id,
+        u.email,
+        u.role,
+        p.full_name,
+        p.age,
+        p.gender,
+        p.languages,
+        p.interests,
+        a.type AS assessment_type,
+        a.total_score,
+        a.risk_level,
+        a.created_at AS assessed_at
+    FROM users u
+    JOIN therapist_patients tp ON tp.patient_id = u.id AND tp.therapist_id = $2
+    LEFT JOIN user_profiles p ON u.id = p.user_id
+    LEFT JOIN LATERAL (
+        SELECT type, total_score, risk_level, created_at
+        FROM assessments
+        WHERE user_id = u.id
+        ORDER BY created_at DESC, id DESC
+        LIMIT 1
+    ) a ON true
+    WHERE u.id = ANY($1::uuid[])
+    """
+)
+
+# NULL parameters leave the column unchanged, so every combination of
+# updated fields shares this one statement. Bumps the profile version and
+# returns the updated profile so the response needs no second query (email
+# and role come from the authenticated principal).
+UPDATE_PROFILE = register(
+    "update_profile",
+    """
+    UPDATE user_profiles
+    SET
+        full_name = COALESCE($2, full_name),
+        age = COALESCE($3, age),
+        gender = COALESCE($4, gender),
+        languages = COALESCE($5, languages),
+        interests = COALESCE($6, interests),
+        version = version + 1,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE user_id = $1
+    RETURNING full_name, age, gender, languages, interests, version
+    """,
+    hot=True
+)
+
+
+# Matchable profiles (active buddies and therapists), for loading the
+# in-memory match index: $1 roles
+MATCH_CANDIDATES = register(
+    "match_candidates",
+    """
+    SELECT p.user_id, u.role, p.full_name, p.languages, p.interests
+    FROM user_profiles p
+    JOIN users u ON u.id = p.user_id
+    WHERE u.is_active AND u.role = ANY($1::text[])
+    """
+)
+
+# One profile's match index entry; no row if it is no longer matchable:
+#   $1 user_id, $2 roles
+MATCH_CANDIDATE = register(
+    "match_candidate",
+    """
+    SELECT p.user_id, u.role, p.full_name, p.languages, p.interests
+    FROM user_profiles p
+    JOIN users u ON u.id = p.user_id
+    WHERE p.user_id = $1 AND u.is_active AND u.role = ANY($2::text[])
+    """
+)
+
+# Top matches by weighted language and interest overlap, for when the
+# in-memory index is not loaded. Stored terms are compared normalized
+# (match_terms, migration 0014), so $2 and $3 must be normalize_terms()
+# output; the && filters use the GIN indexes on match_terms().
+#   $1 caller id (excluded), $2 languages, $3 interests, $4 roles,
+#   $5 limit, $6 weight of a shared language (a shared interest counts 1)
+MATCH_PROFILES = register(
+    "match_profiles",
+    """
+    SELECT p.user_id, u.role, p.full_name,
+           match_terms(p.languages) AS languages,
+           match_terms(p.interests) AS interests,
+           m.shared_languages, m.shared_interests
+    FROM user_profiles p
+    JOIN users u ON u.id = p.user_id
+    CROSS JOIN LATERAL (
+        SELECT
+            ARRAY(SELECT unnest(match_terms(p.languages)) INTERSECT SELECT unnest($2::text[])) AS shared_languages,
+            ARRAY(SELECT unnest(match_terms(p.interests)) INTERSECT SELECT unnest($3::text[])) AS shared_interests
+    ) m
+    WHERE (match_terms(p.languages) && $2::text[] OR match_terms(p.interests) && $3::text[])
+      AND p.user_id <> $1
+      AND u.is_active
+      AND u.role = ANY($4::text[])
+    ORDER BY $6 * cardinality(m.shared_languages) + cardinality(m.shared_interests) DESC, p.user_id
+    LIMIT $5
+    """
+)
+
+
+# ==================== ASSESSMENTS ====================
+
+# Insert an assessment and fold it into the user's summary rollup in one
+# statement (and therefore one transaction). A high-risk assessment is also
+# added to the alert outbox (see ALERTS below).
+#   $1 user_id, $2 type, $3 packed scores, $4 total_score, $5 risk_level,
+#   $6 rolling window size
+RECORD_ASSESSMENT = register(
+    "record_assessment",
+    """
+    WITH inserted AS (
+        INSERT INTO assessments (user_id, type, scores, total_score, risk_level)
+        VALUES ($1, $2, $3, $4, $5)
+        RETURNING id, user_id, type, total_score, risk_level, created_at
+    ), alerted AS (
+        INSERT INTO assessment_alerts (assessment_id, user_id, type, total_score, risk_level, created_at)
+        SELECT id, user_id, type, total_score, risk_level, created_at
+        FROM inserted
+        WHERE risk_level = 'high'
+    )
+    INSERT INTO assessment_summaries AS s (
+        user_id, type, latest_score, latest_risk_level, latest_at,
+        previous_score, recent_scores, assessment_count
+    )
+    SELECT user_id, type, total_score, risk_level, created_at, NULL, ARRAY[total_score], 1
+    FROM inserted
+    ON CONFLICT (user_id, type) DO UPDATE SET
+        previous_score = s.latest_score,
+        latest_score = EXCLUDED.latest_score,
+        latest_risk_level = EXCLUDED.latest_risk_level,
+        latest_at = EXCLUDED.latest_at,
+        recent_scores = (EXCLUDED.recent_scores || s.recent_scores)[1:$6],
+        assessment_count = s.assessment_count + 1,
+        updated_at = NOW()
+    """,
+    hot=True
+)
+
+# Multi-row RECORD_ASSESSMENT for batch submissions and the write-behind
+# journal. Ids and timestamps come from stamp_submissions() (increasing in
+# submission order); the journal assigns them when a submission is
+# journaled, so replaying a batch is a no-op: rows already stored are
+# skipped and only rows actually inserted are folded into the summaries
+# (newest first per user and type) and, if high-risk, added to the alert
+# outbox.
+#   $1 ids, $2 user_ids, $3 types, $4 packed scores, $5 total_scores,
+#   $6 risk_levels, $7 created_ats, $8 rolling window size
+RECORD_ASSESSMENT_BATCH = register(
+    "record_assessment_batch",
+    """
+    WITH inserted AS (
+        INSERT INTO assessments (id, user_id, type, scores, total_score, risk_level, created_at)
+        SELECT * FROM unnest(
+            $1::uuid[], $2::uuid[], $3::text[], $4::bytea[], $5::int[], $6::text[], $7::timestamptz[]
+        )
+        ON CONFLICT (id) DO NOTHING
+        RETURNING id, user_id, type, total_score, risk_level, created_at
+    ), alerted AS (
+        INSERT INTO assessment_alerts (assessment_id, user_id, type, total_score, risk_level, created_at)
+        SELECT id, user_id, type, total_score, risk_level, created_at
+        FROM inserted
+        WHERE risk_level = 'high'
+    ), grouped AS (
+        SELECT
+            user_id,
+            type,
+            array_agg(total_score ORDER BY created_at DESC, id DESC) AS scores,
+            array_agg(risk_level ORDER BY created_at DESC, id DESC) AS risk_levels,
+            max(created_at) AS latest_at,
+            count(*) AS inserted_count
+        FROM inserted
+        GROUP BY user_id, type
+    )
+    INSERT INTO assessment_summaries AS s (
+        user_id, type, latest_score, latest_risk_level, latest_at,
+        previous_score, recent_scores, assessment_count
+    )
+    SELECT user_id, type, scores[1], risk_levels[1], latest_at, scores[2], scores[1:$8], inserted_count
+    FROM grouped
+    ON CONFLICT (user_id, type) DO UPDATE SET
+        previous_score = COALESCE(EXCLUDED.previous_score, s.latest_score),
+        latest_score = EXCLUDED.latest_score,
+        latest_risk_level = EXCLUDED.latest_risk_level,
+        latest_at = EXCLUDED.latest_at,
+        recent_scores = (EXCLUDED.recent_scores || s.recent_scores)[1:$8],
+        assessment_count = s.assessment_count + EXCLUDED.assessment_count,
+        updated_at = NOW()
+    """,
+    hot=True
+)
+
+# Keyset page of a user's history, newest first. Every filter is optional
+# (NULL = unbounded) and the bounds stay sargable, so each page is a range
+# scan of idx_assessments_user_history:
+#   $2 type, $3 since, $4 until, ($5, $6) cursor position, $7 page size
+ASSESSMENT_HISTORY = register(
+    "assessment_history",
+    """
+    SELECT id, type, total_score, risk_level, created_at
+    FROM assessments
+    WHERE user_id = $1
+      AND ($2::text IS NULL OR type = $2::text)
+      AND created_at >= COALESCE($3::timestamptz, '-infinity'::timestamptz)
+      AND created_at < COALESCE($4::timestamptz, 'infinity'::timestamptz)
+      AND (created_at, id) < (
+          COALESCE($5::timestamptz, 'infinity'::timestamptz),
+          COALESCE($6::uuid, 'ffffffff-ffff-ffff-ffff-ffffffffffff'::uuid)
+      )
+    ORDER BY created_at DESC, id DESC
+    LIMIT $7
+    """,
+    hot=True
+)
+
+ASSESSMENT_SUMMARIES = register(
+    "assessment_summaries",
+    """
+    SELECT type, latest_score, latest_risk_level, latest_at,
+           previous_score, recent_scores, assessment_count
+    FROM assessment_summaries
+    WHERE user_id = $1
+    ORDER BY type
+    """,
+    hot=True
+)
+
+# Assessments for export, oldest first. Answers come as packed scores, or
+# as JSONB responses for rows not yet converted. Every filter is optional
+# (NULL = any): $1 user_id, $2 type, $3 since, $4 until, $5 risk_level
+EXPORT_ASSESSMENTS = register(
+    "export_assessments",
+    """
+    SELECT id, user_id, type, total_score, risk_level, created_at, scores, responses
+    FROM assessments
+    WHERE ($1::uuid IS NULL OR user_id = $1::uuid)
+      AND ($2::text IS NULL OR type = $2::text)
+      AND created_at >= COALESCE($3::timestamptz, '-infinity'::timestamptz)
+      AND created_at < COALESCE($4::timestamptz, 'infinity'::timestamptz)
+      AND ($5::text IS NULL OR risk_level = $5::text)
+    ORDER BY created_at, id
+    """
+)
+
+# Recompute the rollups of the given users for one type from their stored
+# assessments, e.g. after historical scores were rewritten.
+#   $1 user ids, $2 type, $3 rolling window size
+REBUILD_ASSESSMENT_SUMMARIES = register(
+    "rebuild_assessment_summaries",
+    """
+    INSERT INTO assessment_summaries AS s (
+        user_id, type, latest_score, latest_risk_level, latest_at,
+        previous_score, recent_scores, assessment_count
+    )
+    SELECT
+        user_id,
+        type,
+        (array_agg(total_score ORDER BY created_at DESC, id DESC))[1],
+        (array_agg(risk_level ORDER BY created_at DESC, id DESC))[1],
+        max(created_at),
+        (array_agg(total_score ORDER BY created_at DESC, id DESC))[2],
+        (array_agg(total_score ORDER BY created_at DESC, id DESC))[1:$3],
+        count(*)
+    FROM assessments
+    WHERE user_id = ANY($1::uuid[]) AND type = $2
+    GROUP BY user_id, type
+    ON CONFLICT (user_id, type) DO UPDATE SET
+        latest_score = EXCLUDED.latest_score,
+        latest_risk_level = EXCLUDED.latest_risk_level,
+        latest_at = EXCLUDED.latest_at,
+        previous_score = EXCLUDED.previous_score,
+        recent_scores = EXCLUDED.recent_scores,
+        assessment_count = EXCLUDED.assessment_count,
+        updated_at = NOW()
+    """
+)
+
+
+# ==================== ALERTS ====================
+
+# Fan a batch of pending high-risk alerts out to therapist inboxes and mark
+# them dispatched, in one statement. SKIP LOCKED lets every worker run this
+# concurrently without claiming the same alerts; the inbox primary key
+# makes a repeated fan-out a no-op. Recipients are the patient's active
+# assigned therapists, or else the triage therapist. Alerts with neither
+# are not claimed, so they stay pending until a therapist is assigned.
+#   $1 batch size, $2 triage therapist id (NULL: none)
+DISPATCH_ALERTS = register(
+    "dispatch_alerts",
+    """
+    WITH triage AS (
+        SELECT id
+        FROM users
+        WHERE id = $2::uuid AND role = 'therapist' AND is_active
+    ), claimed AS (
+        SELECT a.id, a.user_id
+        FROM assessment_alerts a
+        WHERE a.dispatched_at IS NULL
+          AND (
+              EXISTS (SELECT 1 FROM triage t WHERE t.id <> a.user_id)
+              OR EXISTS (
+                  SELECT 1
+                  FROM therapist_patients tp
+                  JOIN users t ON t.id = tp.therapist_id AND t.is_active
+                  WHERE tp.patient_id = a.user_id
+              )
+          )
+        ORDER BY a.created_at
+        LIMIT $1
+        FOR UPDATE SKIP LOCKED
+    ), assigned AS (
+        SELECT c.id AS alert_id, t.id AS therapist_id
+        FROM claimed c
+        JOIN therapist_patients tp ON tp.patient_id = c.user_id
+        JOIN users t ON t.id = tp.therapist_id AND t.is_active
+    ), recipients AS (
+        SELECT alert_id, therapist_id FROM assigned
+        UNION
+        SELECT c.id, t.id
+        FROM claimed c
+        JOIN triage t ON t.id <> c.user_id
+        WHERE NOT EXISTS (SELECT 1 FROM assigned a WHERE a.alert_id = c.id)
+    ), delivered AS (
+        INSERT INTO therapist_alerts (alert_id, therapist_id)
+        SELECT alert_id, therapist_id FROM recipients
+        ON CONFLICT (alert_id, therapist_id) DO NOTHING
+        RETURNING alert_id
+    )
+    UPDATE assessment_alerts a
+    SET dispatched_at = NOW()
+    FROM claimed c
+    WHERE a.id = c.id
+    RETURNING a.id, (SELECT count(*) FROM delivered d WHERE d.alert_id = a.id) AS recipients
+    """
+)
+
+# Alerts still pending (after a dispatch pass: those without a recipient)
+PENDING_ALERT_COUNT = register(
+    "pending_alert_count",
+    """
+    SELECT count(*)
+    FROM assessment_alerts
+    WHERE dispatched_at IS NULL
+    """
+)
+
+# A therapist's alert inbox, newest first: $1 therapist_id, $2 limit
+THERAPIST_ALERTS = register(
+    "therapist_alerts",
+    """
+    SELECT a.id, a.assessment_id, a.user_id, a.type, a.total_score, a.risk_level,
+           a.created_at, ta.created_at AS delivered_at
+    FROM therapist_alerts ta
+    JOIN assessment_alerts a ON a.id = ta.alert_id
+    WHERE ta.therapist_id = $1
+    ORDER BY ta.created_at DESC
+    LIMIT $2
+    """
+)
+
+
+# ==================== HEALTH ====================
+
+HEALTH_CHECK = register("health_check", "SELECT 1")
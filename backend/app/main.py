@@ -12,7 +12,19 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api import auth, health, users, assessments
+from app.core.alerts import alert_dispatcher, register_alert_listener
+from app.core.config import settings
 from app.core.database import connect_to_db, close_db_connection
+from app.core.matching import register_match_listener
+from app.core.notifications import listener
+from app.core.profile_versions import register_profile_version_listener
+from app.core.revocation import register_revocation_listener
+from app.core.security import (
+    calibrate_bcrypt_rounds,
+    start_password_hasher,
+    shutdown_password_hasher
+)
+from app.core.write_behind import assessment_journal
 
 # Configure logging
 logging.basicConfig(
@@ -26,13 +38,33 @@ async def lifespan(app: FastAPI):
     """
     Application lifespan manager for startup and shutdown events.
     
-    Startup: Initialize database connection pool
-    Shutdown: Close database connection pool
+    Startup: Initialize database connection pool, password hashing pool,
+             the LISTEN/NOTIFY listener (which also loads the profile
+             match index and evicts stale principals), the high-risk
+             alert dispatcher and (if enabled) the assessment
+             write-behind journal, replaying anything left unwritten
+    Shutdown: Close them in reverse order
     """
     # Startup
     await connect_to_db()
+    start_password_hasher()
+    await calibrate_bcrypt_rounds()
+    register_revocation_listener(listener)
+    auth.register_principal_listener(listener)
+    register_alert_listener(listener)
+    register_profile_version_listener(listener)
+    if settings.PROFILE_MATCH_INDEX:
+        register_match_listener(listener)
+    await listener.start()
+    await alert_dispatcher.start()
+    if settings.ASSESSMENT_WRITE_BEHIND:
+        await assessment_journal.start(rolling_window=assessments.ROLLING_AVERAGE_WINDOW)
     yield
     # Shutdown
+    await assessment_journal.stop()
+    await alert_dispatcher.stop()
+    await listener.stop()
+    shutdown_password_hasher()
     await close_db_connection()
 
 
@@ -51,6 +83,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -0,0 +1,5 @@
+"""
+Benchmarks and load-testing tools - not part of the application runtime
+
+Run from the backend directory, e.g. `python -m benchmarks.token_decode`
+"""
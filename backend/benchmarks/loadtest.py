@@ -0,0 +1,323 @@
+"""
+Async Load Generator for the NeuroNet API
+
+Simulates concurrent users running a weighted mix of API calls and reports
+throughput plus p50/p95/p99 latency per route. Runs either against a live
+server (--base-url) or in-process against the FastAPI app (--in-process),
+using the DATABASE_URL from .env - point it at a local PostgreSQL, never
+at production.
+
+Each virtual user registers (or reuses) its own account, logs in once and
+then loops: pick an endpoint from the mix, call it, sleep a think time.
+Given the same --seed the sequence of calls is reproducible.
+
+Usage (from the backend directory):
+    pip install -r requirements-dev.txt
+    python -m benchmarks.loadtest --users 50 --duration 60 \\
+        --mix me=4,types=2,questions=2,submit=1,history=2,profile=2
+
+Results can also be written as JSON (--json results.json) to compare runs
+when tuning pool sizes and worker counts.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+ASSESSMENT_ITEMS = {"PHQ-9": 9, "GAD-7": 7}
+
+DEFAULT_MIX = "me=4,types=2,questions=2,submit=1,history=2,profile=2"
+
+# Register/login calls are bcrypt-bound and rejected with 503 once the
+# server's hash queue (PASSWORD_HASH_MAX_QUEUE) is full: retry them this
+# many times, backing off from the first delay (seconds)
+AUTH_RETRIES = 8
+AUTH_RETRY_DELAY = 0.25
+
+
+# ==================== ENDPOINT MIX ====================
+
+async def call_me(user: "VirtualUser") -> Tuple[str, httpx.Response]:
+    return "GET /auth/me", await user.client.get("/auth/me")
+
+
+async def call_types(user: "VirtualUser") -> Tuple[str, httpx.Response]:
+    return "GET /assessments/types", await user.client.get("/assessments/types")
+
+
+async def call_questions(user: "VirtualUser") -> Tuple[str, httpx.Response]:
+    assessment_type = user.rng.choice(list(ASSESSMENT_ITEMS))
+    return (
+        "GET /assessments/{type}/questions",
+        await user.client.get(f"/assessments/{assessment_type}/questions")
+    )
+
+
+async def call_submit(user: "VirtualUser") -> Tuple[str, httpx.Response]:
+    assessment_type = user.rng.choice(list(ASSESSMENT_ITEMS))
+    body = {
+        "type": assessment_type,
+        "responses": [
+            {"question_id": i, "score": user.rng.randint(0, 3)}
+            for i in range(1, ASSESSMENT_ITEMS[assessment_type] + 1)
+        ],
+    }
+    return "POST /assessments/submit", await user.client.post("/assessments/submit", json=body)
+
+
+async def call_history(user: "VirtualUser") -> Tuple[str, httpx.Response]:
+    return "GET /assessments/history", await user.client.get("/assessments/history")
+
+
+async def call_profile(user: "VirtualUser") -> Tuple[str, httpx.Response]:
+    return "GET /users/profile", await user.client.get("/users/profile")
+
+
+async def call_update_profile(user: "VirtualUser") -> Tuple[str, httpx.Response]:
+    body = {"age": user.rng.randint(18, 80), "interests": user.rng.sample(["yoga", "music", "journaling", "running"], 2)}
+    return "PUT /users/profile", await user.client.put("/users/profile", json=body)
+
+
+async def call_login(user: "VirtualUser") -> Tuple[str, httpx.Response]:
+    return "POST /auth/login", await user.client.post("/auth/login", json=user.credentials)
+
+
+ENDPOINTS = {
+    "me": call_me,
+    "types": call_types,
+    "questions": call_questions,
+    "submit": call_submit,
+    "history": call_history,
+    "profile": call_profile,
+    "update_profile": call_update_profile,
+    "login": call_login,
+}
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse 'name=weight,...' into a weight per endpoint"""
+    weights = {}
+
+    for part in mix.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name}'. Choose from: {', '.join(ENDPOINTS)}")
+        weights[name] = float(weight or 1)
+
+    return weights
+
+
+# ==================== RESULTS ====================
+
+class Recorder:
+    """Collects latency samples and status codes per route"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, route: str, latency: float, status_code: Optional[int]) -> None:
+        self.latencies[route].append(latency)
+        if status_code is None or status_code >= 400:
+            self.errors[route] += 1
+        self.statuses[route][status_code or 0] += 1
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, Dict[str, float]]:
+    """Build the per-route and overall report"""
+    report = {}
+    all_latencies = []
+
+    for route in sorted(recorder.latencies):
+        values = sorted(recorder.latencies[route])
+        all_latencies.extend(values)
+        report[route] = {
+            "requests": len(values),
+            "errors": recorder.errors[route],
+            "rps": len(values) / elapsed,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "statuses": dict(recorder.statuses[route]),
+        }
+
+    all_latencies.sort()
+    report["TOTAL"] = {
+        "requests": len(all_latencies),
+        "errors": sum(recorder.errors.values()),
+        "rps": len(all_latencies) / elapsed,
+        "p50_ms": percentile(all_latencies, 50) * 1000,
+        "p95_ms": percentile(all_latencies, 95) * 1000,
+        "p99_ms": percentile(all_latencies, 99) * 1000,
+    }
+
+    return report
+
+
+def print_report(report: Dict[str, Dict[str, float]], elapsed: float, users: int) -> None:
+    print(f"\n{users} users, {elapsed:.1f}s\n")
+    print(f"{'route':<36} {'reqs':>7} {'errs':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+
+    for route, row in report.items():
+        print(
+            f"{route:<36} {row['requests']:>7} {row['errors']:>6} {row['rps']:>8.1f} "
+            f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}"
+        )
+
+
+# ==================== VIRTUAL USERS ====================
+
+class VirtualUser:
+    """One simulated client with its own account, connection and RNG"""
+
+    def __init__(self, client: httpx.AsyncClient, email: str, password: str, seed: int):
+        self.client = client
+        self.credentials = {"email": email, "password": password}
+        self.rng = random.Random(seed)
+
+    async def authenticate(self) -> None:
+        """Register the account if needed, log in and attach the bearer token"""
+        response = await self._post_auth(
+            "/auth/register",
+            {**self.credentials, "role": "user"}
+        )
+        if response.status_code not in (201, 400):
+            response.raise_for_status()
+
+        response = await self._post_auth("/auth/login", self.credentials)
+        response.raise_for_status()
+
+        self.client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+    async def _post_auth(self, path: str, body: Dict[str, str]) -> httpx.Response:
+        """POST to an auth route, retrying 503 (hash queue full) with backoff"""
+        delay = AUTH_RETRY_DELAY
+        for _ in range(AUTH_RETRIES):
+            response = await self.client.post(path, json=body)
+            if response.status_code != 503:
+                return response
+            # Jitter from the global RNG keeps self.rng (the call sequence) reproducible
+            await asyncio.sleep(delay * (1 + random.random()))
+            delay *= 2
+        return await self.client.post(path, json=body)
+
+    async def run(
+        self,
+        weights: Dict[str, float],
+        think_time: float,
+        deadline: float,
+        recorder: Recorder,
+    ) -> None:
+        """Run weighted calls with exponential think time until the deadline"""
+        names = list(weights)
+        name_weights = list(weights.values())
+
+        while time.perf_counter() < deadline:
+            name = self.rng.choices(names, weights=name_weights)[0]
+            started = time.perf_counter()
+
+            try:
+                route, response = await ENDPOINTS[name](self)
+                status_code = response.status_code
+            except httpx.HTTPError:
+                route, status_code = name, None
+
+            recorder.record(route, time.perf_counter() - started, status_code)
+
+            if think_time > 0:
+                await asyncio.sleep(self.rng.expovariate(1 / think_time))
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    weights = parse_mix(args.mix)
+    recorder = Recorder()
+
+    async with AsyncExitStack() as stack:
+        if args.in_process:
+            from app.main import app
+
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            base_url = "http://loadtest"
+        else:
+            base_url = args.base_url
+
+        users = []
+        for i in range(args.users):
+            # One keep-alive connection per virtual user, like a real client
+            if args.in_process:
+                transport = httpx.ASGITransport(app=app)
+            else:
+                transport = httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=1))
+            client = httpx.AsyncClient(base_url=base_url, transport=transport, timeout=args.timeout)
+            await stack.enter_async_context(client)
+            users.append(VirtualUser(client, f"{args.email_prefix}{i}@example.com", args.password, args.seed + i))
+
+        # Stay below the server's hash queue limit; 503s are retried anyway
+        print(f"Authenticating {args.users} users...")
+        auth_slots = asyncio.Semaphore(args.auth_concurrency)
+
+        async def authenticate(user: VirtualUser) -> None:
+            async with auth_slots:
+                await user.authenticate()
+
+        await asyncio.gather(*(authenticate(user) for user in users))
+
+        print(f"Running for {args.duration}s...")
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            user.run(weights, args.think_time, deadline, recorder)
+            for user in users
+        ))
+        elapsed = time.perf_counter() - started
+
+    report = summarize(recorder, elapsed)
+    print_report(report, elapsed, args.users)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000", help="Server to load (default: %(default)s)")
+    parser.add_argument("--in-process", action="store_true", help="Drive the FastAPI app in-process instead of over HTTP")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users (default: %(default)s)")
+    parser.add_argument("--duration", type=float, default=30, help="Measured run time in seconds (default: %(default)s)")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Mean pause between calls in seconds (default: %(default)s)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Endpoint weights (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for reproducible runs (default: %(default)s)")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds (default: %(default)s)")
+    parser.add_argument("--auth-concurrency", type=int, default=8, help="Users registering or logging in at once (default: %(default)s)")
+    parser.add_argument("--email-prefix", default="loadtest-user-", help="Prefix of generated accounts (default: %(default)s)")
+    parser.add_argument("--password", default="loadtest-password", help="Password of generated accounts")
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"args": vars(args), "report": report}, f, indent=2, default=str)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Assessment Export Script
+
+Streams assessments from the database to a file (or stdout) as NDJSON or
+CSV, using the same server-side cursor export as GET /assessments/export.
+Memory use stays constant for any number of rows.
+
+Usage (from the backend directory):
+    python export_assessments.py --format csv --output assessments.csv
+    python export_assessments.py --type PHQ-9 --risk-level high --since 2025-01-01
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timezone
+from typing import List, Optional
+from uuid import UUID
+
+import asyncpg
+
+from app.core.config import settings
+from app.core.exports import EXPORT_FORMATS, iter_assessment_export
+
+
+def parse_time(value: str) -> datetime:
+    """ISO 8601 time; UTC unless it carries an offset"""
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+async def run_export(args: argparse.Namespace) -> int:
+    """Write the export and return the number of bytes written"""
+
+    print("Connecting to database...", file=sys.stderr)
+    conn = await asyncpg.connect(settings.DATABASE_URL)
+
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    written = 0
+
+    try:
+        async for chunk in iter_assessment_export(
+            conn,
+            args.format,
+            user_id=args.user_id,
+            assessment_type=args.type,
+            since=args.since,
+            until=args.until,
+            risk_level=args.risk_level
+        ):
+            output.write(chunk)
+            written += len(chunk)
+
+        output.flush()
+        print(f"✅ Exported {written} bytes", file=sys.stderr)
+
+    except Exception as e:
+        print(f"❌ Export failed: {e}", file=sys.stderr)
+        raise
+
+    finally:
+        if args.output:
+            output.close()
+        await conn.close()
+
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson", help="Output format (default: %(default)s)")
+    parser.add_argument("--output", help="Output file (default: stdout)")
+    parser.add_argument("--type", help="Only this assessment type")
+    parser.add_argument("--since", type=parse_time, help="Only assessments taken at or after this ISO time (UTC)")
+    parser.add_argument("--until", type=parse_time, help="Only assessments taken before this ISO time (UTC)")
+    parser.add_argument("--risk-level", help="Only this risk level")
+    parser.add_argument("--user-id", type=UUID, help="Only this user's assessments")
+    args = parser.parse_args(argv)
+
+    asyncio.run(run_export(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
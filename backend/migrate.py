@@ -0,0 +1,474 @@
+"""
+Database Migration Runner
+
+Applies the numbered SQL files in app/db/migrations (NNNN_description.sql)
+in order and records each applied version in schema_migrations, so every
+file runs exactly once per database.
+
+- Each migration runs in its own transaction, together with its
+  schema_migrations row.
+- A file whose first line is "-- migrate: no-transaction" runs statement by
+  statement outside a transaction instead. Use this for
+  CREATE/DROP INDEX CONCURRENTLY, which keeps the table writable while the
+  index is built, and for batched backfills (a procedure that COMMITs
+  between batches). Statements in such files are split on lines ending in
+  ";" outside $$ bodies. An INVALID index left behind by an interrupted
+  CREATE INDEX CONCURRENTLY is dropped and rebuilt on the next run.
+- Transactional migrations run with lock_timeout (default 5s), so a
+  migration never queues behind a long transaction while blocking
+  application queries behind itself. Concurrent index builds are exempt:
+  they wait for running transactions by design, without blocking writes.
+- A session advisory lock serializes concurrent runners (e.g. two deploys).
+
+The check command reports unused, duplicate/redundant and invalid indexes
+from pg_stat_user_indexes and the catalog. With --plans it also EXPLAINs
+every statement in the query registry (PostgreSQL 16+, GENERIC_PLAN) and
+lists sequential scans.
+
+Usage (from the backend directory):
+    python migrate.py status
+    python migrate.py up
+    python migrate.py check --plans
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import asyncpg
+
+from app.core.config import settings
+
+MIGRATIONS_DIR = Path(__file__).parent / "app" / "db" / "migrations"
+
+NO_TRANSACTION_HEADER = "-- migrate: no-transaction"
+
+# Arbitrary application-wide key for pg_advisory_lock
+MIGRATION_LOCK_KEY = 7_316_220_418
+
+# Indexes smaller than this are not reported as unused
+UNUSED_INDEX_MIN_BYTES = 1024 * 1024
+
+CREATE_SCHEMA_MIGRATIONS = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    checksum TEXT NOT NULL,
+    applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    duration_ms INTEGER NOT NULL
+)
+"""
+
+DOLLAR_QUOTE_PATTERN = re.compile(r"\$\w*\$")
+
+CONCURRENT_INDEX_PATTERN = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)",
+    re.IGNORECASE
+)
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    path: Path
+    sql: str
+    checksum: str
+    transactional: bool
+
+
+# ==================== MIGRATION FILES ====================
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """
+    Read the migration files in version order.
+
+    Raises:
+        ValueError: If a file name is malformed or a version is used twice
+    """
+    migrations = []
+    seen = {}
+
+    for path in sorted(directory.glob("*.sql")):
+        version, _, name = path.stem.partition("_")
+        if not version.isdigit() or not name:
+            raise ValueError(f"Migration file name must be NNNN_description.sql: {path.name}")
+        if int(version) in seen:
+            raise ValueError(f"Migration version {version} is used by {seen[int(version)]} and {path.name}")
+        seen[int(version)] = path.name
+
+        sql = path.read_text()
+        migrations.append(Migration(
+            version=int(version),
+            name=name,
+            path=path,
+            sql=sql,
+            checksum=hashlib.sha256(sql.encode("utf-8")).hexdigest(),
+            transactional=not sql.lstrip().startswith(NO_TRANSACTION_HEADER),
+        ))
+
+    return migrations
+
+
+def split_statements(sql: str) -> List[str]:
+    """
+    Split a no-transaction migration into statements: each ends with a line
+    ending in ';', unless that line is inside a dollar-quoted ($$) body.
+    """
+    statements = []
+    current: List[str] = []
+    dollar_tag: Optional[str] = None
+
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not current and (not stripped or stripped.startswith("--")):
+            continue
+        current.append(line)
+
+        for tag in DOLLAR_QUOTE_PATTERN.findall(line):
+            if dollar_tag is None:
+                dollar_tag = tag
+            elif tag == dollar_tag:
+                dollar_tag = None
+
+        if stripped.endswith(";") and dollar_tag is None:
+            statements.append("\n".join(current))
+            current = []
+
+    if any(line.strip() and not line.strip().startswith("--") for line in current):
+        statements.append("\n".join(current))
+
+    return statements
+
+
+# ==================== RUNNER ====================
+
+async def applied_migrations(conn: asyncpg.Connection) -> Dict[int, asyncpg.Record]:
+    await conn.execute(CREATE_SCHEMA_MIGRATIONS)
+    rows = await conn.fetch("SELECT version, name, checksum, applied_at FROM schema_migrations ORDER BY version")
+    return {row["version"]: row for row in rows}
+
+
+async def drop_invalid_index(conn: asyncpg.Connection, statement: str) -> None:
+    """Drop an INVALID index left by an interrupted CREATE INDEX CONCURRENTLY"""
+    match = CONCURRENT_INDEX_PATTERN.search(statement)
+    if not match:
+        return
+
+    invalid = await conn.fetchval(
+        """
+        SELECT NOT i.indisvalid
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = $1 AND pg_catalog.pg_table_is_visible(c.oid)
+        """,
+        match.group(1)
+    )
+    if invalid:
+        print(f"   ⚠️  Dropping invalid index {match.group(1)} from an interrupted build")
+        await conn.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{match.group(1)}"')
+
+
+async def apply_migration(conn: asyncpg.Connection, migration: Migration, lock_timeout: float) -> None:
+    started = time.perf_counter()
+
+    if migration.transactional:
+        async with conn.transaction():
+            await conn.execute(f"SET LOCAL lock_timeout = '{int(lock_timeout * 1000)}ms'")
+            await conn.execute(migration.sql)
+            await record_migration(conn, migration, started)
+        return
+
+    for statement in split_statements(migration.sql):
+        await drop_invalid_index(conn, statement)
+        await conn.execute(statement)
+    await record_migration(conn, migration, started)
+
+
+async def record_migration(conn: asyncpg.Connection, migration: Migration, started: float) -> None:
+    await conn.execute(
+        "INSERT INTO schema_migrations (version, name, checksum, duration_ms) VALUES ($1, $2, $3, $4)",
+        migration.version,
+        migration.name,
+        migration.checksum,
+        int((time.perf_counter() - started) * 1000)
+    )
+
+
+async def migrate_up(conn: asyncpg.Connection, args: argparse.Namespace) -> int:
+    """Apply pending migrations up to --target (default: all)"""
+    migrations = load_migrations()
+
+    await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_KEY)
+
+    try:
+        applied = await applied_migrations(conn)
+        check_checksums(migrations, applied)
+
+        pending = [
+            m for m in migrations
+            if m.version not in applied and (args.target is None or m.version <= args.target)
+        ]
+        if not pending:
+            print("✅ Database is up to date")
+            return 0
+
+        for migration in pending:
+            mode = "" if migration.transactional else " (no transaction)"
+            print(f"Applying {migration.path.name}{mode}...")
+            started = time.perf_counter()
+            try:
+                await apply_migration(conn, migration, args.lock_timeout)
+            except Exception as e:
+                print(f"❌ {migration.path.name} failed: {e}")
+                raise
+            print(f"   ✓ {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        print(f"✅ Applied {len(pending)} migration(s)")
+        return 0
+
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_KEY)
+
+
+def check_checksums(migrations: List[Migration], applied: Dict[int, asyncpg.Record]) -> None:
+    for migration in migrations:
+        row = applied.get(migration.version)
+        if row is not None and row["checksum"] != migration.checksum:
+            print(f"⚠️  {migration.path.name} was modified after it was applied")
+
+
+async def migration_status(conn: asyncpg.Connection, args: argparse.Namespace) -> int:
+    """List migrations and whether each is applied"""
+    migrations = load_migrations()
+    applied = await applied_migrations(conn)
+
+    for migration in migrations:
+        row = applied.get(migration.version)
+        if row is None:
+            print(f"   pending   {migration.path.name}")
+        else:
+            modified = "  (modified since applied)" if row["checksum"] != migration.checksum else ""
+            print(f"   applied   {migration.path.name}  {row['applied_at']:%Y-%m-%d %H:%M}{modified}")
+
+    known = {m.version for m in migrations}
+    for version, row in applied.items():
+        if version not in known:
+            print(f"   unknown   {version:04d}_{row['name']} (applied, file missing)")
+
+    pending = sum(1 for m in migrations if m.version not in applied)
+    print(f"\n{len(migrations) - pending} applied, {pending} pending")
+    return 1 if pending else 0
+
+
+# ==================== CHECKS ====================
+
+INDEX_INVENTORY = """
+SELECT
+    s.relname AS table_name,
+    s.indexrelname AS index_name,
+    s.idx_scan,
+    pg_relation_size(s.indexrelid) AS size_bytes,
+    i.indisunique,
+    i.indisprimary,
+    i.indisvalid,
+    i.indkey::int2[] AS columns,
+    pg_get_expr(i.indexprs, i.indrelid) AS expressions,
+    pg_get_expr(i.indpred, i.indrelid) AS predicate,
+    i.indclass::oid[] AS opclasses,
+    am.amname AS method
+FROM pg_stat_user_indexes s
+JOIN pg_index i ON i.indexrelid = s.indexrelid
+JOIN pg_class c ON c.oid = s.indexrelid
+JOIN pg_am am ON am.oid = c.relam
+ORDER BY s.relname, s.indexrelname
+"""
+
+# EXPLAIN GENERIC_PLAN of a statement passed as text. Sent directly over the
+# extended protocol, the EXPLAIN would need a value bound for each $n of the
+# statement; run through EXECUTE, the placeholders stay unbound.
+CREATE_GENERIC_PLAN_FUNCTION = """
+CREATE OR REPLACE FUNCTION pg_temp.generic_plan(statement TEXT) RETURNS TEXT
+LANGUAGE plpgsql AS $$
+DECLARE
+    plan TEXT;
+BEGIN
+    EXECUTE 'EXPLAIN (GENERIC_PLAN, FORMAT JSON) ' || statement INTO plan;
+    RETURN plan;
+END
+$$
+"""
+
+
+def find_redundant_indexes(indexes: List[asyncpg.Record]) -> List[str]:
+    """
+    Indexes another index on the same table makes unnecessary: identical
+    definitions, or a non-unique btree whose columns are a leading prefix
+    of another btree's.
+    """
+    findings = []
+
+    for index in indexes:
+        if index["indisprimary"] or index["expressions"] or not index["indisvalid"]:
+            continue
+
+        for other in indexes:
+            if other["index_name"] == index["index_name"] or other["table_name"] != index["table_name"]:
+                continue
+            if other["expressions"] or other["predicate"] != index["predicate"] or not other["indisvalid"]:
+                continue
+            if other["method"] != index["method"]:
+                continue
+
+            columns = list(index["columns"])
+            other_columns = list(other["columns"])
+            same_opclasses = list(other["opclasses"][:len(columns)]) == list(index["opclasses"])
+
+            if columns == other_columns and same_opclasses:
+                # Report each identical pair once, keeping the unique one
+                if index["indisunique"] and not other["indisunique"]:
+                    continue
+                if index["indisunique"] == other["indisunique"] and index["index_name"] < other["index_name"]:
+                    continue
+                findings.append(f"{index['table_name']}.{index['index_name']} duplicates {other['index_name']}")
+                break
+
+            if (index["method"] == "btree" and not index["indisunique"]
+                    and len(columns) < len(other_columns)
+                    and other_columns[:len(columns)] == columns and same_opclasses):
+                findings.append(
+                    f"{index['table_name']}.{index['index_name']} is a prefix of {other['index_name']}"
+                )
+                break
+
+    return findings
+
+
+def plan_seq_scans(plan: Dict[str, Any]) -> List[str]:
+    """Relations read with a sequential scan anywhere in an EXPLAIN plan"""
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(f"{plan.get('Relation Name')} (~{plan.get('Plan Rows')} rows)")
+    for child in plan.get("Plans", []):
+        found.extend(plan_seq_scans(child))
+    return found
+
+
+async def check_plans(conn: asyncpg.Connection) -> int:
+    """EXPLAIN every registered statement and list sequential scans"""
+    from app.db.queries import registered_queries
+
+    if await conn.fetchval("SELECT current_setting('server_version_num')::int") < 160000:
+        print("\n(Plan checks need PostgreSQL 16+ for EXPLAIN GENERIC_PLAN; skipped)")
+        return 0
+
+    print("\n🔍 Query plans (sequential scans):")
+    await conn.execute(CREATE_GENERIC_PLAN_FUNCTION)
+    problems = 0
+
+    for query in registered_queries():
+        try:
+            result = await conn.fetchval("SELECT pg_temp.generic_plan($1)", query.sql)
+        except (asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+            print(f"   ❌ {query.name}: {e}")
+            problems += 1
+            continue
+
+        plan = json.loads(result)[0]["Plan"]
+        scans = plan_seq_scans(plan)
+        if scans:
+            print(f"   ⚠️  {query.name}: {', '.join(scans)}")
+            problems += 1
+
+    if not problems:
+        print("   ✓ No sequential scans")
+    return problems
+
+
+async def check_indexes(conn: asyncpg.Connection, args: argparse.Namespace) -> int:
+    """Report unused, redundant and invalid indexes (and optionally plans)"""
+    indexes = await conn.fetch(INDEX_INVENTORY)
+    stats_reset = await conn.fetchval(
+        "SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()"
+    )
+    problems = 0
+
+    print("🔍 Invalid indexes (interrupted concurrent builds):")
+    invalid = [i for i in indexes if not i["indisvalid"]]
+    for index in invalid:
+        print(f"   ❌ {index['table_name']}.{index['index_name']}")
+    if not invalid:
+        print("   ✓ None")
+    problems += len(invalid)
+
+    print("\n🔍 Duplicate or redundant indexes:")
+    redundant = find_redundant_indexes(indexes)
+    for finding in redundant:
+        print(f"   ⚠️  {finding}")
+    if not redundant:
+        print("   ✓ None")
+    problems += len(redundant)
+
+    since = f" since {stats_reset:%Y-%m-%d}" if stats_reset else ""
+    print(f"\n🔍 Unused indexes (no scans{since}, unique indexes excluded):")
+    unused = [
+        i for i in indexes
+        if i["idx_scan"] == 0 and not i["indisunique"] and i["size_bytes"] >= args.min_size_kb * 1024
+    ]
+    for index in unused:
+        print(f"   ⚠️  {index['table_name']}.{index['index_name']} ({index['size_bytes'] // 1024} kB)")
+    if not unused:
+        print("   ✓ None")
+    problems += len(unused)
+
+    if args.plans:
+        problems += await check_plans(conn)
+
+    return 1 if problems else 0
+
+
+# ==================== CLI ====================
+
+async def run(args: argparse.Namespace) -> int:
+    conn = await asyncpg.connect(settings.DATABASE_URL)
+    try:
+        return await args.handler(conn, args)
+    finally:
+        await conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    status = commands.add_parser("status", help="List applied and pending migrations")
+    status.set_defaults(handler=migration_status)
+
+    up = commands.add_parser("up", help="Apply pending migrations")
+    up.add_argument("--target", type=int, help="Stop after this version")
+    up.add_argument("--lock-timeout", type=float, default=5.0, help="lock_timeout in seconds (default: %(default)s)")
+    up.set_defaults(handler=migrate_up)
+
+    check = commands.add_parser("check", help="Report index problems")
+    check.add_argument("--plans", action="store_true", help="Also EXPLAIN the registered queries (PostgreSQL 16+)")
+    check.add_argument(
+        "--min-size-kb",
+        type=int,
+        default=UNUSED_INDEX_MIN_BYTES // 1024,
+        help="Ignore unused indexes smaller than this (default: %(default)s)"
+    )
+    check.set_defaults(handler=check_indexes)
+
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
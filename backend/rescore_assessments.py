@@ -0,0 +1,298 @@
+"""
+Bulk Re-scoring Job - Recompute Historical Assessment Scores
+
+Run this script after changing an instrument's scoring bands (or items) in
+app/instruments to bring total_score / risk_level of stored assessments in
+line with the current definitions.
+
+Assessments are read in keyset chunks ordered by id. Answers stored packed
+(one byte per item) are read straight into a NumPy matrix; rows not yet
+converted have theirs extracted from the responses JSONB by PostgreSQL.
+Each chunk is scored with NumPy array operations (row sums and a band
+lookup with searchsorted) and only the rows whose score or risk level
+changed are written back, with one UPDATE ... FROM unnest() per chunk. The
+affected users' summary rollups are rebuilt in the same transaction.
+
+Progress is saved to a checkpoint file after every committed chunk, so an
+interrupted run continues where it stopped with --resume.
+
+Usage (from the backend directory):
+    python rescore_assessments.py --dry-run --report rescore-diff.csv
+    python rescore_assessments.py
+    python rescore_assessments.py --resume
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import asyncpg
+import numpy as np
+
+from app.api.assessments import ROLLING_AVERAGE_WINDOW
+from app.core.config import settings
+from app.core.instruments import Instrument, instruments
+from app.db import queries
+from app.db.queries import REBUILD_ASSESSMENT_SUMMARIES
+
+DEFAULT_CHUNK_SIZE = 20000
+DEFAULT_CHECKPOINT = "rescore_checkpoint.json"
+
+# Packed scores, or for unconverted rows the JSONB answers ordered by
+# question id; NULL or non-integer scores become -1 so the row fails
+# validation instead of the whole chunk failing to cast
+FETCH_CHUNK = """
+SELECT
+    a.id,
+    a.user_id,
+    a.total_score,
+    a.risk_level,
+    a.scores,
+    CASE WHEN a.scores IS NULL THEN ARRAY(
+        SELECT CASE WHEN r->>'score' ~ '^[0-9]+$' THEN (r->>'score')::int ELSE -1 END
+        FROM jsonb_array_elements(a.responses) AS r
+        ORDER BY (r->>'question_id')::int
+    ) END AS legacy_scores
+FROM assessments a
+WHERE a.type = $1 AND ($2::uuid IS NULL OR a.id > $2::uuid)
+ORDER BY a.id
+LIMIT $3
+"""
+
+APPLY_SCORES = """
+UPDATE assessments a
+SET total_score = u.total_score, risk_level = u.risk_level
+FROM unnest($1::uuid[], $2::int[], $3::text[]) AS u(id, total_score, risk_level)
+WHERE a.id = u.id
+"""
+
+
+# ==================== SCORING ====================
+
+def score_chunk(instrument: Instrument, rows: List[asyncpg.Record]) -> Dict[str, np.ndarray]:
+    """
+    Score a chunk of assessments with array operations.
+
+    Returns:
+        Arrays aligned with rows: valid (answers match the instrument),
+        total_score and risk_level (-1 / "" where invalid), and changed
+    """
+    count = len(rows)
+    item_count = len(instrument.item_ids)
+
+    packed = np.fromiter((row["scores"] is not None for row in rows), dtype=bool, count=count)
+    lengths = np.fromiter(
+        (len(row["scores"] if row["scores"] is not None else row["legacy_scores"]) for row in rows),
+        dtype=np.int64,
+        count=count
+    )
+    valid = lengths == item_count
+
+    total_score = np.full(count, -1, dtype=np.int64)
+    risk_level = np.full(count, "", dtype=object)
+
+    valid_rows = np.flatnonzero(valid)
+    if valid_rows.size:
+        answers = np.empty((valid_rows.size, item_count), dtype=np.int64)
+
+        # Packed rows: one buffer, viewed as a (rows x items) byte matrix
+        packed_rows = np.flatnonzero(packed[valid_rows])
+        if packed_rows.size:
+            buffer = b"".join(rows[i]["scores"] for i in valid_rows[packed_rows])
+            answers[packed_rows] = np.frombuffer(buffer, dtype=np.uint8).reshape(-1, item_count)
+
+        legacy_rows = np.flatnonzero(~packed[valid_rows])
+        if legacy_rows.size:
+            answers[legacy_rows] = np.array(
+                [rows[i]["legacy_scores"] for i in valid_rows[legacy_rows]], dtype=np.int64
+            ).reshape(legacy_rows.size, item_count)
+
+        # Every answer must be one of the instrument's option values
+        in_range = np.isin(answers, np.array(sorted(instrument.option_values))).all(axis=1)
+        valid[valid_rows[~in_range]] = False
+        valid_rows = valid_rows[in_range]
+        totals = answers[in_range].sum(axis=1)
+
+        band_min_scores = np.array(instrument.band_min_scores)
+        band_risk_levels = np.array(instrument.band_risk_levels, dtype=object)
+        bands = np.maximum(np.searchsorted(band_min_scores, totals, side="right") - 1, 0)
+
+        total_score[valid_rows] = totals
+        risk_level[valid_rows] = band_risk_levels[bands]
+
+    stored_score = np.fromiter((row["total_score"] for row in rows), dtype=np.int64, count=count)
+    stored_risk = np.array([row["risk_level"] for row in rows], dtype=object)
+    changed = valid & ((total_score != stored_score) | (risk_level != stored_risk))
+
+    return {
+        "valid": valid,
+        "total_score": total_score,
+        "risk_level": risk_level,
+        "changed": changed,
+    }
+
+
+# ==================== CHECKPOINTS ====================
+
+def load_checkpoint(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, checkpoint: Dict[str, Any]) -> None:
+    """Write the checkpoint atomically so a crash never leaves it truncated"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# ==================== JOB ====================
+
+async def rescore_type(
+    conn: asyncpg.Connection,
+    instrument: Instrument,
+    progress: Dict[str, Any],
+    args: argparse.Namespace,
+    checkpoint: Dict[str, Any],
+    report: Optional[Any],
+) -> None:
+    """Re-score every assessment of one type, resuming from progress"""
+    last_id = progress.get("last_id")
+    started = time.perf_counter()
+
+    while True:
+        rows = await conn.fetch(FETCH_CHUNK, instrument.type, last_id, args.chunk_size)
+        if not rows:
+            break
+
+        result = score_chunk(instrument, rows)
+        changed_rows = np.flatnonzero(result["changed"])
+
+        if report is not None:
+            for i in changed_rows:
+                row = rows[i]
+                report.writerow([
+                    row["id"], row["user_id"], instrument.type,
+                    row["total_score"], int(result["total_score"][i]),
+                    row["risk_level"], result["risk_level"][i],
+                ])
+
+        if changed_rows.size and not args.dry_run:
+            async with conn.transaction():
+                await conn.execute(
+                    APPLY_SCORES,
+                    [rows[i]["id"] for i in changed_rows],
+                    result["total_score"][changed_rows].tolist(),
+                    result["risk_level"][changed_rows].tolist(),
+                )
+                await queries.run(
+                    conn,
+                    "execute",
+                    REBUILD_ASSESSMENT_SUMMARIES,
+                    list({rows[i]["user_id"] for i in changed_rows}),
+                    instrument.type,
+                    ROLLING_AVERAGE_WINDOW,
+                )
+
+        last_id = rows[-1]["id"]
+        progress["last_id"] = str(last_id)
+        progress["scanned"] = progress.get("scanned", 0) + len(rows)
+        progress["changed"] = progress.get("changed", 0) + int(changed_rows.size)
+        progress["invalid"] = progress.get("invalid", 0) + int((~result["valid"]).sum())
+        save_checkpoint(args.checkpoint, checkpoint)
+
+        rate = progress["scanned"] / max(time.perf_counter() - started, 1e-9)
+        print(
+            f"   {instrument.type}: {progress['scanned']} scanned, "
+            f"{progress['changed']} changed, {progress['invalid']} invalid ({rate:,.0f} rows/s)"
+        )
+
+        if len(rows) < args.chunk_size:
+            break
+
+    progress["done"] = True
+    save_checkpoint(args.checkpoint, checkpoint)
+
+
+async def run_rescore(args: argparse.Namespace) -> None:
+    """Re-score all (or the selected) assessment types"""
+
+    types = args.types or list(instruments)
+    unknown = [t for t in types if t not in instruments]
+    if unknown:
+        raise SystemExit(f"❌ Unknown assessment type(s): {', '.join(unknown)}")
+
+    if args.resume:
+        if not os.path.exists(args.checkpoint):
+            raise SystemExit(f"❌ No checkpoint at {args.checkpoint}")
+        checkpoint = load_checkpoint(args.checkpoint)
+        if checkpoint.get("dry_run") != args.dry_run:
+            raise SystemExit("❌ Checkpoint was written by a run with a different --dry-run setting")
+    else:
+        checkpoint = {"dry_run": args.dry_run, "types": {}}
+
+    report_file = None
+    report = None
+    if args.report:
+        append = args.resume and os.path.exists(args.report)
+        report_file = open(args.report, "a" if append else "w", newline="")
+        report = csv.writer(report_file)
+        if not append:
+            report.writerow([
+                "id", "user_id", "type",
+                "old_total_score", "new_total_score", "old_risk_level", "new_risk_level",
+            ])
+
+    print("Connecting to database...")
+    conn = await asyncpg.connect(settings.DATABASE_URL)
+
+    try:
+        mode = "Dry run" if args.dry_run else "Re-scoring"
+        print(f"{mode}: {', '.join(types)} (chunks of {args.chunk_size})")
+
+        for assessment_type in types:
+            progress = checkpoint["types"].setdefault(assessment_type, {})
+            if progress.get("done"):
+                print(f"   {assessment_type}: already done, skipping")
+                continue
+            await rescore_type(conn, instruments[assessment_type], progress, args, checkpoint, report)
+
+        for assessment_type in types:
+            progress = checkpoint["types"][assessment_type]
+            print(
+                f"✅ {assessment_type}: {progress.get('scanned', 0)} scanned, "
+                f"{progress.get('changed', 0)} {'would change' if args.dry_run else 'changed'}, "
+                f"{progress.get('invalid', 0)} invalid"
+            )
+
+    finally:
+        await conn.close()
+        if report_file is not None:
+            report_file.close()
+        print("Database connection closed")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--type", dest="types", action="append", help="Only this assessment type (repeatable)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk (default: %(default)s)")
+    parser.add_argument("--dry-run", action="store_true", help="Score and report, but write nothing")
+    parser.add_argument("--report", help="Write changed rows (old and new values) to this CSV file")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Checkpoint file (default: %(default)s)")
+    parser.add_argument("--resume", action="store_true", help="Continue from the checkpoint file")
+    args = parser.parse_args(argv)
+
+    asyncio.run(run_rescore(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.api.assessments import decode_history_cursor, encode_history_cursor
+
+
+def test_history_cursor_round_trips():
+    created_at = datetime(2025, 6, 1, 8, 15, 30, 123456, tzinfo=timezone.utc)
+    assessment_id = uuid.uuid4()
+
+    cursor = encode_history_cursor(created_at, assessment_id)
+
+    assert "=" not in cursor
+    assert decode_history_cursor(cursor) == (created_at, assessment_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "bm90fGF8dXVpZA", "MjAyNS0wMS0wMQ"])
+def test_malformed_history_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_history_cursor(cursor)
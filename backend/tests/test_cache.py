@@ -0,0 +1,75 @@
+import pytest
+
+from app.core import cache
+from app.core.cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_get_returns_value_until_it_expires(clock):
+    entries = TTLCache(max_entries=10, ttl_seconds=30)
+    entries.set("a", 1)
+
+    clock[0] += 29.9
+    assert entries.get("a") == 1
+
+    clock[0] += 0.1
+    assert entries.get("a") is None
+    assert len(entries) == 0
+
+
+def test_ttl_override_is_capped_at_the_default(clock):
+    entries = TTLCache(max_entries=10, ttl_seconds=30)
+    entries.set("short", 1, ttl_seconds=5)
+    entries.set("long", 2, ttl_seconds=300)
+
+    clock[0] += 10
+    assert entries.get("short") is None
+    assert entries.get("long") == 2
+
+    clock[0] += 20
+    assert entries.get("long") is None
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    entries = TTLCache(max_entries=2, ttl_seconds=30)
+    entries.set("a", 1)
+    entries.set("b", 2)
+    entries.get("a")
+    entries.set("c", 3)
+
+    assert entries.get("b") is None
+    assert entries.get("a") == 1
+    assert entries.get("c") == 3
+    assert entries.evictions == 1
+
+
+@pytest.mark.parametrize("max_entries, ttl_seconds", [(0, 30), (10, 0)])
+def test_disabled_cache_stores_nothing(clock, max_entries, ttl_seconds):
+    entries = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    entries.set("a", 1)
+
+    assert not entries.enabled
+    assert entries.get("a") is None
+
+
+def test_invalidate_clear_and_stats(clock):
+    entries = TTLCache(max_entries=10, ttl_seconds=30)
+    entries.set("a", 1)
+    entries.set("b", 2)
+
+    entries.invalidate("a")
+    entries.invalidate("missing")
+    assert entries.get("a") is None
+    assert entries.get("b") == 2
+
+    stats = entries.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+    entries.clear()
+    assert len(entries) == 0
@@ -0,0 +1,11 @@
+import asyncio
+
+from app.api import health
+
+
+def test_worker_stats_reports_hasher_token_cache_and_queries():
+    stats = asyncio.run(health.worker_stats())
+
+    assert set(stats) == {"password_hasher", "token_cache", "queries"}
+    assert "rejected" in stats["password_hasher"]
+    assert "health_check" in stats["queries"]["queries"]
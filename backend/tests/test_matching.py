@@ -0,0 +1,131 @@
+import random
+
+import pytest
+
+from app.core import matching
+from app.core.matching import MatchIndex, MatchProfile, match_score, normalize_terms
+
+
+def profile(role, languages=(), interests=(), name=None):
+    return MatchProfile(
+        role=role,
+        full_name=name,
+        languages=frozenset(normalize_terms(languages)),
+        interests=frozenset(normalize_terms(interests)),
+    )
+
+
+@pytest.fixture
+def index():
+    return MatchIndex.build([
+        ("me", profile("user", ["English"], ["chess"])),
+        ("bilingual", profile("buddy", ["English", "Spanish"], [])),
+        ("chess-fan", profile("therapist", ["French"], ["chess", "hiking"])),
+        ("everything", profile("buddy", ["english", "spanish"], ["Chess", "hiking"])),
+        ("nothing", profile("therapist", ["German"], ["knitting"])),
+    ])
+
+
+def test_normalize_terms():
+    assert normalize_terms(["  Board   Games ", "board games", "HIKING", "", "   "]) == ["board games", "hiking"]
+    assert normalize_terms(None) == []
+    assert len(normalize_terms(f"term {i}" for i in range(100))) == matching.MAX_PROFILE_TERMS
+    assert normalize_terms(["x" * 80]) == ["x" * matching.MAX_TERM_LENGTH]
+
+
+def test_top_matches_ranks_by_weighted_overlap(index):
+    matches = index.top_matches("me", ["ENGLISH", "Spanish"], ["chess ", "hiking"], limit=10)
+
+    assert [(m.user_id, m.score) for m in matches] == [
+        ("everything", match_score(2, 2)),
+        ("bilingual", match_score(2, 0)),
+        ("chess-fan", match_score(0, 2)),
+    ]
+    assert matches[0].shared_languages == ["english", "spanish"]
+    assert matches[0].shared_interests == ["chess", "hiking"]
+
+
+def test_top_matches_filters_by_role_and_limit(index):
+    therapists = index.top_matches("me", ["English"], ["chess"], limit=10, role="therapist")
+    assert [m.user_id for m in therapists] == ["chess-fan"]
+
+    assert [m.user_id for m in index.top_matches("me", ["English"], ["chess"], limit=1)] == ["everything"]
+
+
+def test_top_matches_never_returns_the_caller(index):
+    matches = index.top_matches("everything", ["English"], ["chess"], limit=10)
+
+    assert "everything" not in [m.user_id for m in matches]
+
+
+def test_upsert_and_remove_update_the_postings(index):
+    index.upsert("nothing", profile("therapist", ["German"], ["chess"]))
+    index.remove("everything")
+    index.remove("unknown")
+
+    matches = index.top_matches("me", [], ["chess"], limit=10)
+
+    assert sorted(m.user_id for m in matches) == ["chess-fan", "nothing"]
+    assert len(index) == 4
+
+
+def test_common_terms_switch_between_sets_and_bitmaps(monkeypatch):
+    monkeypatch.setattr(matching, "_DENSE_MIN_SLOTS", 8)
+    index = MatchIndex.build((f"u{i}", profile("buddy", ["English"], [f"rare {i}"])) for i in range(8))
+    assert index._by_language.is_dense("english")
+    assert not index._by_interest.is_dense("rare 0")
+
+    for i in range(7):
+        index.remove(f"u{i}")
+    assert not index._by_language.is_dense("english")
+
+    for i in range(8, 16):
+        index.upsert(f"u{i}", profile("buddy", ["English"], []))
+    assert index._by_language.is_dense("english")
+    assert len(index.top_matches("caller", ["english"], [], limit=100)) == 9
+
+
+def test_top_matches_agrees_with_a_brute_force_ranking(monkeypatch):
+    monkeypatch.setattr(matching, "_DENSE_MIN_SLOTS", 20)
+    rng = random.Random(7)
+    languages = ["English", "Spanish", "French", "Hindi", "Arabic"]
+    interests = [f"interest {i}" for i in range(60)]
+
+    def random_profile():
+        return profile(
+            rng.choice(["buddy", "therapist"]),
+            rng.sample(languages, rng.randint(0, 3)),
+            rng.sample(interests[:rng.choice([10, 60])], rng.randint(0, 6)),
+        )
+
+    profiles = {f"u{i}": random_profile() for i in range(300)}
+    index = MatchIndex.build(profiles.items())
+    for _ in range(500):
+        user_id = f"u{rng.randrange(350)}"
+        if rng.random() < 0.3:
+            index.remove(user_id)
+            profiles.pop(user_id, None)
+        else:
+            profiles[user_id] = random_profile()
+            index.upsert(user_id, profiles[user_id])
+
+    for _ in range(50):
+        wanted_languages = frozenset(normalize_terms(rng.sample(languages, 2)))
+        wanted_interests = frozenset(normalize_terms(rng.sample(interests[:20], 4)))
+        role = rng.choice([None, "buddy", "therapist"])
+
+        expected = sorted(
+            (
+                match_score(len(p.languages & wanted_languages), len(p.interests & wanted_interests))
+                for user_id, p in profiles.items()
+                if user_id != "u0" and role in (None, p.role)
+            ),
+            reverse=True,
+        )
+        matches = index.top_matches("u0", wanted_languages, wanted_interests, limit=10, role=role)
+
+        assert [m.score for m in matches] == [score for score in expected if score > 0][:10]
+        for m in matches:
+            p = profiles[m.user_id]
+            assert m.profile == p
+            assert m.score == match_score(len(p.languages & wanted_languages), len(p.interests & wanted_interests))
@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import asyncpg
+
+from app.db.queries import registered_queries
+from migrate import check_plans, split_statements
+
+
+class PlanConnection:
+    """Stands in for a PostgreSQL 16 connection answering generic_plan()"""
+
+    def __init__(self, seq_scans=(), failing=()):
+        self.seq_scans = set(seq_scans)
+        self.failing = set(failing)
+        self.explained = []
+
+    async def execute(self, sql, *args):
+        assert "pg_temp.generic_plan" in sql and not args
+        return "CREATE FUNCTION"
+
+    async def fetchval(self, sql, *args):
+        if "server_version_num" in sql:
+            return 160002
+        assert sql == "SELECT pg_temp.generic_plan($1)"
+        (statement,) = args
+        name = next(query.name for query in registered_queries() if query.sql == statement)
+        self.explained.append(name)
+        if name in self.failing:
+            raise asyncpg.InterfaceError("the server expects 1 argument for this query, 0 were passed")
+        node = {"Node Type": "Seq Scan", "Relation Name": "users", "Plan Rows": 1000}
+        if name not in self.seq_scans:
+            node = {"Node Type": "Index Scan", "Relation Name": "users", "Plan Rows": 1}
+        return json.dumps([{"Plan": {"Node Type": "Limit", "Plans": [node]}}])
+
+
+def test_split_statements_on_lines_ending_in_semicolons():
+    sql = """-- migrate: no-transaction
+-- A comment before the first statement
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_a;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_b
+    ON t(a, b);
+"""
+
+    assert split_statements(sql) == [
+        "DROP INDEX CONCURRENTLY IF EXISTS idx_a;",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_b\n    ON t(a, b);",
+    ]
+
+
+def test_split_statements_keeps_dollar_quoted_bodies_whole():
+    body = """CREATE OR REPLACE PROCEDURE backfill() AS $$
+DECLARE
+    n INTEGER;
+BEGIN
+    UPDATE t SET a = 1;
+    COMMIT;
+END;
+$$ LANGUAGE plpgsql;"""
+    tagged = """DO $body$
+BEGIN
+    PERFORM 1;
+    RAISE NOTICE '$$ is not the tag here;';
+END;
+$body$;"""
+
+    assert split_statements(f"{body}\n\n{tagged}\nCALL backfill();\n") == [body, tagged, "CALL backfill();"]
+
+
+def test_split_statements_keeps_a_trailing_statement_without_semicolon():
+    assert split_statements("SELECT 1;\nSELECT 2\n-- done\n") == ["SELECT 1;", "SELECT 2\n-- done"]
+    assert split_statements("-- only comments\n\n") == []
+
+
+def test_check_plans_explains_every_registered_query_with_its_sql_as_a_parameter():
+    names = [query.name for query in registered_queries()]
+    conn = PlanConnection()
+
+    assert asyncio.run(check_plans(conn)) == 0
+    assert conn.explained == names
+
+
+def test_check_plans_counts_seq_scans_and_errors_without_stopping(capsys):
+    names = [query.name for query in registered_queries()]
+    conn = PlanConnection(seq_scans=names[:2], failing=names[-1:])
+
+    assert asyncio.run(check_plans(conn)) == 3
+    assert conn.explained == names
+    output = capsys.readouterr().out
+    assert f"{names[0]}: users (~1000 rows)" in output
+    assert f"{names[-1]}: the server expects 1 argument" in output
@@ -0,0 +1,85 @@
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+import pytest
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+from app.core.responses import dump_json, entity_etag, etag_matches
+
+
+class Row(BaseModel):
+    id: str
+    user_id: uuid.UUID
+    score: int
+    average: float
+    note: Optional[str] = None
+    tags: List[str]
+    created_at: datetime
+
+
+class RecordUUID(uuid.UUID):
+    """Stands in for asyncpg's UUID subclass"""
+
+
+@pytest.mark.parametrize("if_none_match, etag, expected", [
+    ('"abc"', '"abc"', True),
+    ('W/"abc"', '"abc"', True),
+    ('"abc"', 'W/"abc"', True),
+    ('"x", "abc" ', '"abc"', True),
+    ("*", '"abc"', True),
+    ('"abcd"', '"abc"', False),
+    ("", '"abc"', False),
+])
+def test_etag_matches(if_none_match, etag, expected):
+    assert etag_matches(if_none_match, etag) is expected
+
+
+def test_entity_etag_depends_on_every_part():
+    etag = entity_etag("profile", "user-1", 3)
+
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == entity_etag("profile", "user-1", 3)
+    assert etag != entity_etag("profile", "user-1", 4)
+    assert etag != entity_etag("profile", "user-2", 3)
+
+
+def test_dump_json_matches_fastapi_response_model_encoding():
+    created = datetime(2025, 3, 1, 12, 30, 5, tzinfo=timezone.utc)
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": RecordUUID(str(uuid.uuid4())),
+            "score": 14,
+            "average": 9.75,
+            "note": None,
+            "tags": ["a", "b"],
+            "created_at": created,
+        },
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": RecordUUID(str(uuid.uuid4())),
+            "score": 0,
+            "average": 0.0,
+            "note": "ünïcode",
+            "tags": [],
+            "created_at": created.replace(microsecond=123456),
+        },
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": RecordUUID(str(uuid.uuid4())),
+            "score": 27,
+            "average": 1.5,
+            "note": "offset",
+            "tags": ["c"],
+            "created_at": created.astimezone(timezone(timedelta(hours=2))),
+        },
+    ]
+
+    # FastAPI's path: validate against response_model, dump as JSON-compatible data, render
+    adapter = TypeAdapter(List[Row])
+    standard = JSONResponse(adapter.dump_python(adapter.validate_python(rows), mode="json")).body
+
+    assert json.loads(dump_json(rows)) == json.loads(standard)
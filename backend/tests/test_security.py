@@ -0,0 +1,93 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core import security
+from app.core.config import settings
+from app.core.security import PasswordHasherBusyError
+
+
+@pytest.fixture
+def hasher(monkeypatch):
+    """A fresh two-worker pool, clean metrics and the cheapest bcrypt cost"""
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(security, "_hash_executor", executor)
+    monkeypatch.setattr(security, "_hash_in_flight", 0)
+    monkeypatch.setattr(security, "_hash_metrics", dict.fromkeys(security._hash_metrics, 0))
+    monkeypatch.setattr(security, "_bcrypt_rounds", 4)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def test_hash_and_verify_round_trip(hasher):
+    async def scenario():
+        hashed = await security.hash_password_async("correct horse")
+        return (
+            hashed,
+            await security.verify_password_async("correct horse", hashed),
+            await security.verify_password_async("wrong horse", hashed),
+        )
+
+    hashed, matches, mismatches = asyncio.run(scenario())
+
+    assert security.get_hash_rounds(hashed) == 4
+    assert matches is True
+    assert mismatches is False
+
+
+def test_full_queue_rejects_with_busy_error(hasher, monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_QUEUE", 1)
+    release = threading.Event()
+
+    async def scenario():
+        blocked = asyncio.ensure_future(security._run_in_hash_pool(release.wait, 5))
+        await asyncio.sleep(0)
+        assert security.get_password_hasher_stats()["in_flight"] == 1
+
+        with pytest.raises(PasswordHasherBusyError):
+            await security.hash_password_async("correct horse")
+
+        release.set()
+        await blocked
+
+    asyncio.run(scenario())
+
+    stats = security.get_password_hasher_stats()
+    assert stats["rejected"] == 1
+    assert stats["submitted"] == 1
+    assert stats["completed"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_metrics_count_jobs_and_failures(hasher):
+    def fail():
+        raise ValueError("boom")
+
+    async def scenario():
+        await asyncio.gather(*(security._run_in_hash_pool(sum, [1, 2]) for _ in range(3)))
+        with pytest.raises(ValueError):
+            await security._run_in_hash_pool(fail)
+
+    asyncio.run(scenario())
+
+    stats = security.get_password_hasher_stats()
+    assert stats["submitted"] == 4
+    assert stats["completed"] == 3
+    assert stats["failed"] == 1
+    assert stats["rejected"] == 0
+    assert stats["in_flight"] == 0
+    assert 1 <= stats["peak_in_flight"] <= 4
+    assert stats["avg_run_ms"] >= 0.0
+    assert stats["avg_queue_wait_ms"] >= 0.0
+
+
+def test_only_hashes_below_the_active_cost_need_a_rehash(monkeypatch):
+    monkeypatch.setattr(security, "_bcrypt_rounds", 12)
+    salt = "abcdefghijklmnopqrstuv" + "x" * 31
+
+    assert security.password_needs_rehash(f"$2b$10${salt}")
+    assert not security.password_needs_rehash(f"$2b$12${salt}")
+    assert not security.password_needs_rehash(f"$2b$13${salt}")
+    assert security.password_needs_rehash("not-a-bcrypt-hash")
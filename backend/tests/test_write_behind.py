@@ -0,0 +1,102 @@
+import asyncio
+import json
+import uuid
+
+from app.core import write_behind
+from app.core.write_behind import stamp_submissions
+
+
+def submissions(count):
+    return [("user-1", "PHQ-9", bytes([i % 4] * 9), i, "low") for i in range(count)]
+
+
+def test_stamped_submissions_read_back_in_submission_order():
+    records = stamp_submissions(submissions(50))
+
+    # History and the latest-assessment lookups order by (created_at, id) DESC
+    newest_first = sorted(records, key=lambda record: (record[6], record[0]), reverse=True)
+
+    assert [record[4] for record in reversed(newest_first)] == list(range(50))
+
+
+def test_stamped_created_at_strictly_increases():
+    records = stamp_submissions(submissions(200))
+
+    created_ats = [record[6] for record in records]
+    assert all(earlier < later for earlier, later in zip(created_ats, created_ats[1:]))
+    assert len({record[0] for record in records}) == len(records)
+
+
+def journal_records(count):
+    return stamp_submissions(
+        [(str(uuid.uuid4()), "GAD-7", bytes([1] * 7), i, "low") for i in range(count)]
+    )
+
+
+def test_journal_record_round_trips():
+    record = journal_records(1)[0]
+
+    assert write_behind._decode(write_behind._encode(record)) == record
+
+
+def test_legacy_journal_line_with_json_responses_is_packed():
+    record = journal_records(1)[0]
+    line = json.dumps({
+        "id": record[0],
+        "user_id": record[1],
+        "type": "PHQ-9",
+        "responses": json.dumps([{"question_id": i, "score": i % 4} for i in range(1, 10)]),
+        "total_score": 18,
+        "risk_level": "high",
+        "created_at": record[6].isoformat(),
+    }).encode("utf-8")
+
+    decoded = write_behind._decode(line)
+
+    assert decoded[3] == bytes(i % 4 for i in range(1, 10))
+    assert decoded[4:] == (18, "high", record[6])
+
+
+def test_read_segment_skips_unreadable_records_and_a_torn_last_line(tmp_path):
+    records = journal_records(3)
+    segment = tmp_path / "000000000001.journal"
+    segment.write_bytes(
+        write_behind._encode(records[0])
+        + b"{not json}\n"
+        + write_behind._encode(records[1])
+        + write_behind._encode(records[2])[:-10]
+    )
+
+    assert write_behind._read_segment(segment) == records[:2]
+
+
+def test_journal_replays_leftover_segments_in_order(tmp_path):
+    records = journal_records(7)
+    worker_dir = tmp_path / "worker-0"
+    worker_dir.mkdir()
+    (worker_dir / "000000000001.journal").write_bytes(b"".join(write_behind._encode(r) for r in records[:4]))
+    (worker_dir / "000000000002.journal").write_bytes(b"".join(write_behind._encode(r) for r in records[4:]))
+
+    journal = write_behind.AssessmentJournal(
+        str(tmp_path), max_pending=100, batch_size=3, flush_interval=0.01, enqueue_timeout=1
+    )
+    inserted = []
+
+    async def insert(batch):
+        inserted.extend(batch)
+
+    journal._insert = insert
+
+    async def replay():
+        await journal.start(rolling_window=5)
+        for _ in range(200):
+            if len(inserted) == len(records):
+                break
+            await asyncio.sleep(0.01)
+        await journal.stop()
+
+    asyncio.run(replay())
+
+    assert inserted == records
+    assert journal.get_stats()["replayed"] == len(records)
+    assert not list(worker_dir.glob("*.journal"))
@@ -1,8 +1,9 @@
 """
 Schema Verification Script
 
-Tests the schema.sql file against the Neon PostgreSQL database.
-This is for VERIFICATION ONLY - not part of the application runtime.
+Tests the base schema (app/db/migrations/0001_schema.sql) against the Neon
+PostgreSQL database. This is for VERIFICATION ONLY - not part of the
+application runtime; apply schema changes with migrate.py.
 """
 
 import asyncio
@@ -13,17 +14,17 @@ from app.core.config import settings
 
 
 async def verify_schema():
-    """Execute schema.sql and verify it runs without errors"""
+    """Execute the base schema and verify it runs without errors"""
     
     print("🔍 Connecting to Neon PostgreSQL...")
     conn = await asyncpg.connect(settings.DATABASE_URL)
     
     try:
         # Read schema file
-        schema_path = Path(__file__).parent / "app" / "db" / "schema.sql"
+        schema_path = Path(__file__).parent / "app" / "db" / "migrations" / "0001_schema.sql"
         schema_sql = schema_path.read_text()
         
-        print("📄 Executing schema.sql...")
+        print("📄 Executing 0001_schema.sql...")
         await conn.execute(schema_sql)
         
         print("✅ Schema executed successfully!")